@@ -0,0 +1,783 @@
+"""
+Worker-scoped Chromium pool.
+
+Keeps a small number of long-lived browsers per process and hands out isolated
+contexts, so a crawl only pays for `browser.new_context()` instead of a full
+`chromium.launch()`. Browsers are recycled after serving a number of pages or
+when they crash/disconnect.
+
+With `browser_ws_endpoints` configured the pool connects to remote Playwright browser
+servers (`playwright run-server`) instead of launching Chromium in-process, so browser
+nodes scale separately from API and worker nodes. Connections are spread across the
+healthiest, least-loaded endpoints; failed endpoints are backed off and re-probed.
+
+A memory guard samples the RSS of locally launched browsers (with psutil) and counts
+their open pages. New contexts only go to browsers under `browser_max_open_pages`, and
+browsers above `browser_max_rss_mb` are recycled once their contexts drain. While no
+browser has room (or every context slot is taken), checkouts queue for up to
+`browser_capacity_wait_seconds` and are then refused with BrowserCapacityError.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+
+from app.core.config import settings
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+BROWSER_PROCESS_NAMES = ("chrom", "headless_shell")
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class BrowserCapacityError(RuntimeError):
+    """No browser had room for a new context within browser_capacity_wait_seconds."""
+
+
+class PooledBrowser:
+    """A launched browser plus the bookkeeping used to decide when to recycle it."""
+
+    def __init__(self, browser: Browser, endpoint: Optional[str] = None, pid: Optional[int] = None):
+        self.browser = browser
+        self.endpoint = endpoint
+        # Root process of a local browser, when it could be identified
+        self.pid = pid
+        self.active_contexts = 0
+        self.pages_served = 0
+        self.open_pages = 0
+        self.launched_at = time.monotonic()
+        self.retiring = False
+        self.over_memory = False
+
+        # Memory samples
+        self.rss_bytes: Optional[int] = None
+        self.peak_rss_bytes = 0
+        self.idle_rss_bytes: Optional[int] = None
+        self._per_page_total = 0.0
+        self._per_page_samples = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.browser.is_connected() and not self.retiring
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.open_pages < settings.browser_max_open_pages
+
+    def record_memory(self, rss_bytes: int) -> Optional[float]:
+        """
+        Store an RSS sample. Samples without open pages set the idle baseline; the others
+        yield the memory attributable to each open page (MB), which is returned.
+        """
+        self.rss_bytes = rss_bytes
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss_bytes)
+        if self.open_pages == 0:
+            self.idle_rss_bytes = rss_bytes if self.idle_rss_bytes is None else min(self.idle_rss_bytes, rss_bytes)
+            return None
+        if self.idle_rss_bytes is None:
+            return None
+        per_page = max(0, rss_bytes - self.idle_rss_bytes) / self.open_pages / MB
+        self._per_page_total += per_page
+        self._per_page_samples += 1
+        return per_page
+
+    @property
+    def mb_per_page(self) -> Optional[float]:
+        if not self._per_page_samples:
+            return None
+        return round(self._per_page_total / self._per_page_samples, 1)
+
+    def memory_stats(self) -> Dict[str, Any]:
+        return {
+            "pid": self.pid,
+            "endpoint": self.endpoint,
+            "open_pages": self.open_pages,
+            "pages_served": self.pages_served,
+            "rss_mb": _mb(self.rss_bytes),
+            "peak_rss_mb": _mb(self.peak_rss_bytes),
+            "idle_rss_mb": _mb(self.idle_rss_bytes),
+            "mb_per_page": self.mb_per_page,
+            "over_memory": self.over_memory,
+        }
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return round(value / MB, 1) if value else None
+
+
+def _is_browser_process(process) -> bool:
+    return any(name in process.name().lower() for name in BROWSER_PROCESS_NAMES)
+
+
+def _child_pids() -> Set[int]:
+    return {child.pid for child in psutil.Process(os.getpid()).children()}
+
+
+def _browser_roots() -> Set[int]:
+    """PIDs of browser root processes started (through the Playwright driver) by this process."""
+    roots = set()
+    for child in psutil.Process(os.getpid()).children(recursive=True):
+        try:
+            if _is_browser_process(child) and not _is_browser_process(child.parent()):
+                roots.add(child.pid)
+        except psutil.Error:
+            continue
+    return roots
+
+
+def _terminate_tree(pid: int):
+    """Terminate a process and its descendants, killing whatever outlives a short grace period."""
+    try:
+        root = psutil.Process(pid)
+        processes = root.children(recursive=True) + [root]
+    except psutil.Error:
+        return
+    for process in processes:
+        try:
+            process.terminate()
+        except psutil.Error:
+            continue
+    _gone, alive = psutil.wait_procs(processes, timeout=3)
+    for process in alive:
+        try:
+            process.kill()
+        except psutil.Error:
+            continue
+
+
+def _tree_rss(pid: int) -> Optional[int]:
+    """RSS of a browser and its renderer/GPU/utility processes. Shared pages are counted per process."""
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+
+class RemoteEndpoint:
+    """A remote browser server and its health state."""
+
+    def __init__(self, ws_endpoint: str):
+        self.ws_endpoint = ws_endpoint
+        self.failures = 0
+        self.down_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, error: Exception):
+        self.failures += 1
+        # Playwright appends a multi-line call log; the first line is the useful part
+        self.last_error = str(error).splitlines()[0] if str(error) else type(error).__name__
+        # Exponential backoff, capped at the health check interval
+        backoff = min(2 ** (self.failures - 1), settings.browser_health_check_interval_seconds)
+        self.down_until = time.monotonic() + backoff
+
+    def mark_up(self):
+        self.failures = 0
+        self.down_until = 0.0
+        self.last_error = None
+
+
+class WarmContext:
+    """A context kept open between crawls of the same bridge."""
+
+    def __init__(self, context: BrowserContext, pooled: PooledBrowser, expires_at: float):
+        self.context = context
+        self.pooled = pooled
+        self.expires_at = expires_at
+        self.in_use = False
+
+
+class BrowserPool:
+    """Hands out isolated browser contexts backed by a few shared browsers."""
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_contexts_per_browser: Optional[int] = None,
+        max_pages_per_browser: Optional[int] = None,
+        headless: bool = True,
+        endpoints: Optional[List[str]] = None,
+        launch_args: Optional[List[str]] = None,
+        channel: Optional[str] = None,
+    ):
+        self.endpoints = [RemoteEndpoint(e) for e in endpoints or []]
+        # Every remote endpoint gets at least one connection
+        self.size = max(size or settings.browser_pool_size, len(self.endpoints))
+        self.max_contexts_per_browser = max_contexts_per_browser or settings.browser_max_contexts_per_browser
+        self.max_pages_per_browser = max_pages_per_browser or settings.browser_max_pages_per_browser
+        self.headless = headless
+        self.launch_args = launch_args or []
+        self.channel = channel
+        self._health_task: Optional[asyncio.Task] = None
+        self._memory_task: Optional[asyncio.Task] = None
+        # Warm contexts by key, least recently used first
+        self._warm: "OrderedDict[str, WarmContext]" = OrderedDict()
+        self._warm_hits = 0
+        self._warm_misses = 0
+
+        self._playwright: Optional[Playwright] = None
+        # The Playwright driver process, when it could be identified
+        self._driver_pid: Optional[int] = None
+        self._browsers: List[PooledBrowser] = []
+        self._slots = asyncio.Semaphore(self.capacity)
+        self._lock = asyncio.Lock()
+        # Signalled (under the lock) whenever contexts, pages or browsers are released
+        self._capacity = asyncio.Condition(self._lock)
+        self._closed = False
+
+        # Metrics
+        self._waiting = 0
+        self._acquisitions = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+        self._recycles = 0
+        self._crashes = 0
+        self._capacity_waits = 0
+        self._capacity_refusals = 0
+        self._memory_recycles = 0
+        self._per_page_total = 0.0
+        self._per_page_samples = 0
+
+    async def start(self):
+        """Start the Playwright driver. Browsers themselves are launched lazily."""
+        async with self._lock:
+            if self._playwright is None:
+                before = await asyncio.to_thread(_child_pids) if PSUTIL_AVAILABLE else set()
+                self._playwright = await async_playwright().start()
+                if PSUTIL_AVAILABLE:
+                    started = await asyncio.to_thread(_child_pids) - before
+                    self._driver_pid = started.pop() if len(started) == 1 else None
+                if self.endpoints:
+                    self._health_task = asyncio.create_task(self._health_loop())
+                elif PSUTIL_AVAILABLE:
+                    self._memory_task = asyncio.create_task(self._memory_loop())
+                else:
+                    logger.info("psutil is not installed; browser memory is not tracked, only open pages")
+                logger.info(
+                    f"Browser pool started (size={self.size}, "
+                    f"contexts/browser={self.max_contexts_per_browser}, "
+                    f"pages/browser={self.max_pages_per_browser}, "
+                    f"remote endpoints={len(self.endpoints)})"
+                )
+
+    async def close(self):
+        """Close every browser and stop the driver."""
+        self._closed = True
+        for task in (self._health_task, self._memory_task):
+            if task:
+                task.cancel()
+        self._health_task = None
+        self._memory_task = None
+        async with self._lock:
+            self._warm.clear()
+            for pooled in self._browsers:
+                try:
+                    await pooled.browser.close()
+                except Exception:
+                    pass
+            self._browsers = []
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+            self._driver_pid = None
+
+    def kill(self):
+        """
+        Stop a pool whose event loop is gone, where close() can't be awaited: terminate the
+        launched browsers and the Playwright driver (which takes untracked browsers with it).
+        """
+        self._closed = True
+        pids = [b.pid for b in self._browsers if b.pid] + ([self._driver_pid] if self._driver_pid else [])
+        if PSUTIL_AVAILABLE:
+            for pid in pids:
+                _terminate_tree(pid)
+        elif self._browsers or self._playwright:
+            logger.warning("psutil is not installed; a stale browser pool's processes can't be stopped")
+        self._warm.clear()
+        self._browsers = []
+        self._playwright = None
+        self._driver_pid = None
+
+    @asynccontextmanager
+    async def context(self, **context_options: Any) -> AsyncIterator[BrowserContext]:
+        """
+        Borrow an isolated browser context.
+        The context is closed and its slot returned when the block exits.
+        """
+        await self._acquire_slot()
+        pooled: Optional[PooledBrowser] = None
+        context: Optional[BrowserContext] = None
+        try:
+            pooled, context = await self._new_context(context_options)
+            yield context
+        finally:
+            if context:
+                await self._close_context(context)
+            if pooled:
+                await self._checkin(pooled)
+            self._slots.release()
+
+    @asynccontextmanager
+    async def warm_context(
+        self,
+        key: str,
+        ttl_seconds: Optional[int] = None,
+        **context_options: Any
+    ) -> AsyncIterator[Tuple[BrowserContext, bool]]:
+        """
+        Borrow the warm context kept for `key` (e.g. an authenticated bridge session), or a
+        new one that stays open for `ttl_seconds` after a successful use.
+        Yields (context, reused). Options only apply when a new context is created, and pages
+        opened on the context must be closed by the caller since the context outlives the block.
+        """
+        ttl_seconds = ttl_seconds or settings.browser_warm_context_ttl_seconds
+        await self._acquire_slot()
+        warm: Optional[WarmContext] = None
+        pooled: Optional[PooledBrowser] = None
+        context: Optional[BrowserContext] = None
+        keep = False
+        try:
+            async with self._lock:
+                await self._evict_warm()
+                warm = self._warm.get(key)
+                if warm and not warm.in_use:
+                    warm.in_use = True
+                    self._warm.move_to_end(key)
+                    self._warm_hits += 1
+                else:
+                    # Missing, or busy with a concurrent crawl of the same bridge
+                    warm = None
+                    self._warm_misses += 1
+
+            if warm:
+                try:
+                    yield warm.context, True
+                    keep = True
+                finally:
+                    async with self._lock:
+                        warm.in_use = False
+                        warm.expires_at = time.monotonic() + ttl_seconds
+                        if not keep:
+                            # A failed crawl may leave the session in a bad state
+                            await self._drop_warm(warm)
+                return
+
+            pooled, context = await self._new_context(context_options)
+            yield context, False
+            keep = key not in self._warm
+        finally:
+            if context:
+                if keep and pooled.healthy:
+                    async with self._lock:
+                        self._warm[key] = WarmContext(context, pooled, time.monotonic() + ttl_seconds)
+                        await self._evict_warm()
+                else:
+                    await self._close_context(context)
+                    await self._checkin(pooled)
+            self._slots.release()
+
+    @property
+    def capacity(self) -> int:
+        """Contexts that can be checked out at once."""
+        return self.size * self.max_contexts_per_browser
+
+    async def _acquire_slot(self):
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=settings.browser_capacity_wait_seconds)
+        except asyncio.TimeoutError:
+            self._capacity_refusals += 1
+            raise BrowserCapacityError(
+                f"All {self.capacity} browser contexts stayed in use for {settings.browser_capacity_wait_seconds}s"
+            )
+        finally:
+            self._waiting -= 1
+        self._record_wait((time.monotonic() - started) * 1000)
+
+    async def _new_context(self, context_options: Dict[str, Any]) -> Tuple[PooledBrowser, BrowserContext]:
+        context_options.setdefault("user_agent", DEFAULT_USER_AGENT)
+        # One retry covers a browser that died between checkout and new_context()
+        for attempt in range(2):
+            pooled = await self._checkout()
+            try:
+                context = await pooled.browser.new_context(**context_options)
+                break
+            except Exception:
+                await self._checkin(pooled)
+                if attempt == 1:
+                    raise
+
+        context.on("page", lambda page, owner=pooled: self._count_page(owner, page))
+        return pooled, context
+
+    async def _close_context(self, context: BrowserContext):
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _evict_warm(self):
+        """Drop idle warm contexts that expired, sit on a retiring browser, or exceed the cap. Call under the lock."""
+        now = time.monotonic()
+        for warm in list(self._warm.values()):
+            if not warm.in_use and (warm.expires_at <= now or not warm.pooled.healthy):
+                await self._drop_warm(warm)
+
+        idle = [w for w in self._warm.values() if not w.in_use]
+        while len(self._warm) > settings.browser_warm_contexts_max and idle:
+            # Least recently used first
+            await self._drop_warm(idle.pop(0))
+
+    async def _drop_warm(self, warm: "WarmContext"):
+        for key, entry in list(self._warm.items()):
+            if entry is warm:
+                del self._warm[key]
+        warm.pooled.active_contexts = max(0, warm.pooled.active_contexts - 1)
+        await self._close_context(warm.context)
+        self._capacity.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and wait-time metrics."""
+        return {
+            "browsers": len(self._browsers),
+            "healthy_browsers": sum(1 for b in self._browsers if b.healthy),
+            "active_contexts": sum(b.active_contexts for b in self._browsers),
+            "capacity": self.size * self.max_contexts_per_browser,
+            "waiting": self._waiting,
+            "acquisitions": self._acquisitions,
+            "avg_wait_ms": round(self._total_wait_ms / self._acquisitions, 2) if self._acquisitions else 0.0,
+            "max_wait_ms": round(self._max_wait_ms, 2),
+            "recycles": self._recycles,
+            "crashes": self._crashes,
+            "pages_served": [b.pages_served for b in self._browsers],
+            "open_pages": sum(b.open_pages for b in self._browsers),
+            "memory": {
+                "tracked": PSUTIL_AVAILABLE and not self.endpoints,
+                "total_rss_mb": _mb(sum(b.rss_bytes or 0 for b in self._browsers)),
+                "peak_rss_mb": max((_mb(b.peak_rss_bytes) or 0 for b in self._browsers), default=0),
+                "avg_mb_per_page": round(self._per_page_total / self._per_page_samples, 1) if self._per_page_samples else None,
+                "capacity_waits": self._capacity_waits,
+                "capacity_refusals": self._capacity_refusals,
+                "memory_recycles": self._memory_recycles,
+                "browsers": [b.memory_stats() for b in self._browsers],
+            },
+            "warm_contexts": len(self._warm),
+            "warm_hits": self._warm_hits,
+            "warm_misses": self._warm_misses,
+            "endpoints": [
+                {
+                    "ws_endpoint": e.ws_endpoint,
+                    "available": e.available,
+                    "connections": sum(1 for b in self._browsers if b.endpoint == e.ws_endpoint),
+                    "failures": e.failures,
+                    "last_error": e.last_error,
+                }
+                for e in self.endpoints
+            ],
+        }
+
+    async def _checkout(self) -> PooledBrowser:
+        deadline = time.monotonic() + settings.browser_capacity_wait_seconds
+        waited = False
+        async with self._capacity:
+            while True:
+                if self._playwright is None:
+                    raise RuntimeError("Browser pool is not started")
+
+                await self._prune()
+
+                healthy = [b for b in self._browsers if b.healthy]
+                # A browser recycled for memory keeps its seat until it drains, so its
+                # replacement doesn't double the footprint in the meantime
+                draining = [b for b in self._browsers if b.over_memory and b.active_contexts]
+                if len(healthy) + len(draining) < self.size:
+                    pooled = await self._launch()
+                    self._browsers.append(pooled)
+                    healthy.append(pooled)
+
+                available = [b for b in healthy if b.has_capacity]
+                if available:
+                    pooled = min(available, key=lambda b: b.active_contexts)
+                    pooled.active_contexts += 1
+                    return pooled
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._capacity_refusals += 1
+                    raise BrowserCapacityError(
+                        f"No browser capacity after {settings.browser_capacity_wait_seconds}s "
+                        f"({sum(b.open_pages for b in self._browsers)} pages open)"
+                    )
+                if not waited:
+                    waited = True
+                    self._capacity_waits += 1
+                    logger.info("All browsers are at their page or memory limit, queueing")
+                try:
+                    # Page closes aren't signalled, so re-check at least once a second
+                    await asyncio.wait_for(self._capacity.wait(), timeout=min(remaining, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _checkin(self, pooled: PooledBrowser):
+        async with self._lock:
+            pooled.active_contexts = max(0, pooled.active_contexts - 1)
+            if not pooled.healthy and pooled.active_contexts == 0:
+                await self._retire(pooled)
+            self._capacity.notify_all()
+
+    async def _prune(self):
+        """Drop crashed browsers and close drained ones that are due for recycling."""
+        await self._evict_warm()
+        for pooled in list(self._browsers):
+            if not pooled.browser.is_connected() or (pooled.retiring and pooled.active_contexts == 0):
+                await self._retire(pooled)
+
+    async def _retire(self, pooled: PooledBrowser):
+        if pooled not in self._browsers:
+            return
+        self._browsers.remove(pooled)
+        self._recycles += 1
+        logger.info(f"Recycling browser after {pooled.pages_served} pages")
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+        self._capacity.notify_all()
+
+    async def _launch(self) -> PooledBrowser:
+        if self.endpoints:
+            pooled = await self._connect_remote()
+        else:
+            pooled = await self._launch_tracked()
+        pooled.browser.on("disconnected", lambda _browser: self._on_disconnected(pooled))
+        return pooled
+
+    async def _launch_tracked(self) -> PooledBrowser:
+        """Launch locally and find the new browser's root process for memory sampling."""
+        if not PSUTIL_AVAILABLE:
+            return PooledBrowser(await self._launch_local())
+        before = await asyncio.to_thread(_browser_roots)
+        browser = await self._launch_local()
+        started = await asyncio.to_thread(_browser_roots) - before
+        # Another pool may have launched concurrently; then the process is ambiguous
+        pid = started.pop() if len(started) == 1 else None
+        if pid is None:
+            logger.info("Could not identify the browser process; its memory won't be tracked")
+        return PooledBrowser(browser, pid=pid)
+
+    async def _launch_local(self) -> Browser:
+        if self.channel:
+            try:
+                return await self._playwright.chromium.launch(
+                    channel=self.channel, headless=self.headless, args=self.launch_args
+                )
+            except Exception as e:
+                logger.warning(f"Failed to launch '{self.channel}' channel, falling back to bundled chromium: {e}")
+        return await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+
+    async def _connect_remote(self) -> PooledBrowser:
+        """Connect to the least-loaded available endpoint, trying the others if it fails."""
+        def load(endpoint: RemoteEndpoint):
+            browsers = [b for b in self._browsers if b.endpoint == endpoint.ws_endpoint and b.healthy]
+            return (len(browsers), sum(b.active_contexts for b in browsers))
+
+        candidates = sorted((e for e in self.endpoints if e.available), key=load)
+        if not candidates:
+            # Everything is backed off: retry the endpoint that will recover first
+            candidates = [min(self.endpoints, key=lambda e: e.down_until)]
+
+        last_error: Optional[Exception] = None
+        for endpoint in candidates:
+            try:
+                browser = await self._playwright.chromium.connect(
+                    endpoint.ws_endpoint,
+                    timeout=settings.browser_connect_timeout_ms,
+                    headers={"x-playwright-launch-options": json.dumps(self._launch_options())},
+                )
+                endpoint.mark_up()
+                logger.info(f"Connected to remote browser at {endpoint.ws_endpoint}")
+                return PooledBrowser(browser, endpoint.ws_endpoint)
+            except Exception as e:
+                endpoint.mark_down(e)
+                last_error = e
+                logger.warning(f"Remote browser {endpoint.ws_endpoint} unavailable: {endpoint.last_error}")
+        raise RuntimeError(f"No remote browser endpoint available: {last_error}")
+
+    def _launch_options(self) -> Dict[str, Any]:
+        """Launch options applied by the browser server for this connection."""
+        options: Dict[str, Any] = {"headless": self.headless}
+        if self.launch_args:
+            options["args"] = self.launch_args
+        if self.channel:
+            options["channel"] = self.channel
+        return options
+
+    async def _health_loop(self):
+        """Periodically probe backed-off endpoints and drop dead connections."""
+        while not self._closed:
+            await asyncio.sleep(settings.browser_health_check_interval_seconds)
+            for endpoint in self.endpoints:
+                if endpoint.available:
+                    continue
+                if await self._probe(endpoint.ws_endpoint):
+                    logger.info(f"Remote browser {endpoint.ws_endpoint} is reachable again")
+                    endpoint.mark_up()
+            async with self._lock:
+                await self._prune()
+
+    async def _memory_loop(self):
+        """Periodically sample local browser memory and recycle browsers over the limit."""
+        while not self._closed:
+            await asyncio.sleep(settings.browser_memory_check_interval_seconds)
+            try:
+                await self._sample_memory()
+            except Exception as e:
+                logger.warning(f"Browser memory sampling failed: {e}")
+
+    async def _sample_memory(self):
+        tracked = [b for b in self._browsers if b.pid]
+        if not tracked:
+            return
+        samples = await asyncio.to_thread(lambda: {b.pid: _tree_rss(b.pid) for b in tracked})
+        limit = settings.browser_max_rss_mb * MB
+        async with self._lock:
+            for pooled in tracked:
+                rss = samples.get(pooled.pid)
+                if rss is None or pooled not in self._browsers:
+                    continue
+                per_page = pooled.record_memory(rss)
+                if per_page is not None:
+                    self._per_page_total += per_page
+                    self._per_page_samples += 1
+                if limit and rss > limit and not pooled.retiring:
+                    pooled.retiring = True
+                    pooled.over_memory = True
+                    self._memory_recycles += 1
+                    logger.warning(
+                        f"Browser {pooled.pid} uses {_mb(rss)} MB with {pooled.open_pages} pages open "
+                        f"(limit {settings.browser_max_rss_mb} MB), recycling once drained"
+                    )
+            await self._prune()
+            self._capacity.notify_all()
+
+    async def _probe(self, ws_endpoint: str) -> bool:
+        """Cheap TCP reachability check (a full connect would launch a browser)."""
+        parsed = urlparse(ws_endpoint)
+        port = parsed.port or (443 if parsed.scheme == "wss" else 80)
+        try:
+            _reader, writer = await asyncio.wait_for(asyncio.open_connection(parsed.hostname, port), timeout=5)
+            writer.close()
+            await writer.wait_closed()
+            return True
+        except Exception:
+            return False
+
+    def _on_disconnected(self, pooled: PooledBrowser):
+        if self._closed or pooled.retiring:
+            return
+        self._crashes += 1
+        pooled.retiring = True
+        logger.warning(f"Pooled browser disconnected unexpectedly after {pooled.pages_served} pages")
+
+    def _count_page(self, pooled: PooledBrowser, page: Page):
+        pooled.pages_served += 1
+        pooled.open_pages += 1
+        page.on("close", lambda _page: self._page_closed(pooled))
+        if pooled.pages_served >= self.max_pages_per_browser:
+            pooled.retiring = True
+
+    def _page_closed(self, pooled: PooledBrowser):
+        pooled.open_pages = max(0, pooled.open_pages - 1)
+
+    def _record_wait(self, wait_ms: float):
+        self._acquisitions += 1
+        self._total_wait_ms += wait_ms
+        self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+
+
+# Chrome flags needed for WebMCP (window.modelContext)
+WEBMCP_LAUNCH_ARGS = [
+    "--enable-features=WebMCP",
+    "--enable-experimental-web-platform-features",
+    "--no-sandbox", # Often needed in containerized envs
+    "--disable-setuid-sandbox",
+]
+
+POOL_DEFAULT = "default"
+POOL_WEBMCP = "webmcp"
+
+
+def _parse_endpoints(value: str) -> List[str]:
+    return [e.strip() for e in value.split(",") if e.strip()]
+
+
+def _create_pool(kind: str) -> BrowserPool:
+    if kind == POOL_WEBMCP:
+        return BrowserPool(
+            endpoints=_parse_endpoints(settings.webmcp_ws_endpoints or settings.browser_ws_endpoints),
+            launch_args=WEBMCP_LAUNCH_ARGS,
+            channel="chrome",
+        )
+    return BrowserPool(endpoints=_parse_endpoints(settings.browser_ws_endpoints))
+
+
+# Global pool instances (one per kind, per process / event loop)
+_pools: Dict[str, BrowserPool] = {}
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_browser_pool(kind: str = POOL_DEFAULT) -> BrowserPool:
+    """Get the browser pool of the given kind for the running event loop, starting it if needed."""
+    global _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool_loop is not loop:
+        # Playwright objects are bound to the loop that created them
+        for pool in _pools.values():
+            pool.kill()
+        _pools.clear()
+        _pool_loop = loop
+    if kind not in _pools:
+        _pools[kind] = _create_pool(kind)
+    await _pools[kind].start()
+    return _pools[kind]
+
+
+async def close_browser_pool():
+    """Close every browser pool"""
+    global _pool_loop
+    for pool in list(_pools.values()):
+        await pool.close()
+    _pools.clear()
+    _pool_loop = None
+
+
+def get_browser_pool_stats() -> Optional[Dict[str, Any]]:
+    """Metrics per pool kind, or None if no pool has been started."""
+    return {kind: pool.stats() for kind, pool in _pools.items()} or None
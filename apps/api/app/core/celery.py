@@ -16,4 +16,10 @@ celery_app.conf.update(
     enable_utc=True,
     task_track_started=True,
     task_time_limit=300,  # 5 minutes
+    beat_schedule={
+        "webmcp-manifest-sweep": {
+            "task": "app.services.tasks.run_webmcp_sweep_task",
+            "schedule": settings.webmcp_sweep_interval_seconds,
+        },
+    },
 )
@@ -24,6 +24,96 @@ class Settings(BaseSettings):
     # Rate Limiting
     default_rate_limit_per_day: int = 100
     
+    # Browser Pool
+    browser_pool_size: int = 2
+    browser_max_contexts_per_browser: int = 4
+    browser_max_pages_per_browser: int = 200
+    browser_ws_endpoints: str = ""  # Comma-separated ws:// Playwright browser servers (empty = launch locally)
+    webmcp_ws_endpoints: str = ""  # Browser servers for WebMCP (Chrome with WebMCP flags); defaults to browser_ws_endpoints
+    browser_connect_timeout_ms: int = 10000
+    browser_health_check_interval_seconds: int = 30
+    browser_warm_context_ttl_seconds: int = 600  # Authenticated contexts kept open between runs of a bridge
+    browser_warm_contexts_max: int = 8
+    browser_max_open_pages: int = 16  # Per browser; new contexts queue while every browser is at the limit
+    browser_max_rss_mb: int = 2048  # Per local browser (all its processes); recycled above this. 0 = no limit
+    browser_memory_check_interval_seconds: int = 15
+    browser_capacity_wait_seconds: int = 30  # How long a checkout queues for capacity before it's refused
+    
+    # Chunked extraction (pages larger than one prompt are split, extracted concurrently and merged)
+    chunked_extraction_enabled: bool = True
+    extraction_chunk_tokens: int = 8000  # Upper bound per chunk; smaller when the model's context is
+    extraction_chunk_overlap_tokens: int = 200
+    extraction_max_page_tokens: int = 100000  # Distilled page cap across all chunks
+    extraction_response_reserve_tokens: int = 4096
+    llm_max_concurrency_per_provider: int = 4
+    llm_provider_concurrency: str = ""  # Per-provider overrides, e.g. "ollama=1,openai=8"
+
+    # Selector extraction (a bridge's compiled CSS/XPath selectors run before the LLM)
+    selector_extraction_enabled: bool = True
+    selector_min_coverage: float = 0.5  # Share of fields selectors must fill, else the LLM runs
+    selector_autopropose: bool = True  # After an LLM extraction, ask once for selectors that reproduce it
+    selector_propose_backoff_seconds: int = 86400  # Per bridge, between proposal attempts
+    selector_proposal_token_budget: int = 6000  # Page skeleton sent with the proposal prompt
+
+    # WebMCP
+    webmcp_manifest_ttl_seconds: int = 86400  # The sweeper re-verifies manifests older than this
+    webmcp_sweep_interval_seconds: int = 3600
+    webmcp_sweep_batch_size: int = 200  # Bridges re-verified per sweep
+    webmcp_sweep_concurrency: int = 4  # Pages probed at once (one shared browser context)
+    webmcp_session_ttl_seconds: int = 60  # Idle lifetime of a kept-alive batch-execute session
+    webmcp_max_sessions: int = 4  # Per API process; each holds a pooled context, so never more than half the WebMCP pool
+    webmcp_tool_wait_ms: int = 1000  # Longest wait for page scripts to register tools
+
+    # Outbound HTTP (shared clients)
+    http2_enabled: bool = True  # Needs the h2 package
+    http_connect_timeout_seconds: float = 5.0
+    http_keepalive_expiry_seconds: float = 30.0
+    
+    # Page Rendering
+    default_resource_profile: str = "standard"  # full | standard | text-only | no-third-party
+    static_fetch_enabled: bool = True
+    fetch_mode_ttl_seconds: int = 86400 * 7
+    readiness_budget_ms: int = 10000
+    readiness_quiet_ms: int = 500
+    max_concurrent_pages_per_domain: int = 3
+    dom_snapshot_enabled: bool = True  # With distillation off, send a compact text-and-structure snapshot instead of raw HTML
+    distill_enabled: bool = True  # Distill HTML to main-content-first text and structure for LLM prompts
+    llm_input_token_budget: int = 4000  # Page content per extraction prompt when chunked extraction is off
+    discovery_input_token_budget: int = 5000  # Page content per schema discovery prompt
+    dom_pruning_enabled: bool = True  # Strip scripts/styles/hidden nodes in the page before transferring HTML
+    dom_prune_max_children: int = 300  # Longer child lists are truncated in the transferred HTML
+    dom_prune_max_text: int = 5000  # Per text node
+    discovery_cache_ttl_seconds: int = 600  # Discovery page loads reused by /analyze, /survey and a new bridge's first run
+    
+    # Politeness (cluster-wide, enforced through Redis)
+    politeness_default_crawl_delay: int = 1  # Seconds, when robots.txt doesn't say
+    politeness_max_concurrency_per_domain: int = 2
+    politeness_lease_ttl_seconds: int = 120  # Renewed while the crawl runs; only bounds how long a dead worker holds a slot
+    politeness_max_wait_seconds: int = 120
+    
+    # Network Capture (JSON fetch/XHR responses)
+    json_capture_max_bytes: int = 2 * 1024 * 1024
+    json_capture_max_responses: int = 50
+    json_endpoint_index_ttl_seconds: int = 86400 * 30
+    
+    # Snapshot Archive (zstd-compressed, content-addressed)
+    snapshot_archive_dir: str = "data/snapshots"
+    snapshot_archive_zstd_level: int = 10
+    reextract_concurrency: int = 4
+    
+    # Crawl Frontier (site-wide crawls from sitemaps / link patterns / URL lists)
+    frontier_batch_size: int = 20
+    frontier_concurrency: int = 4
+    frontier_urls_per_task: int = 500  # The task re-queues itself after this many URLs
+    frontier_task_seconds: int = 180  # ...or after this long; politeness delays make 500 URLs of one site take minutes
+    frontier_task_time_limit_seconds: int = 300  # Hard kill for a run that overshoots its budget
+    frontier_lease_seconds: int = 360  # A run's claim on the frontier; outlives the hard limit, expires if its worker dies
+    frontier_max_urls: int = 100000
+    frontier_ttl_seconds: int = 86400 * 30
+    sitemap_max_files: int = 1000
+    sitemap_max_bytes: int = 50 * 1024 * 1024  # Sitemap protocol limit (uncompressed)
+    sitemap_fetch_timeout_seconds: float = 60.0
+    
     # Environment
     environment: str = "development"
     
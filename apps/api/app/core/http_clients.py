@@ -0,0 +1,160 @@
+"""
+Shared outbound HTTP clients.
+
+Services used to open an httpx/aiohttp/requests client per call, paying a TCP and TLS
+handshake every time. Instead each purpose gets one long-lived, keep-alive (and, with
+`h2` installed, HTTP/2) client per process and event loop, with its own connection limits
+and timeouts.
+
+Clients don't keep cookies: a shared jar would leak sessions between bridges, so callers
+that need cookies send them per request.
+
+httpx has no DNS cache and no public hook for one. Lookups only happen when a new
+connection is opened, so keep-alive reuse is what keeps DNS traffic down (the stats show
+how often connections were reused); repeat lookups are left to the system resolver's cache.
+"""
+import asyncio
+import logging
+from collections import Counter
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PURPOSE_FETCH = "fetch"  # Static page fetches
+PURPOSE_PROBE = "probe"  # robots.txt / security.txt
+PURPOSE_DISCOVERY = "discovery"  # Official API candidates (unverified TLS, short timeout)
+PURPOSE_WEBHOOK = "webhook"
+PURPOSE_VALIDATION = "validation"  # Leaked-key checks against provider APIs
+PURPOSE_LLM = "llm"  # Self-hosted model servers (Ollama)
+
+CLIENT_PROFILES: Dict[str, Dict[str, Any]] = {
+    PURPOSE_FETCH: {"timeout": 15.0, "max_connections": 100, "max_keepalive": 20, "follow_redirects": False},
+    PURPOSE_PROBE: {"timeout": 10.0, "max_connections": 50, "max_keepalive": 10, "follow_redirects": True},
+    PURPOSE_DISCOVERY: {"timeout": 5.0, "max_connections": 20, "max_keepalive": 10, "follow_redirects": True, "verify": False},
+    PURPOSE_WEBHOOK: {"timeout": 10.0, "max_connections": 20, "max_keepalive": 10, "follow_redirects": False},
+    PURPOSE_VALIDATION: {"timeout": 5.0, "max_connections": 10, "max_keepalive": 5, "follow_redirects": False},
+    PURPOSE_LLM: {"timeout": 60.0, "max_connections": 10, "max_keepalive": 10, "follow_redirects": False},
+}
+
+
+class _NoCookies(DefaultCookiePolicy):
+    def set_ok(self, cookie, request):
+        return False
+
+
+class ClientStats:
+    """Request and connection counters for one purpose."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.http_versions: Counter = Counter()
+
+    async def trace(self, event: str, info: Dict[str, Any]):
+        # httpcore trace events, only emitted when a new connection is set up
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        reused = max(0, self.requests - self.connections_opened)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else None,
+            "http_versions": dict(self.http_versions),
+        }
+
+
+# Clients per purpose, bound to the event loop that created them
+_clients: Dict[str, httpx.AsyncClient] = {}
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# Stats outlive clients so worker metrics survive a loop change
+_stats: Dict[str, ClientStats] = {}
+
+
+def _create_client(purpose: str) -> httpx.AsyncClient:
+    profile = CLIENT_PROFILES[purpose]
+    stats = _stats.setdefault(purpose, ClientStats())
+
+    async def on_request(request: httpx.Request):
+        stats.requests += 1
+        request.extensions["trace"] = stats.trace
+
+    async def on_response(response: httpx.Response):
+        stats.http_versions[response.http_version] += 1
+
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE and settings.http2_enabled,
+        verify=profile.get("verify", True),
+        follow_redirects=profile["follow_redirects"],
+        timeout=httpx.Timeout(profile["timeout"], connect=min(profile["timeout"], settings.http_connect_timeout_seconds)),
+        limits=httpx.Limits(
+            max_connections=profile["max_connections"],
+            max_keepalive_connections=profile["max_keepalive"],
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+        cookies=CookieJar(policy=_NoCookies()),
+        event_hooks={"request": [on_request], "response": [on_response]},
+    )
+
+
+def _release_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+    """
+    Release a client left behind by an event loop change. It can only be closed on its own
+    loop: if that loop is still open, the close runs there the next time it runs. A closed
+    loop's connections can't be closed any more; dropping the client frees them.
+    """
+    if loop is None or loop.is_closed():
+        return
+    try:
+        loop.call_soon_threadsafe(lambda: loop.create_task(client.aclose()))
+    except RuntimeError:
+        # Closed in the meantime
+        pass
+
+
+def get_http_client(purpose: str) -> httpx.AsyncClient:
+    """Shared client for a purpose (see CLIENT_PROFILES). Must be called from a coroutine."""
+    global _client_loop
+    loop = asyncio.get_running_loop()
+    if _client_loop is not loop:
+        # Connections belong to the loop that opened them
+        for client in _clients.values():
+            _release_client(client, _client_loop)
+        _clients.clear()
+        _client_loop = loop
+    if purpose not in _clients:
+        _clients[purpose] = _create_client(purpose)
+    return _clients[purpose]
+
+
+async def close_http_clients():
+    """Close every shared client"""
+    global _client_loop
+    for client in list(_clients.values()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP client: {e}")
+    _clients.clear()
+    _client_loop = None
+
+
+def get_http_client_stats() -> Optional[Dict[str, Any]]:
+    """Connection reuse per purpose, or None if no client was used yet."""
+    return {purpose: stats.to_dict() for purpose, stats in _stats.items()} or None
@@ -1,4 +1,4 @@
 from app.core.database import Base
-from .models import User, ApiKey, Bridge, UsageLog, Webhook, WebhookLog, DomainPermission, HandshakeRequest, LLMProviderConfig, WebMCPTool
+from .models import User, ApiKey, Bridge, UsageLog, Webhook, WebhookLog, DomainPermission, HandshakeRequest, LLMProviderConfig, WebMCPTool, PageSnapshot
 
-__all__ = ["Base", "User", "ApiKey", "Bridge", "UsageLog", "Webhook", "WebhookLog", "DomainPermission", "HandshakeRequest", "LLMProviderConfig", "WebMCPTool"]
+__all__ = ["Base", "User", "ApiKey", "Bridge", "UsageLog", "Webhook", "WebhookLog", "DomainPermission", "HandshakeRequest", "LLMProviderConfig", "WebMCPTool", "PageSnapshot"]
@@ -54,6 +54,14 @@ class Bridge(Base):
     interaction_script = Column(JSON, nullable=True) # [ { "action": "click", "selector": "#login" }, ... ]
     session_data = Column(JSON, nullable=True) # Persistent session storage (Cookies, LocalStorage)
     
+    # Rendering
+    resource_profile = Column(String(50), nullable=True) # full | standard | text-only | no-third-party (None = default)
+    readiness_budget_ms = Column(Integer, nullable=True) # Max wait for page readiness (None = default)
+    pagination = Column(JSON, nullable=True) # { "type": "next_link"|"url_template", ... }
+    json_source = Column(JSON, nullable=True) # { "url_pattern": ..., "json_path": ... } (read captured JSON, no LLM)
+    snapshot_retention = Column(Integer, nullable=True) # Archive the last N crawled pages (None = archiving off)
+    crawl_config = Column(JSON, nullable=True) # { "sitemaps": [...]|"auto", "urls": [...], "link_patterns": [...], ... } (site-wide crawl)
+    
     status = Column(String(20), default="active")
     last_successful_extraction = Column(DateTime, nullable=True)
     last_error = Column(Text, nullable=True)
@@ -67,6 +75,7 @@ class Bridge(Base):
     owner = relationship("User", back_populates="bridges")
     usage_logs = relationship("UsageLog", back_populates="bridge", cascade="all, delete-orphan")
     webmcp_tools = relationship("WebMCPTool", back_populates="bridge", cascade="all, delete-orphan")
+    page_snapshots = relationship("PageSnapshot", back_populates="bridge", cascade="all, delete-orphan")
 
 class WebMCPTool(Base):
     __tablename__ = "webmcp_tools"
@@ -84,6 +93,20 @@ class WebMCPTool(Base):
     
     bridge = relationship("Bridge", back_populates="webmcp_tools")
 
+class PageSnapshot(Base):
+    __tablename__ = "page_snapshots"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    bridge_id = Column(UUID(as_uuid=True), ForeignKey("bridges.id", ondelete="CASCADE"), index=True)
+    url = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=False, index=True) # sha256 of the HTML (archive blob key)
+    snapshot_hash = Column(String(64), nullable=True, index=True) # sha256 of the compact snapshot, if captured
+    size_bytes = Column(Integer, nullable=False)
+    compressed_bytes = Column(Integer, nullable=False)
+    captured_at = Column(DateTime, default=datetime.utcnow)
+
+    bridge = relationship("Bridge", back_populates="page_snapshots")
+
 class UsageLog(Base):
     __tablename__ = "usage_logs"
 
@@ -97,6 +120,7 @@ class UsageLog(Base):
     status_code = Column(Integer, nullable=False)
     latency_ms = Column(Integer, nullable=True)
     cached = Column(Boolean, default=False)
+    metrics = Column(JSON, nullable=True) # Per-run crawl metrics (blocked requests, bytes saved, ...)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="usage_logs")
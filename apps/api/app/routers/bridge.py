@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import Any, Dict, List, Optional
 from app.core.database import get_db
 from app.models import Bridge, User, UsageLog, ApiKey
 from app.schemas.bridge import BridgeCreate, BridgeResponse, ExtractionResult
@@ -10,7 +10,7 @@ from app.services.extractor import ExtractionService
 import uuid
 from datetime import datetime
 import time
-from sqlalchemy import func
+from sqlalchemy import func, and_, or_
 from app.schemas.bridge import (
     BridgeCreate, 
     BridgeResponse, 
@@ -18,12 +18,16 @@ from app.schemas.bridge import (
     TaskResponse, 
     ScanResponse
 )
-from app.services.tasks import run_extraction_task
+from app.services.tasks import run_extraction_task, run_reextraction_task, run_frontier_crawl_task
+from app.services.frontier import CrawlFrontier
+from app.services.archive import SnapshotArchive
 from app.services.scanner import SecretScanner
 from app.core.celery import celery_app
 from celery.result import AsyncResult
 from app.core.security import validate_api_key
 from app.services.discovery import SchemaDiscoveryService
+from app.services.network_capture import get_endpoint_index
+from app.services.selectors import SelectorSpecError, compile_selectors
 from pydantic import BaseModel, HttpUrl
 
 class AnalyzeRequest(BaseModel):
@@ -31,6 +35,13 @@ class AnalyzeRequest(BaseModel):
 
 router = APIRouter(prefix="/bridges", tags=["Bridges"])
 
+def _check_selectors(bridge_in: BridgeCreate):
+    if bridge_in.selectors:
+        try:
+            compile_selectors(bridge_in.selectors)
+        except SelectorSpecError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/analyze")
 async def analyze_url(
     request: AnalyzeRequest,
@@ -42,7 +53,7 @@ async def analyze_url(
     service = SchemaDiscoveryService(db)
     try:
         schema = await service.discover_schema(str(request.url), UUID("00000000-0000-0000-0000-000000000000")) # TODO: Get real user
-        return {"schema": schema}
+        return {"schema": schema, "elements": service.last_discovery["elements"]}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -97,12 +108,15 @@ async def get_dashboard_stats(
         total = (await db.execute(
             select(func.count(UsageLog.id)).where(UsageLog.created_at >= start, UsageLog.created_at < end)
         )).scalar() or 0
+        # Unchanged-page skips (304) count as successful runs
         success = (await db.execute(
             select(func.count(UsageLog.id)).where(
                 UsageLog.created_at >= start, 
                 UsageLog.created_at < end,
-                UsageLog.status_code >= 200, 
-                UsageLog.status_code < 300
+                or_(
+                    and_(UsageLog.status_code >= 200, UsageLog.status_code < 300),
+                    UsageLog.status_code == 304
+                )
             )
         )).scalar() or 0
         rate = (success / total * 100) if total > 0 else 100.0
@@ -169,6 +183,8 @@ async def create_bridge(
     bridge_in: BridgeCreate, 
     db: AsyncSession = Depends(get_db)
 ):
+    _check_selectors(bridge_in)
+
     # For MVP, we assume a default user exists
     result = await db.execute(select(User).limit(1))
     user = result.scalar_one_or_none()
@@ -290,6 +306,7 @@ async def update_bridge(
     bridge = await db.get(Bridge, bridge_id)
     if not bridge:
         raise HTTPException(status_code=404, detail="Bridge not found")
+    _check_selectors(bridge_in)
     
     for key, value in bridge_in.model_dump().items():
         setattr(bridge, key, value)
@@ -354,6 +371,114 @@ async def get_bridge_logs(
     )
     return result.scalars().all()
 
+@router.get("/{bridge_id}/endpoints")
+async def get_bridge_endpoints(
+    bridge_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    JSON API endpoints captured while rendering this bridge's pages.
+    Bind one by setting json_source = { "url_pattern": ..., "json_path": ... } on the bridge.
+    """
+    bridge = await db.get(Bridge, bridge_id)
+    if not bridge:
+        raise HTTPException(status_code=404, detail="Bridge not found")
+    return await get_endpoint_index(str(bridge.id))
+
+@router.get("/{bridge_id}/snapshots")
+async def get_bridge_snapshots(
+    bridge_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Archived page snapshots for this bridge, newest first."""
+    bridge = await db.get(Bridge, bridge_id)
+    if not bridge:
+        raise HTTPException(status_code=404, detail="Bridge not found")
+    snapshots = await SnapshotArchive().list_snapshots(db, bridge.id)
+    return [
+        {
+            "id": str(s.id),
+            "url": s.url,
+            "content_hash": s.content_hash,
+            "size_bytes": s.size_bytes,
+            "compressed_bytes": s.compressed_bytes,
+            "captured_at": s.captured_at.isoformat() if s.captured_at else None
+        }
+        for s in snapshots
+    ]
+
+class ReextractRequest(BaseModel):
+    limit: Optional[int] = None
+    extraction_schema: Optional[Dict[str, Any]] = None # Try a new schema without saving it
+
+@router.post("/{bridge_id}/reextract", response_model=TaskResponse)
+async def reextract_bridge(
+    bridge_id: uuid.UUID,
+    request: Optional[ReextractRequest] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Re-run extraction over archived snapshots in bulk, without crawling.
+    Poll /bridges/tasks/{task_id} for the results.
+    """
+    bridge = await db.get(Bridge, bridge_id)
+    if not bridge:
+        raise HTTPException(status_code=404, detail="Bridge not found")
+
+    request = request or ReextractRequest()
+    task = run_reextraction_task.delay(str(bridge.id), str(bridge.user_id), request.limit, request.extraction_schema)
+    return {
+        "task_id": task.id,
+        "status": "pending"
+    }
+
+@router.post("/{bridge_id}/crawl", response_model=TaskResponse)
+async def start_frontier_crawl(
+    bridge_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Start (or resume) a site-wide crawl from the bridge's crawl_config.
+    Progress is checkpointed in Redis, so a stopped crawl picks up where it left off.
+    """
+    bridge = await db.get(Bridge, bridge_id)
+    if not bridge:
+        raise HTTPException(status_code=404, detail="Bridge not found")
+    if not bridge.crawl_config:
+        raise HTTPException(status_code=400, detail="Bridge has no crawl_config")
+
+    task = run_frontier_crawl_task.delay(str(bridge.id), str(bridge.user_id))
+    return {
+        "task_id": task.id,
+        "status": "pending"
+    }
+
+@router.get("/{bridge_id}/crawl")
+async def get_frontier_crawl(
+    bridge_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Frontier progress: queued, in-flight, seen, done and failed URL counts."""
+    bridge = await db.get(Bridge, bridge_id)
+    if not bridge:
+        raise HTTPException(status_code=404, detail="Bridge not found")
+    return await CrawlFrontier(str(bridge.id)).stats()
+
+@router.delete("/{bridge_id}/crawl")
+async def reset_frontier_crawl(
+    bridge_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Drop the bridge's frontier so the next crawl starts over from its seeds."""
+    bridge = await db.get(Bridge, bridge_id)
+    if not bridge:
+        raise HTTPException(status_code=404, detail="Bridge not found")
+    frontier = CrawlFrontier(str(bridge.id))
+    if (await frontier.stats())["running"]:
+        raise HTTPException(status_code=409, detail="Crawl is running")
+    await frontier.reset()
+    return {"status": "reset"}
+
 @router.post("/{bridge_identifier}/extract", response_model=TaskResponse)
 async def run_extraction(
     bridge_identifier: str,
@@ -2,9 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.services.webmcp import WebMCPService
-from pydantic import BaseModel, HttpUrl
-from typing import Dict, Any, List, Optional
+from app.services.webmcp_sessions import WebMCPSessionLimitError, get_webmcp_sessions
+from pydantic import BaseModel, Field, HttpUrl
+from typing import Dict, Any, List, Literal, Optional
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,18 @@ class WebMCPExecuteRequest(BaseModel):
     tool_name: str
     parameters: Dict[str, Any]
 
+class WebMCPToolCall(BaseModel):
+    tool_name: str
+    parameters: Dict[str, Any] = {}
+
+class WebMCPBatchRequest(BaseModel):
+    url: Optional[HttpUrl] = None  # Required unless continuing a session
+    calls: List[WebMCPToolCall] = Field(..., min_length=1, max_length=50)
+    mode: Literal["ordered", "parallel"] = "ordered"
+    stop_on_error: bool = False  # Ordered mode: skip the calls after a failure
+    keep_alive: bool = False  # Keep the page open under a session handle for follow-up batches
+    session_id: Optional[str] = None
+
 @router.post("/discover")
 async def discover_tools(
     request: WebMCPDiscoverRequest,
@@ -53,3 +67,73 @@ async def execute_tool(
     except Exception as e:
         logger.error(f"WebMCP execution failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/execute/batch")
+async def execute_batch(request: WebMCPBatchRequest):
+    """
+    Run several tool calls against one page load, ordered or in parallel, with per-call
+    timings. `keep_alive` returns a session_id whose page stays open (idle TTL
+    webmcp_session_ttl_seconds) so follow-up batches skip the browser checkout and
+    navigation; a batch on a session without `keep_alive` closes it afterwards.
+    """
+    started = time.monotonic()
+    calls = [call.model_dump() for call in request.calls]
+    parallel = request.mode == "parallel"
+    sessions = get_webmcp_sessions()
+
+    if request.session_id:
+        session = sessions.get(request.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="WebMCP session not found or expired")
+        page_load_ms = 0
+    elif request.keep_alive:
+        if not request.url:
+            raise HTTPException(status_code=422, detail="url is required to open a session")
+        try:
+            session = await sessions.open(str(request.url))
+        except WebMCPSessionLimitError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        except Exception as e:
+            logger.error(f"WebMCP session failed to open: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        page_load_ms = int((time.monotonic() - started) * 1000)
+    else:
+        session = None
+
+    if session is not None:
+        async with session.lock:
+            results = await session.service.execute_batch(session.page, calls, parallel, request.stop_on_error)
+        session.touch()
+        response = {"session_id": session.id, "url": session.url, "expires_in": session.expires_in}
+        if not request.keep_alive:
+            await sessions.close(session.id)
+            response = {"session_id": None, "url": session.url}
+    else:
+        if not request.url:
+            raise HTTPException(status_code=422, detail="url or session_id is required")
+        try:
+            async with WebMCPService(headless=True) as webmcp:
+                page = await webmcp.open_page(str(request.url))
+                try:
+                    page_load_ms = int((time.monotonic() - started) * 1000)
+                    results = await webmcp.execute_batch(page, calls, parallel, request.stop_on_error)
+                finally:
+                    await page.close()
+        except Exception as e:
+            logger.error(f"WebMCP batch execution failed: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        response = {"session_id": None, "url": str(request.url)}
+
+    return {
+        **response,
+        "status": "success" if all(r["status"] == "success" for r in results) else "partial",
+        "results": results,
+        "timings": {"page_load_ms": page_load_ms, "total_ms": int((time.monotonic() - started) * 1000)},
+    }
+
+@router.delete("/sessions/{session_id}")
+async def close_session(session_id: str):
+    """Close a kept-alive batch session before its TTL runs out."""
+    if not await get_webmcp_sessions().close(session_id):
+        raise HTTPException(status_code=404, detail="WebMCP session not found or expired")
+    return {"status": "closed", "session_id": session_id}
@@ -9,10 +9,16 @@ class BridgeBase(BaseModel):
     domain: str
     target_url: str
     extraction_schema: Dict[str, Any]
-    selectors: Optional[Dict[str, str]] = None
+    selectors: Optional[Dict[str, Any]] = None  # See app.services.selectors
     auth_config: Optional[Dict[str, Any]] = None
     interaction_script: Optional[List[Dict[str, Any]]] = None
     session_data: Optional[Dict[str, Any]] = None
+    resource_profile: Optional[str] = None
+    readiness_budget_ms: Optional[int] = None
+    pagination: Optional[Dict[str, Any]] = None
+    json_source: Optional[Dict[str, Any]] = None
+    snapshot_retention: Optional[int] = None
+    crawl_config: Optional[Dict[str, Any]] = None
     
     # WebMCP
     has_webmcp: Optional[bool] = False
@@ -0,0 +1,185 @@
+"""
+Page snapshot archive.
+
+Bridges with `snapshot_retention` set keep their last N crawled pages. The HTML (and the
+compact snapshot, when one was captured) is compressed with zstd and stored by content
+hash, so identical pages are stored once. Re-extraction runs ExtractionService over the
+archive without touching the network, e.g. after the extraction schema changed.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import zstandard
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Bridge, PageSnapshot
+from app.services.extractor import ExtractionService
+from app.services.snapshot import build_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class SnapshotArchive:
+    """zstd-compressed, content-addressed blob store plus PageSnapshot bookkeeping."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.snapshot_archive_dir
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}.zst")
+
+    def _write_blob(self, content: str) -> Tuple[str, int, int]:
+        """Store content under its hash. Returns (hash, size, compressed size)."""
+        content_hash = _hash(content)
+        raw = content.encode("utf-8")
+        path = self._path(content_hash)
+        if os.path.exists(path):
+            return content_hash, len(raw), os.path.getsize(path)
+
+        compressed = zstandard.ZstdCompressor(level=settings.snapshot_archive_zstd_level).compress(raw)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent writers never expose a partial blob
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        return content_hash, len(raw), len(compressed)
+
+    def _read_blob(self, content_hash: str) -> str:
+        with open(self._path(content_hash), "rb") as f:
+            return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+
+    def _delete_blob(self, content_hash: str):
+        try:
+            os.remove(self._path(content_hash))
+        except FileNotFoundError:
+            pass
+
+    async def store(
+        self,
+        db: AsyncSession,
+        bridge: Bridge,
+        url: str,
+        html: str,
+        snapshot: Optional[str] = None
+    ) -> Optional[PageSnapshot]:
+        """Archive a crawled page if the bridge has retention enabled, then apply retention."""
+        if not bridge.snapshot_retention or not html:
+            return None
+
+        content_hash, size, compressed = await asyncio.to_thread(self._write_blob, html)
+        snapshot_hash = None
+        if snapshot:
+            snapshot_hash, snapshot_size, snapshot_compressed = await asyncio.to_thread(self._write_blob, snapshot)
+            size += snapshot_size
+            compressed += snapshot_compressed
+
+        record = PageSnapshot(
+            bridge_id=bridge.id,
+            url=url,
+            content_hash=content_hash,
+            snapshot_hash=snapshot_hash,
+            size_bytes=size,
+            compressed_bytes=compressed
+        )
+        db.add(record)
+        await db.flush()
+        await self.prune(db, bridge.id, bridge.snapshot_retention)
+        return record
+
+    async def prune(self, db: AsyncSession, bridge_id: UUID, keep: int):
+        """Drop all but the newest `keep` snapshots of a bridge, and blobs nothing references anymore."""
+        result = await db.execute(
+            select(PageSnapshot)
+            .where(PageSnapshot.bridge_id == bridge_id)
+            .order_by(PageSnapshot.captured_at.desc())
+            .offset(keep)
+        )
+        expired = result.scalars().all()
+        if not expired:
+            return
+
+        hashes = set()
+        for record in expired:
+            hashes.add(record.content_hash)
+            if record.snapshot_hash:
+                hashes.add(record.snapshot_hash)
+            await db.delete(record)
+        await db.flush()
+
+        for content_hash in hashes:
+            references = (await db.execute(
+                select(func.count(PageSnapshot.id)).where(
+                    (PageSnapshot.content_hash == content_hash) | (PageSnapshot.snapshot_hash == content_hash)
+                )
+            )).scalar() or 0
+            if not references:
+                await asyncio.to_thread(self._delete_blob, content_hash)
+        logger.info(f"Pruned {len(expired)} archived snapshots for bridge {bridge_id}")
+
+    async def list_snapshots(self, db: AsyncSession, bridge_id: UUID, limit: Optional[int] = None) -> List[PageSnapshot]:
+        query = (
+            select(PageSnapshot)
+            .where(PageSnapshot.bridge_id == bridge_id)
+            .order_by(PageSnapshot.captured_at.desc())
+        )
+        if limit:
+            query = query.limit(limit)
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    async def load(self, record: PageSnapshot) -> Tuple[str, str]:
+        """Return (html, snapshot). Older records without a stored snapshot get one built from the HTML."""
+        html = await asyncio.to_thread(self._read_blob, record.content_hash)
+        if record.snapshot_hash:
+            snapshot = await asyncio.to_thread(self._read_blob, record.snapshot_hash)
+        else:
+            snapshot = await asyncio.to_thread(build_snapshot, html)
+        return html, snapshot
+
+    async def reextract(
+        self,
+        db: AsyncSession,
+        bridge: Bridge,
+        user_id: UUID,
+        limit: Optional[int] = None,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run extraction over archived snapshots (newest first) without any network I/O
+        besides the LLM. Uses the bridge's current schema unless `schema` is given.
+        """
+        records = await self.list_snapshots(db, bridge.id, limit)
+        extractor = ExtractionService(db)
+        semaphore = asyncio.Semaphore(settings.reextract_concurrency)
+        # The bridge's selectors only fit its own schema
+        selectors = None if schema else bridge.selectors
+        schema = schema or bridge.extraction_schema
+
+        async def run(record: PageSnapshot) -> Dict[str, Any]:
+            async with semaphore:
+                entry = {
+                    "snapshot_id": str(record.id),
+                    "url": record.url,
+                    "captured_at": record.captured_at.isoformat() if record.captured_at else None,
+                }
+                try:
+                    html, snapshot = await self.load(record)
+                except FileNotFoundError:
+                    return {**entry, "error": "Archived content missing"}
+                entry["data"] = await extractor.extract_structured_data(
+                    html, schema, user_id, snapshot=snapshot, selectors=selectors, url=record.url
+                )
+                return entry
+
+        return await asyncio.gather(*(run(record) for record in records))
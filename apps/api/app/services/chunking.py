@@ -0,0 +1,142 @@
+"""
+Chunked (map-reduce) extraction helpers.
+
+A distilled page that is larger than one prompt is split into overlapping chunks on line
+boundaries, each chunk is extracted separately, and the partial results are merged
+according to the extraction schema:
+  - list fields are concatenated; items seen in more than one chunk (the overlap) are
+    deduplicated, by an identifying field such as url/id/name when items are objects,
+  - nested objects are merged field by field,
+  - scalar fields keep the first non-empty value in page order.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from app.services.snapshot import CHARS_PER_TOKEN
+
+# Fields that identify a list item, in order of preference
+IDENTITY_FIELDS = ("id", "url", "link", "href", "sku", "slug", "name", "title")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_chunks(text: str, chunk_tokens: int, overlap_tokens: int) -> List[str]:
+    """
+    Split `text` into chunks of at most `chunk_tokens`, cut on line boundaries, each one
+    repeating the last ~`overlap_tokens` of the previous chunk so items on a boundary
+    appear whole in at least one chunk.
+    """
+    limit = chunk_tokens * CHARS_PER_TOKEN
+    overlap = min(overlap_tokens * CHARS_PER_TOKEN, limit // 2)
+    lines: List[str] = []
+    for line in text.split("\n"):
+        # A single line longer than a chunk is hard-split
+        lines.extend(line[i:i + limit] for i in range(0, max(len(line), 1), limit))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in lines:
+        if current and size + len(line) + 1 > limit:
+            chunks.append("\n".join(current))
+            # Carry the tail of this chunk into the next one
+            carried: List[str] = []
+            carried_size = 0
+            for previous in reversed(current):
+                if carried_size + len(previous) + 1 > overlap:
+                    break
+                carried.insert(0, previous)
+                carried_size += len(previous) + 1
+            while carried and carried_size + len(line) + 1 > limit:
+                carried_size -= len(carried.pop(0)) + 1
+            current, size = carried, carried_size
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _field_schema(schema: Any, key: str) -> Any:
+    if not isinstance(schema, dict):
+        return None
+    properties = schema.get("properties", schema)
+    return properties.get(key) if isinstance(properties, dict) else None
+
+
+def _is_list_field(field_schema: Any, value: Any) -> bool:
+    if isinstance(field_schema, dict) and field_schema.get("type") == "array":
+        return True
+    if isinstance(field_schema, list) or field_schema in ("array", "list"):
+        return True
+    return isinstance(value, list)
+
+
+def _items_schema(field_schema: Any) -> Any:
+    if isinstance(field_schema, dict):
+        return field_schema.get("items")
+    if isinstance(field_schema, list) and field_schema:
+        return field_schema[0]
+    return None
+
+
+def _empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _identity(item: Any) -> str:
+    if isinstance(item, dict):
+        for field in IDENTITY_FIELDS:
+            value = item.get(field)
+            if isinstance(value, (str, int)) and value != "":
+                return f"{field}:{value}"
+    return json.dumps(item, sort_keys=True, default=str)
+
+
+def _merge_lists(merged: List[Any], index: Dict[str, int], items: List[Any], item_schema: Any):
+    for item in items:
+        key = _identity(item)
+        if key not in index:
+            index[key] = len(merged)
+            merged.append(item)
+        elif isinstance(item, dict) and isinstance(merged[index[key]], dict):
+            # The same item cut by a chunk boundary: fill in what the first copy missed
+            merged[index[key]] = merge_objects([merged[index[key]], item], item_schema)
+
+
+def merge_objects(results: List[Dict[str, Any]], schema: Any) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    list_index: Dict[str, Dict[str, int]] = {}
+    nested: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        for key, value in result.items():
+            field_schema = _field_schema(schema, key)
+            if _is_list_field(field_schema, value):
+                items = value if isinstance(value, list) else ([] if _empty(value) else [value])
+                if not isinstance(merged.get(key), list):
+                    merged[key] = []
+                _merge_lists(merged[key], list_index.setdefault(key, {}), items, _items_schema(field_schema))
+            elif isinstance(value, dict):
+                nested.setdefault(key, []).append(value)
+                merged.setdefault(key, None)
+            elif _empty(merged.get(key)) and not _empty(value):
+                merged[key] = value
+            else:
+                merged.setdefault(key, value)
+    for key, parts in nested.items():
+        merged[key] = merge_objects(parts, _field_schema(schema, key))
+    return merged
+
+
+def merge_chunk_results(results: List[Any], schema: Optional[Dict[str, Any]]) -> Any:
+    """Merge per-chunk extraction results (in page order) into one result shaped by `schema`."""
+    results = [r for r in results if not _empty(r) and not (isinstance(r, dict) and "error" in r)]
+    if not results:
+        return {}
+    if all(isinstance(r, list) for r in results):
+        merged: List[Any] = []
+        _merge_lists(merged, {}, [item for r in results for item in r], _items_schema(schema))
+        return merged
+    return merge_objects([r for r in results if isinstance(r, dict)], schema)
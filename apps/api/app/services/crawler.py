@@ -1,102 +1,526 @@
-from playwright.async_api import async_playwright
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional
+from urllib.parse import urlparse
 import json
 logger = logging.getLogger(__name__)
 
 from app.services.permissions import PermissionService
 from app.core.database import AsyncSessionLocal
+from app.core.browser_pool import get_browser_pool
 from app.services.interaction import InteractionService
+from app.services.interaction_plan import InteractionError
+from app.services.resource_blocking import ResourceBlocker
+from app.services.fetcher import StaticFetchService, MODE_RENDER, MODE_STATIC
+from app.services.politeness import PolitenessScheduler
+from app.services.readiness import ReadinessEngine, derive_selectors
+from app.services.network_capture import NetworkCapture, save_endpoint_index
+from app.services.distill import snapshot_needed
+from app.services.dom_prune import pruned_content
+from app.services.snapshot import SNAPSHOT_SCRIPT, build_snapshot, script_args, snapshot_stats
+from app.services.pagination import (
+    DEFAULT_MAX_PAGES,
+    DEFAULT_SCROLL_MAX_ITEMS,
+    DEFAULT_SCROLL_MAX_ROUNDS,
+    DEFAULT_SCROLL_MAX_SECONDS,
+    HARVEST_SCRIPT,
+    SCROLL_IDLE_ROUNDS,
+    content_fingerprint,
+    find_next_link,
+    page_numbers,
+    page_url,
+    should_stop,
+    unharvested_selector,
+)
+from app.core.config import settings
 
 class CrawlerService:
+    def __init__(self):
+        # Metrics for the most recent crawl (persisted on the UsageLog by the task runner)
+        self.last_crawl_stats: Dict[str, Any] = {}
+        # Payload of the bridge's bound JSON endpoint, if it was captured during the last render
+        self.captured_json: Any = None
+        # Compact text-and-structure snapshot of the last fetched page (LLM input)
+        self.last_snapshot: Optional[str] = None
 
     async def get_page_content(
         self, 
         url: str, 
         auth_config: Optional[Dict[str, Any]] = None,
         interaction_script: Optional[List[Dict[str, Any]]] = None,
-        session_data: Optional[Dict[str, Any]] = None
+        session_data: Optional[Dict[str, Any]] = None,
+        resource_profile: Optional[str] = None,
+        extraction_schema: Optional[Dict[str, Any]] = None,
+        selectors: Optional[Dict[str, Any]] = None,
+        fetch_key: Optional[str] = None,
+        readiness_budget_ms: Optional[int] = None,
+        validators: Optional[Dict[str, str]] = None,
+        json_source: Optional[Dict[str, Any]] = None,
+        infinite_scroll: Optional[Dict[str, Any]] = None,
+        segment_queue: Optional[asyncio.Queue] = None
     ) -> tuple[Optional[str], Optional[Dict[str, Any]]]:
-        """Fetch rendered HTML from a URL using Playwright with optional Auth and Interactions"""
+        """
+        Fetch HTML from a URL. Tries a plain HTTP fetch first and only renders with
+        Playwright (with optional Auth and Interactions) when the static HTML is insufficient.
+        `fetch_key` (bridge id or domain) is used to remember which tier a page needs.
+        Rendered pages are considered ready once the expected selectors appear or the DOM
+        goes quiet, within `readiness_budget_ms`.
+        With `validators` (etag/last_modified) the static fetch is conditional; if the server
+        answers 304 this returns (None, None) and sets last_crawl_stats["not_modified"].
+        JSON fetch/XHR responses seen while rendering are indexed under `fetch_key`; with a
+        bound `json_source` the matching payload is left in `captured_json`.
+        With an `infinite_scroll` rule the page is harvested segment by segment into
+        `segment_queue` instead, and no full-page HTML is returned.
+        """
+        self.last_crawl_stats = {}
+        self.captured_json = None
+        self.last_snapshot = None
+
         # 1. Check Permissions
         async with AsyncSessionLocal() as db:
             perms = PermissionService()
             if not await perms.check_access(url, db):
                 logger.warning(f"Crawling blocked for {url} by PermissionService")
                 raise Exception("Access Denied by robots.txt or platform policy")
-        
-        interaction = InteractionService()
+            crawl_delay = await perms.get_crawl_delay(url, db)
+
+        # Cluster-wide per-domain slot (honors crawl-delay and max concurrency)
+        async with PolitenessScheduler().slot(urlparse(url).netloc, crawl_delay) as waited_ms:
+            self.last_crawl_stats["scheduling_delay_ms"] = waited_ms
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            try:
-                # Create context first to allow cookie injection
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            # 2. HTTP-first tier (no browser for server-rendered pages)
+            needs_browser = json_source or infinite_scroll
+            if settings.static_fetch_enabled and not needs_browser and self._static_eligible(auth_config, interaction_script):
+                content = await self._try_static_fetch(
+                    url,
+                    fetch_key or urlparse(url).netloc,
+                    session_data,
+                    auth_config,
+                    extraction_schema,
+                    selectors,
+                    validators
                 )
-                
+                if content:
+                    await self._snapshot_static(content)
+                    return content, None
+                if self.last_crawl_stats.get("not_modified"):
+                    return None, None
+
+            return await self._render_page(
+                url,
+                auth_config,
+                interaction_script,
+                session_data,
+                resource_profile,
+                extraction_schema,
+                selectors,
+                readiness_budget_ms,
+                fetch_key or urlparse(url).netloc,
+                json_source,
+                infinite_scroll,
+                segment_queue
+            )
+
+    async def _render_page(
+        self,
+        url: str,
+        auth_config: Optional[Dict[str, Any]],
+        interaction_script: Optional[List[Dict[str, Any]]],
+        session_data: Optional[Dict[str, Any]],
+        resource_profile: Optional[str],
+        extraction_schema: Optional[Dict[str, Any]],
+        selectors: Optional[Dict[str, Any]],
+        readiness_budget_ms: Optional[int],
+        fetch_key: str,
+        json_source: Optional[Dict[str, Any]] = None,
+        infinite_scroll: Optional[Dict[str, Any]] = None,
+        segment_queue: Optional[asyncio.Queue] = None
+    ) -> tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Render the page with Playwright in a pooled browser context."""
+        self.last_crawl_stats["fetch_tier"] = "browser"
+        interaction = InteractionService()
+        blocker = ResourceBlocker(resource_profile, url)
+        capture = NetworkCapture(json_source)
+        pool = await get_browser_pool()
+
+        # Saved cookies + localStorage (and cookie auth) go in at context creation
+        storage_state = interaction.build_storage_state(session_data, auth_config)
+        login_flow = bool(auth_config) and auth_config.get("type") == "login_flow"
+
+        try:
+            # Authenticated bridges reuse a warm context across runs; others get a fresh one
+            async with self._browser_context(pool, fetch_key, auth_config, storage_state) as (context, reused):
+                self.last_crawl_stats["warm_context"] = reused
                 page = await context.new_page()
-                
-                # 2. Inject Session Data (Restoring previous session)
-                if session_data:
-                    await interaction.inject_session_data(page, session_data)
-
-                # 3. Perform Auth (Cookies/Login) - Only if session injection didn't fully cover it or if explicit auth config exists
-                if auth_config:
-                    await interaction.perform_auth(page, auth_config)
-
-                logger.info(f"Crawling {url}...")
-                await page.goto(url, wait_until="networkidle", timeout=30000)
-                
-                # 4. Execute Interaction Script (Click, Scroll, Wait)
-                if interaction_script:
-                    await interaction.perform_interaction(page, interaction_script)
-                else:
-                    # Default behavior if no script: Basic scroll
-                    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    await page.wait_for_timeout(2000)
-                
-                content = await page.content()
-                
-                # 5. Capture new session data (to persist cookies/storage for next time)
-                new_session_data = await interaction.capture_session_data(page)
-
-                return content, new_session_data
-            except Exception as e:
-                logger.error(f"Error crawling {url}: {e}")
-                return None, None
-            finally:
-                await browser.close()
+                try:
+                    # Abort images/fonts/trackers etc. according to the bridge's profile
+                    await blocker.attach(page)
+                    # Sniff the site's own JSON API responses during navigation
+                    capture.attach(page)
+
+                    # 2. Log in only when there is no session to restore
+                    restored = reused or bool(storage_state and storage_state["cookies"])
+                    if login_flow and not restored:
+                        await interaction.perform_auth(page, auth_config)
+                        self.last_crawl_stats["login"] = "performed"
+
+                    logger.info(f"Crawling {url}...")
+                    readiness = ReadinessEngine(budget_ms=readiness_budget_ms)
+                    await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+
+                    # 3. Restored session expired: log in again and come back
+                    if login_flow and restored and not await interaction.is_logged_in(page, auth_config, readiness.remaining_ms):
+                        logger.info(f"Restored session for {url} is no longer logged in; running login flow")
+                        await interaction.perform_auth(page, auth_config)
+                        self.last_crawl_stats["login"] = "expired_session"
+                        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+
+                    # A bound JSON endpoint is the data: no need to wait for it to render
+                    if json_source and await capture.wait_for_bound(readiness.remaining_ms):
+                        self.captured_json = capture.payload
+                        self.last_crawl_stats["readiness"] = {"condition": "json_source"}
+                    else:
+                        # Wait for the data rather than for network idle (which beacons can postpone forever)
+                        ready = await readiness.wait(page, derive_selectors(extraction_schema, selectors))
+                        self.last_crawl_stats["readiness"] = ready
+
+                    # 4. Execute Interaction Script (Click, Scroll, Wait)
+                    if interaction_script:
+                        self.last_crawl_stats["interaction"] = await interaction.perform_interaction(page, interaction_script)
+                    elif self.captured_json is None and not infinite_scroll:
+                        # Default behavior if no script: Basic scroll, then let lazy content settle
+                        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                        self.last_crawl_stats["scroll_settle"] = await readiness.wait(page)
+
+                    if infinite_scroll:
+                        # Items stream out as they load; the full page is never serialized
+                        self.last_crawl_stats["scroll"] = await self._harvest_scroll(page, url, infinite_scroll, segment_queue)
+                        content = None
+                    else:
+                        # Pruned in the page, so only content crosses the CDP pipe
+                        content, self.last_crawl_stats["transfer"] = await pruned_content(page)
+                        await self._snapshot_rendered(page, content)
+
+                    # 5. Capture new session data (to persist cookies/storage for next time)
+                    new_session_data = await interaction.capture_session_data(page)
+
+                    return content, new_session_data
+                finally:
+                    await capture.drain()
+                    # Warm contexts outlive the crawl, so the page is closed explicitly
+                    await page.close()
+        except Exception as e:
+            logger.error(f"Error crawling {url}: {e}")
+            if isinstance(e, InteractionError):
+                self.last_crawl_stats["interaction"] = e.report
+            return None, None
+        finally:
+            self.last_crawl_stats.update(blocker.stats())
+            self.last_crawl_stats.update(capture.stats())
+            await save_endpoint_index(fetch_key, capture.endpoints)
+
+    async def _harvest_scroll(
+        self,
+        page,
+        url: str,
+        rule: Dict[str, Any],
+        segment_queue: asyncio.Queue
+    ) -> Dict[str, Any]:
+        """Scroll and harvest new items until the feed runs dry or a budget is reached."""
+        selector = rule["item_selector"]
+        max_items = int(rule.get("max_items", DEFAULT_SCROLL_MAX_ITEMS))
+        max_rounds = int(rule.get("max_scrolls", DEFAULT_SCROLL_MAX_ROUNDS))
+        deadline = time.monotonic() + float(rule.get("max_seconds", DEFAULT_SCROLL_MAX_SECONDS))
+        prune = rule.get("prune", True)
+
+        harvested = 0
+        segments = 0
+        idle_rounds = 0
+        stop_reason = "max_scrolls"
+        for _ in range(max_rounds):
+            result = await page.evaluate(
+                HARVEST_SCRIPT,
+                {"selector": selector, "limit": max_items - harvested, "prune": prune},
+            )
+            items = result["items"]
+            if items:
+                idle_rounds = 0
+                harvested += len(items)
+                segments += 1
+                segment_html = f"<html><body>{''.join(items)}</body></html>"
+                snapshot = await asyncio.to_thread(build_snapshot, segment_html) if snapshot_needed() else None
+                await segment_queue.put({
+                    "page": segments,
+                    "url": url,
+                    "html": segment_html,
+                    "snapshot": snapshot,
+                    "session_data": None,
+                })
+            else:
+                idle_rounds += 1
+
+            if harvested >= max_items:
+                stop_reason = "max_items"
+                break
+            if idle_rounds >= SCROLL_IDLE_ROUNDS:
+                stop_reason = "exhausted"
+                break
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                stop_reason = "max_seconds"
+                break
+
+            # Wait for the next batch to render instead of sleeping
+            await ReadinessEngine(budget_ms=min(remaining_ms, settings.readiness_budget_ms)).wait(page, [unharvested_selector(selector)])
+
+        logger.info(f"Harvested {harvested} items in {segments} segments from {url} ({stop_reason})")
+        return {"items": harvested, "segments": segments, "stop_reason": stop_reason}
+
+    @asynccontextmanager
+    async def _browser_context(
+        self,
+        pool,
+        fetch_key: str,
+        auth_config: Optional[Dict[str, Any]],
+        storage_state: Optional[Dict[str, Any]]
+    ) -> AsyncIterator[tuple]:
+        """Yield (context, reused). A failed crawl drops the warm context instead of keeping it."""
+        options = {"storage_state": storage_state} if storage_state else {}
+        if not auth_config:
+            async with pool.context(**options) as context:
+                yield context, False
+            return
+
+        # Keyed on the auth config too, so editing credentials doesn't reuse the old session
+        auth_hash = hashlib.sha1(json.dumps(auth_config, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        async with pool.warm_context(f"{fetch_key}:{auth_hash}", **options) as (context, reused):
+            yield context, reused
+
+    async def crawl_pages(
+        self,
+        url: str,
+        pagination: Dict[str, Any],
+        **crawl_options: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Crawl a paginated listing, yielding each page as soon as it has been fetched:
+        { "page": n, "url": ..., "html": ..., "snapshot": ..., "session_data": ... }
+        `crawl_options` are passed through to get_page_content for every page.
+        """
+        self.last_crawl_stats = {"pages": []}
+        if pagination.get("type") == "infinite_scroll":
+            if not pagination.get("item_selector"):
+                raise ValueError("infinite_scroll pagination requires an 'item_selector'")
+            pages = self._crawl_infinite_scroll(url, pagination, crawl_options)
+        elif pagination.get("type") == "url_template":
+            pages = self._crawl_template_pages(pagination, crawl_options)
+        else:
+            pages = self._crawl_next_links(url, pagination, crawl_options)
+        async for page in pages:
+            yield page
+
+    async def _crawl_infinite_scroll(
+        self,
+        url: str,
+        pagination: Dict[str, Any],
+        crawl_options: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Render the feed once and yield each harvested segment while scrolling continues.
+        The last segment carries the session data captured at the end of the crawl.
+        """
+        # Bounded so a slow consumer holds back the harvester instead of buffering the feed
+        queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+        crawler = CrawlerService()
+
+        task = asyncio.create_task(crawler.get_page_content(
+            url, infinite_scroll=pagination, segment_queue=queue, **crawl_options
+        ))
+
+        async def next_segment() -> Optional[Dict[str, Any]]:
+            """Next queued segment, or None once the harvest has finished and the queue is drained."""
+            if not queue.empty():
+                return queue.get_nowait()
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                return getter.result()
+            getter.cancel()
+            return queue.get_nowait() if not queue.empty() else None
+
+        try:
+            pending = await next_segment()
+            while pending is not None:
+                segment = await next_segment()
+                if segment is None:
+                    # Hand the session over with the final segment
+                    _, pending["session_data"] = await task
+                yield pending
+                pending = segment
+            # Surface crawl errors (e.g. access denied) even when nothing was harvested
+            await task
+        finally:
+            task.cancel()
+            self.last_crawl_stats["pages"].append(crawler.last_crawl_stats)
+
+    async def _crawl_template_pages(
+        self,
+        pagination: Dict[str, Any],
+        crawl_options: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Fetch templated page URLs concurrently within the per-domain limit."""
+        numbers = page_numbers(pagination)
+        if not numbers:
+            return
+        semaphore = asyncio.Semaphore(settings.max_concurrent_pages_per_domain)
+        state = {"stop_at": numbers[-1]}
+        fingerprints = set()
+
+        async def fetch(number: int) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                # A lower page already hit the stop condition
+                if number > state["stop_at"]:
+                    return None
+                return await self._fetch_page(number, page_url(pagination, number), crawl_options)
+
+        tasks = [asyncio.create_task(fetch(number)) for number in numbers]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                page = await next_done
+                if page is None or page["page"] > state["stop_at"]:
+                    continue
+
+                fingerprint = content_fingerprint(page["html"]) if page["html"] else None
+                if should_stop(pagination, page["html"]) or fingerprint in fingerprints:
+                    state["stop_at"] = min(state["stop_at"], page["page"] - 1)
+                    continue
+                fingerprints.add(fingerprint)
+                yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _crawl_next_links(
+        self,
+        url: str,
+        pagination: Dict[str, Any],
+        crawl_options: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Follow next-page links. Each page depends on the previous one, so this is sequential."""
+        max_pages = int(pagination.get("max_pages", DEFAULT_MAX_PAGES))
+        current: Optional[str] = url
+        visited = set()
+        fingerprints = set()
+
+        for number in range(1, max_pages + 1):
+            if not current or current in visited:
+                break
+            visited.add(current)
+
+            page = await self._fetch_page(number, current, crawl_options)
+            if should_stop(pagination, page["html"]):
+                break
+            fingerprint = content_fingerprint(page["html"])
+            if fingerprint in fingerprints:
+                break
+            fingerprints.add(fingerprint)
+
+            yield page
+            current = find_next_link(page["html"], pagination.get("selector", ""), current)
+
+    async def _fetch_page(self, number: int, url: str, crawl_options: Dict[str, Any]) -> Dict[str, Any]:
+        # Separate crawler per page so concurrent fetches don't share stats
+        crawler = CrawlerService()
+        html, session_data = await crawler.get_page_content(url, **crawl_options)
+        self.last_crawl_stats.setdefault("pages", []).append({"page": number, **crawler.last_crawl_stats})
+        return {"page": number, "url": url, "html": html, "snapshot": crawler.last_snapshot, "session_data": session_data}
+
+    def _static_eligible(
+        self,
+        auth_config: Optional[Dict[str, Any]],
+        interaction_script: Optional[List[Dict[str, Any]]]
+    ) -> bool:
+        """Scripts and login flows need a real page."""
+        if interaction_script:
+            return False
+        if auth_config and auth_config.get("type") != "cookie":
+            return False
+        return True
+
+    async def _try_static_fetch(
+        self,
+        url: str,
+        fetch_key: str,
+        session_data: Optional[Dict[str, Any]],
+        auth_config: Optional[Dict[str, Any]],
+        extraction_schema: Optional[Dict[str, Any]],
+        selectors: Optional[Dict[str, Any]],
+        validators: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
+        """Return static HTML if it is good enough, remembering the decision for next time."""
+        fetcher = StaticFetchService()
+        if await fetcher.get_mode(fetch_key) == MODE_RENDER:
+            self.last_crawl_stats["render_reason"] = "remembered"
+            return None
+
+        # Reuse the browser session's cookies (and cookie auth) on the HTTP path
+        cookies = list((session_data or {}).get("cookies", []))
+        if auth_config:
+            cookies.extend(auth_config.get("cookies", []))
+
+        resp = await fetcher.fetch(url, cookies, validators)
+        if resp is None:
+            self.last_crawl_stats["render_reason"] = "fetch_failed"
+            return None
+        if resp.status_code == 304:
+            logger.info(f"{url} not modified since last extraction")
+            self.last_crawl_stats.update({"fetch_tier": "static", "not_modified": True})
+            return None
+
+        content = resp.text
+        needs_render, reason = await asyncio.to_thread(
+            fetcher.needs_render, content, extraction_schema, selectors
+        )
+        self.last_crawl_stats["render_reason"] = reason
+        await fetcher.set_mode(fetch_key, MODE_RENDER if needs_render else MODE_STATIC)
+        if needs_render:
+            logger.info(f"Static HTML insufficient for {url} ({reason}); rendering with Playwright")
+            return None
+
+        logger.info(f"Served {url} from static fetch tier")
+        self.last_crawl_stats["fetch_tier"] = "static"
+        self.last_crawl_stats["validators"] = {
+            "etag": resp.headers.get("etag"),
+            "last_modified": resp.headers.get("last-modified"),
+        }
+        return content
+
+    async def _snapshot_rendered(self, page, content: str):
+        """Build the snapshot inside the browser, where visibility is known."""
+        if not snapshot_needed():
+            return
+        try:
+            self.last_snapshot = await page.evaluate(SNAPSHOT_SCRIPT, script_args())
+            self.last_crawl_stats["snapshot"] = snapshot_stats(content, self.last_snapshot, "browser")
+        except Exception as e:
+            logger.warning(f"In-browser snapshot failed, falling back to HTML: {e}")
+            await self._snapshot_static(content)
+
+    async def _snapshot_static(self, content: str):
+        if not snapshot_needed():
+            return
+        self.last_snapshot = await asyncio.to_thread(build_snapshot, content)
+        self.last_crawl_stats["snapshot"] = snapshot_stats(content, self.last_snapshot, "html")
 
     async def get_visual_elements(self, url: str) -> List[Dict[str, Any]]:
         """Identify interactive and structural elements to assist in schema creation"""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            try:
-                page = await browser.new_page()
-                await page.goto(url, wait_until="networkidle", timeout=30000)
-                
-                # Extract interesting elements
-                elements = await page.evaluate("""() => {
-                    const selectors = ['a', 'button', 'h1', 'h2', 'h3', '.title', '.price', 'article'];
-                    const results = [];
-                    selectors.forEach(sel => {
-                        document.querySelectorAll(sel).forEach(el => {
-                            if (el.innerText.trim().length > 0) {
-                                results.push({
-                                    tag: el.tagName.toLowerCase(),
-                                    text: el.innerText.trim().substring(0, 50),
-                                    selector: sel,
-                                    path: el.id ? `#${el.id}` : `${el.tagName.toLowerCase()}.${el.className.split(' ').join('.')}`
-                                });
-                            }
-                        });
-                    });
-                    return results.slice(0, 50); // Limit to top 50
-                }""")
-                return elements
-            except Exception as e:
-                logger.error(f"Error getting visual elements for {url}: {e}")
-                return []
-            finally:
-                await browser.close()
+        from app.services.discovery_session import DiscoverySession
+        try:
+            # Same page load (and cache) as schema discovery and the WebMCP survey
+            return (await DiscoverySession().get(url))["elements"]
+        except Exception as e:
+            logger.error(f"Error getting visual elements for {url}: {e}")
+            return []
@@ -5,41 +5,45 @@ from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.llm import get_llm_for_user
-from app.services.crawler import CrawlerService
+from app.services.discovery_session import DiscoverySession
+from app.services.distill import prompt_content
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 class SchemaDiscoveryService:
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.crawler = CrawlerService()
+        self.session = DiscoverySession()
+        # Full result of the last page load (snapshot, element map, WebMCP tools)
+        self.last_discovery: Optional[Dict[str, Any]] = None
 
     async def discover_schema(self, url: str, user_id: UUID) -> Dict[str, Any]:
         """
         Analyzes a URL and suggests a JSON schema for extraction.
         """
-        # 1. Crawl the page to get a sample
-        # We use the existing crawler but might want to limit content size or use a specific strategy
-        html_content, _ = await self.crawler.get_page_content(url)
-        
-        if not html_content:
-            logger.error(f"Failed to crawl {url} for schema discovery")
+        # 1. Load the page once (shared with /survey and the bridge's first extraction)
+        try:
+            self.last_discovery = await self.session.get(url)
+        except Exception as e:
+            logger.error(f"Failed to load {url} for schema discovery: {e}")
             raise Exception("Failed to access URL")
+        html_content = self.last_discovery["html"]
 
-        # 2. Distill/Clean HTML (Naive truncation for now, to be improved in Phase 1.3)
-        # TODO: Use readability/DOM distiller here
-        truncated_html = html_content[:20000] 
+        # 2. Distill to main-content text and structure (or fall back to the snapshot) within budget
+        page_content, _ = await prompt_content(
+            html_content, self.last_discovery["snapshot"], settings.discovery_input_token_budget
+        )
 
         # 3. Ask LLM to infer schema
         prompt = f"""
-        Analyze the following HTML content from {url} and suggest a JSON schema that represents the main data on this page.
+        Analyze the following content from {url} and suggest a JSON schema that represents the main data on this page.
         
         Focus on the "primary entity" of the page. 
         - If it's a list (e.g. products, articles), return a schema for the list items.
         - If it's a detail page, return a schema for the single entity.
         
-        HTML Content (truncated):
-        {truncated_html}
+        {page_content}
         
         Return ONLY a JSON object complying with JSON Schema standard (or a simplified version compatible with our system).
         Example format:
@@ -76,8 +80,7 @@ class SchemaDiscoveryService:
         """
         try:
             import tldextract
-            import aiohttp
-            from app.services.webmcp import WebMCPService
+            from app.core.http_clients import PURPOSE_DISCOVERY, get_http_client
             # from app.models import Bridge, WebMCPTool # Avoid circular import if possible, or use configured db session
             
             extracted = tldextract.extract(url)
@@ -90,13 +93,12 @@ class SchemaDiscoveryService:
             }
             
             try:
-                # We use a short timeout for discovery to not block too long
-                async with WebMCPService(headless=True) as webmcp:
-                    tools = await webmcp.discover_tools(url)
-                    if tools:
-                        webmcp_result["has_webmcp"] = True
-                        webmcp_result["webmcp_tools"] = tools
-                        logger.info(f"WebMCP detected on {url}: {len(tools)} tools")
+                # Probed on the same page load /analyze uses
+                tools = (await self.session.get(url))["webmcp_tools"]
+                if tools:
+                    webmcp_result["has_webmcp"] = True
+                    webmcp_result["webmcp_tools"] = tools
+                    logger.info(f"WebMCP detected on {url}: {len(tools)} tools")
             except Exception as e:
                 logger.warning(f"WebMCP detection failed for {url}: {e}")
 
@@ -126,25 +128,23 @@ class SchemaDiscoveryService:
             # Specific subdomains where a 403 usually means "It exists but is locked" (Strong signal)
             strong_subdomains = ["api", "developer", "dev"]
 
-            timeout = aiohttp.ClientTimeout(total=5)
-            conn = aiohttp.TCPConnector(limit=10, ssl=False) # Disable SSL verification for speed/compat
-
-            async with aiohttp.ClientSession(headers=headers, timeout=timeout, connector=conn) as session:
-                for candidate in candidates:
-                    try:
-                        # Switch to GET, but only read headers first
-                        async with session.get(candidate, allow_redirects=True) as resp:
-                            is_strong = any(s in candidate for s in strong_subdomains)
-                            
-                            # Accept 2xx/3xx OR 403 if it's a strong subdomain
-                            if resp.status < 400 or (resp.status == 403 and is_strong):
-                                found_apis.append(str(resp.url))
-                            else:
-                                logger.info(f"Candidate {candidate} returned status {resp.status}")
-                    except Exception as e:
-                        # Ignore connection errors, but log them
-                        logger.debug(f"Failed to check {candidate}: {e}")
-                        continue
+            # Shared client: 5s timeout, TLS verification off for speed/compat
+            client = get_http_client(PURPOSE_DISCOVERY)
+            for candidate in candidates:
+                try:
+                    # Switch to GET, but only read headers first
+                    async with client.stream("GET", candidate, headers=headers) as resp:
+                        is_strong = any(s in candidate for s in strong_subdomains)
+                        
+                        # Accept 2xx/3xx OR 403 if it's a strong subdomain
+                        if resp.status_code < 400 or (resp.status_code == 403 and is_strong):
+                            found_apis.append(str(resp.url))
+                        else:
+                            logger.info(f"Candidate {candidate} returned status {resp.status_code}")
+                except Exception as e:
+                    # Ignore connection errors, but log them
+                    logger.debug(f"Failed to check {candidate}: {e}")
+                    continue
             
             # Determine recommendation
             recommendation = "Proceed with Bridge"
@@ -0,0 +1,154 @@
+"""
+Single-navigation discovery.
+
+Creating a bridge used to load the target page three times: /survey opened a WebMCP
+browser, /analyze crawled it (permission check, render, forced scroll), and element hints
+needed yet another browser. A discovery session loads the page once, in the WebMCP pool so
+the tool probe works, and captures everything from that one page:
+    html, snapshot (LLM input), elements (selector hints), webmcp_tools
+
+The result is cached in Redis for `discovery_cache_ttl_seconds`, so the analyze/survey
+calls share it and the bridge created right afterwards uses it for its first extraction
+instead of fetching the page again. Concurrent loads of the same URL in one process are
+coalesced.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from app.core.browser_pool import POOL_WEBMCP, get_browser_pool
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.services.distill import snapshot_needed
+from app.services.dom_prune import pruned_content
+from app.services.frontier import normalize_url
+from app.services.permissions import PermissionService
+from app.services.politeness import PolitenessScheduler
+from app.services.readiness import ReadinessEngine
+from app.services.snapshot import SNAPSHOT_SCRIPT, script_args
+from app.services.webmcp import WEBMCP_SHIM_SCRIPT, probe_tools
+
+logger = logging.getLogger(__name__)
+
+VISUAL_ELEMENTS_SCRIPT = """() => {
+    const selectors = ['a', 'button', 'h1', 'h2', 'h3', '.title', '.price', 'article'];
+    const results = [];
+    selectors.forEach(sel => {
+        document.querySelectorAll(sel).forEach(el => {
+            if (el.innerText.trim().length > 0) {
+                results.push({
+                    tag: el.tagName.toLowerCase(),
+                    text: el.innerText.trim().substring(0, 50),
+                    selector: sel,
+                    path: el.id ? `#${el.id}` : `${el.tagName.toLowerCase()}.${el.className.split(' ').join('.')}`
+                });
+            }
+        });
+    });
+    return results.slice(0, 50); // Limit to top 50
+}"""
+
+# In-process loads by cache key, so concurrent survey/analyze calls share one navigation
+_loading: Dict[str, asyncio.Future] = {}
+
+
+def _cache_key(url: str) -> str:
+    canonical = normalize_url(url) or url
+    return f"discovery:page:{hashlib.sha1(canonical.encode('utf-8')).hexdigest()}"
+
+
+class DiscoverySession:
+    """Loads a page once and keeps what schema discovery, surveying and the first extraction need."""
+
+    async def get(self, url: str) -> Dict[str, Any]:
+        """The cached discovery result for `url`, loading the page if there is none."""
+        key = _cache_key(url)
+        cached = await self._read(key)
+        if cached:
+            return cached
+
+        if key in _loading:
+            return await asyncio.shield(_loading[key])
+
+        future = asyncio.get_running_loop().create_future()
+        _loading[key] = future
+        try:
+            result = await self.load(url)
+            await self._write(key, result)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            _loading.pop(key, None)
+
+    async def take(self, url: str) -> Optional[Dict[str, Any]]:
+        """Consume the cached result (used once by a new bridge's first extraction)."""
+        try:
+            redis = await get_redis()
+            raw = await redis.getdel(_cache_key(url))
+        except Exception as e:
+            logger.warning(f"Discovery cache unavailable: {e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    async def load(self, url: str) -> Dict[str, Any]:
+        """One navigation: snapshot, element map and WebMCP probe from the same page."""
+        async with AsyncSessionLocal() as db:
+            if not await PermissionService().check_access(url, db):
+                raise Exception("Access Denied by robots.txt or platform policy")
+
+        started = time.monotonic()
+        pool = await get_browser_pool(POOL_WEBMCP)
+        async with pool.context() as context:
+            page = await context.new_page()
+            await page.add_init_script(WEBMCP_SHIM_SCRIPT)
+            async with PolitenessScheduler().slot(urlparse(url).netloc):
+                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            readiness = await ReadinessEngine().wait(page)
+
+            try:
+                tools = await probe_tools(page, url)
+            except Exception as e:
+                logger.warning(f"WebMCP probe failed on {url}: {e}")
+                tools = []
+            html, transfer = await pruned_content(page)
+            snapshot = await page.evaluate(SNAPSHOT_SCRIPT, script_args()) if snapshot_needed() else None
+            elements = await page.evaluate(VISUAL_ELEMENTS_SCRIPT)
+
+        logger.info(f"Discovery session for {url}: {len(html)} chars, {len(elements)} elements, {len(tools)} tools")
+        return {
+            "url": url,
+            "html": html,
+            "snapshot": snapshot,
+            "elements": elements,
+            "webmcp_tools": tools,
+            "readiness": readiness.get("condition"),
+            "transfer": transfer,
+            "load_ms": int((time.monotonic() - started) * 1000),
+            "captured_at": time.time(),
+        }
+
+    async def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            redis = await get_redis()
+            raw = await redis.get(key)
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Discovery cache unavailable: {e}")
+            return None
+
+    async def _write(self, key: str, result: Dict[str, Any]):
+        try:
+            redis = await get_redis()
+            await redis.set(key, json.dumps(result), ex=settings.discovery_cache_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Failed to cache discovery result: {e}")
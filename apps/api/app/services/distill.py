@@ -0,0 +1,311 @@
+"""
+HTML distillation for LLM prompts.
+
+Slicing raw HTML to a character budget spends most of it on <head>, scripts and
+navigation, and the listing the schema asks for is often cut off. Distillation turns the
+page into a compact, markdown-like text-and-structure form, main content first:
+
+    # Acme Shop
+    - [Widget](/p/1) $10
+    - [Gadget](/p/2) $12
+    | Size | Price |
+    |---|---|
+    | S | $10 |
+
+Scripts, styles and boilerplate (nav, header, footer, aside, cookie banners, share bars)
+are dropped; headings, lists, tables, definition lists, links and images are kept. The
+main content block (<main>, or the densest text block) is emitted first and the rest of
+the page after it, then the result is cut to a token budget on line boundaries.
+This is CPU-bound lxml work: call it through `distill()`, which runs it in a thread.
+"""
+import asyncio
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from lxml import html as lxml_html
+
+from app.core.config import settings
+from app.services.snapshot import CHARS_PER_TOKEN, SKIP_TAGS
+
+logger = logging.getLogger(__name__)
+
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside"}
+# Inside these, header/footer/aside belong to a card or article (its title, price, byline), not the page
+SECTIONING_TAGS = {"article", "section", "main", "li"}
+LANDMARK_ONLY_TAGS = {"header", "footer", "aside"}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog"}
+BOILERPLATE_CLASS = re.compile(
+    r"(?:^|[-_\s])(cookie|consent|gdpr|newsletter|subscribe|social|share|sharing|advert|ads|sponsor|promo|"
+    r"popup|modal|sidebar|breadcrumbs?|skip-link)(?:[-_\s]|$)",
+    re.I,
+)
+# A "boilerplate" element holding this much of the page's text is a layout wrapper, not chrome
+BOILERPLATE_MAX_SHARE = 0.5
+MAIN_MIN_SHARE = 0.25
+MAIN_CLIMB_RATIO = 1.5
+MIN_BLOCK_CHARS = 25
+MAX_LINE = 1000
+REST_MARKER = "--- rest of page ---"
+TRUNCATED_MARKER = "… (truncated)"
+
+HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+LIST_TAGS = {"ul", "ol"}
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "body", "details", "div", "dl", "dd", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "summary",
+    "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul", "aside",
+} | set(HEADINGS)
+
+
+def _clean(value: str) -> str:
+    return " ".join(value.split())
+
+
+def _text_len(el) -> int:
+    return len(_clean(el.text_content()))
+
+
+def _tag(el) -> Optional[str]:
+    return el.tag if isinstance(el.tag, str) else None
+
+
+def _inline_child(child, skip_lists: bool = False) -> str:
+    tag = _tag(child)
+    if tag is None or tag in SKIP_TAGS or (skip_lists and tag in LIST_TAGS):
+        return ""
+    if tag == "a":
+        text = _inline(child)
+        href = (child.get("href") or "").strip()
+        return f"[{text}]({href})" if text and href and not href.startswith(("#", "javascript:")) else text
+    if tag == "img":
+        src, alt = (child.get("src") or "").strip(), _clean(child.get("alt") or "")
+        return f"![{alt}]({src})" if src and not src.startswith("data:") else alt
+    return _inline(child, skip_lists)
+
+
+def _inline(el, skip_lists: bool = False) -> str:
+    """Flatten an element to one line, keeping links and images as [text](href) / ![alt](src)."""
+    parts: List[str] = [el.text or ""]
+    for child in el:
+        parts.append(_inline_child(child, skip_lists))
+        parts.append(child.tail or "")
+    line = _clean(" ".join(parts))
+    return line[:MAX_LINE] + "…" if len(line) > MAX_LINE else line
+
+
+def _render(el, out: List[str], depth: int = 0):
+    tag = _tag(el)
+    if tag is None or tag in SKIP_TAGS:
+        return
+
+    if tag in HEADINGS:
+        text = _inline(el)
+        if text:
+            out.append(f"{'#' * HEADINGS[tag]} {text}")
+    elif tag in LIST_TAGS:
+        for number, item in enumerate((c for c in el if _tag(c) == "li"), start=1):
+            text = _inline(item, skip_lists=True)
+            if text:
+                bullet = f"{number}." if tag == "ol" else "-"
+                out.append(f"{'  ' * depth}{bullet} {text}")
+            for nested in item:
+                if _tag(nested) in LIST_TAGS:
+                    _render(nested, out, depth + 1)
+    elif tag == "table":
+        _render_table(el, out)
+    elif tag == "dl":
+        term = None
+        for child in el:
+            if _tag(child) == "dt":
+                term = _inline(child)
+            elif _tag(child) == "dd":
+                value = _inline(child)
+                if value:
+                    out.append(f"{term}: {value}" if term else value)
+    elif tag == "pre":
+        text = (el.text_content() or "").strip()
+        if text:
+            out.append(text[:MAX_LINE * 4])
+    else:
+        # Generic block: inline runs become lines, block children render on their own
+        run: List[str] = [el.text or ""]
+        for child in el:
+            child_tag = _tag(child)
+            if child_tag in BLOCK_TAGS or child_tag == "table":
+                _flush(run, out)
+                run = []
+                _render(child, out, depth)
+            else:
+                run.append(_inline_child(child))
+            run.append(child.tail or "")
+        _flush(run, out)
+
+
+def _flush(run: List[str], out: List[str]):
+    line = _clean(" ".join(run))
+    if line:
+        out.append(line[:MAX_LINE] + "…" if len(line) > MAX_LINE else line)
+
+
+def _render_table(table, out: List[str]):
+    header_done = False
+    for row in table.iter("tr"):
+        cells = [c for c in row if _tag(c) in ("td", "th")]
+        if not cells:
+            continue
+        values = [_inline(c).replace("|", "/") for c in cells]
+        if not any(values):
+            continue
+        out.append("| " + " | ".join(values) + " |")
+        if not header_done:
+            header_done = True
+            if all(_tag(c) == "th" for c in cells):
+                out.append("|" + "---|" * len(cells))
+
+
+def _is_boilerplate(el) -> bool:
+    tag = _tag(el)
+    if tag in BOILERPLATE_TAGS:
+        return tag not in LANDMARK_ONLY_TAGS or not any(_tag(a) in SECTIONING_TAGS for a in el.iterancestors())
+    if (el.get("role") or "").lower() in BOILERPLATE_ROLES or el.get("aria-modal") == "true":
+        return True
+    return bool(BOILERPLATE_CLASS.search(f"{el.get('id') or ''} {el.get('class') or ''}"))
+
+
+def _strip_boilerplate(body, body_len: int) -> int:
+    """Remove scripts/styles and page chrome; returns how many elements were removed."""
+    dropped = set()
+    for el in list(body.iter()):
+        tag = _tag(el)
+        if el.getparent() is None or (tag is not None and tag not in SKIP_TAGS and not _is_boilerplate(el)):
+            continue
+        if tag is not None and tag not in SKIP_TAGS and body_len and _text_len(el) > body_len * BOILERPLATE_MAX_SHARE:
+            continue
+        if any(ancestor in dropped for ancestor in el.iterancestors()):
+            continue
+        el.drop_tree()
+        dropped.add(el)
+    return len(dropped)
+
+
+def _main_content(body) -> Tuple[Any, str]:
+    """The main content block: <main>/[role=main] if it holds real text, else the densest block."""
+    body_len = _text_len(body)
+    if not body_len:
+        return body, "body"
+
+    for candidate in body.xpath(".//main | .//*[@role='main']"):
+        if _text_len(candidate) >= body_len * MAIN_MIN_SHARE:
+            return candidate, "main"
+
+    # Readability-style: text blocks vote for their parent and (half) grandparent
+    scores: Dict[Any, float] = {}
+    for block in body.iter("p", "li", "tr", "dd", "article", "h2", "h3", "td"):
+        length = _text_len(block)
+        if length < MIN_BLOCK_CHARS:
+            continue
+        parent = block.getparent()
+        if parent is not None:
+            scores[parent] = scores.get(parent, 0) + length
+            grandparent = parent.getparent()
+            if grandparent is not None:
+                scores[grandparent] = scores.get(grandparent, 0) + length / 2
+    if not scores:
+        return body, "body"
+
+    def link_density(el) -> float:
+        total = _text_len(el)
+        links = sum(_text_len(a) for a in el.iter("a"))
+        return links / total if total else 1.0
+
+    best = max(scores, key=lambda el: scores[el] * (1 - 0.5 * link_density(el)))
+    # A winning list or table usually has its heading and siblings one level up: climb while
+    # the parent adds little text of its own
+    while best is not body and best.getparent() is not None and best.getparent() is not body:
+        if _text_len(best.getparent()) > _text_len(best) * MAIN_CLIMB_RATIO:
+            break
+        best = best.getparent()
+    if best is body or _text_len(best) < body_len * MAIN_MIN_SHARE:
+        return body, "body"
+    return best, "scored"
+
+
+def fit_to_budget(text: str, budget_tokens: int) -> Tuple[str, bool]:
+    """Cut `text` to roughly `budget_tokens` tokens on a line boundary. Returns (text, truncated)."""
+    limit = budget_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text, False
+    cut = text.rfind("\n", 0, limit)
+    return text[:cut if cut > 0 else limit] + f"\n{TRUNCATED_MARKER}", True
+
+
+def distill_html(html: str, budget_tokens: int) -> Tuple[str, Dict[str, Any]]:
+    """
+    Distill `html` to main-content-first text and structure within `budget_tokens`.
+    Returns (text, stats). Blocking: see `distill()`.
+    """
+    stats: Dict[str, Any] = {"html_chars": len(html or ""), "budget_tokens": budget_tokens}
+    try:
+        doc = lxml_html.fromstring(html)
+    except ValueError:
+        doc = lxml_html.fromstring(html.encode("utf-8"))
+    except Exception as e:
+        logger.warning(f"Failed to parse HTML for distillation: {e}")
+        text, stats["truncated"] = fit_to_budget(html or "", budget_tokens)
+        return text, {**stats, "main": None, "distilled_chars": len(text)}
+
+    body = doc.find("body")
+    if body is None:
+        body = doc
+
+    # Title first: it names the page even when the main block doesn't
+    title = _clean(doc.findtext(".//title") or "")
+    stats["boilerplate_removed"] = _strip_boilerplate(body, _text_len(body))
+    main, stats["main"] = _main_content(body)
+
+    lines: List[str] = [f"Title: {title}"] if title else []
+    _render(main, lines)
+    if main is not body:
+        main.drop_tree()
+        rest: List[str] = []
+        _render(body, rest)
+        if rest:
+            lines.append(REST_MARKER)
+            lines.extend(rest)
+
+    text, stats["truncated"] = fit_to_budget("\n".join(lines), budget_tokens)
+    stats["distilled_chars"] = len(text)
+    return text, stats
+
+
+def snapshot_needed() -> bool:
+    """Whether a DOM snapshot can reach a prompt: only with distillation off (page_text uses the HTML)."""
+    return settings.dom_snapshot_enabled and not settings.distill_enabled
+
+
+async def distill(html: str, budget_tokens: int) -> Tuple[str, Dict[str, Any]]:
+    """distill_html in a worker thread, so parsing a large page never blocks the event loop."""
+    return await asyncio.to_thread(distill_html, html, budget_tokens)
+
+
+async def page_text(html: Optional[str], snapshot: Optional[str], budget_tokens: int) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    The page as LLM input within `budget_tokens`: (header, text, stats). Distilled HTML
+    when distillation is on, else the snapshot (or raw HTML) cut on a line boundary.
+    """
+    if settings.distill_enabled and html:
+        text, stats = await distill(html, budget_tokens)
+        header = "Page content (main content first; # headings, - list items, | table rows |, [text](href) links):"
+        return header, text, {"input": "distilled", **stats}
+    if snapshot:
+        text, truncated = fit_to_budget(snapshot, budget_tokens)
+        return "Page snapshot (one node per line, indentation = nesting, [nX] = node id):", text, {"input": "snapshot", "truncated": truncated}
+    text, truncated = fit_to_budget(html or "", budget_tokens)
+    return "HTML Content:", text, {"input": "html", "truncated": truncated}
+
+
+async def prompt_content(html: Optional[str], snapshot: Optional[str], budget_tokens: int) -> Tuple[str, Dict[str, Any]]:
+    """The page section of an LLM prompt (header and text), within `budget_tokens`."""
+    header, text, stats = await page_text(html, snapshot, budget_tokens)
+    return f"{header}\n{text}", stats
@@ -0,0 +1,143 @@
+"""
+In-browser DOM pruning.
+
+`page.content()` serializes the whole document (inline scripts, SVG sprites, style blocks,
+templates) and ships it over the CDP pipe, only for the extractor to keep a few thousand
+characters. PRUNE_SCRIPT builds the payload inside the page instead, on a clone so the live
+page (and the snapshot taken from it) is untouched:
+  - drops non-content nodes (scripts other than JSON-LD, styles, SVG, templates, comments,
+    links other than canonical/alternate),
+  - drops subtrees hidden with display/visibility, except inside <details> and tab panels
+    where hidden content is usually real data,
+  - strips presentational and event attributes and caps long attribute values,
+  - collapses whitespace, caps text nodes and truncates very long child lists.
+UTF-8 sizes before and after are returned so the savings show up in crawl metrics.
+"""
+import logging
+from typing import Any, Dict, Tuple
+
+from playwright.async_api import Page
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DROP_TAGS = ["script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "embed", "link"]
+# Never dropped (neither as a DROP_TAGS tag nor for being hidden): structured data and
+# the page's canonical/alternate URLs, which selectors like "link[rel=canonical]@href" read
+KEEP_SELECTORS = ['script[type="application/ld+json"]', 'link[rel~="canonical"]', 'link[rel~="alternate"]']
+DROP_ATTRS = ["style", "srcset", "sizes", "nonce", "integrity"]
+# Never dropped for being hidden: form values and media sources carry data without rendering
+KEEP_HIDDEN_TAGS = ["input", "option", "optgroup", "source", "track", "meta", "br", "wbr", "area"]
+MAX_ATTR = 500
+
+PRUNE_SCRIPT = """
+({dropTags, dropAttrs, keepHiddenTags, keepSelectors, maxChildren, maxText, maxAttr}) => {
+    const encoder = new TextEncoder();
+    const doctype = document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '';
+    const bytesBefore = encoder.encode(doctype + document.documentElement.outerHTML).length;
+
+    const root = document.documentElement.cloneNode(true);
+    const live = document.documentElement.querySelectorAll('*');
+    const copies = root.querySelectorAll('*');
+    const keepHidden = new Set(keepHiddenTags);
+    const keep = keepSelectors.join(',');
+    let removed = 0;
+
+    // Hidden subtrees, found on the live DOM (computed styles) and removed from the clone
+    if (live.length === copies.length && document.body) {
+        const hidden = [];
+        for (let i = 0; i < live.length; i++) {
+            const el = live[i];
+            if (keepHidden.has(el.localName) || el.matches(keep) || !document.body.contains(el)) continue;
+            if (el.closest('details, [role="tabpanel"]')) continue;
+            const visible = el.checkVisibility
+                ? el.checkVisibility({visibilityProperty: true})
+                : getComputedStyle(el).display !== 'none';
+            if (!visible) hidden.push(copies[i]);
+        }
+        for (const el of hidden) {
+            if (el.isConnected || root.contains(el)) { el.remove(); removed++; }
+        }
+    }
+
+    for (const el of root.querySelectorAll(dropTags.join(','))) {
+        if (el.matches(keep)) continue;
+        el.remove();
+        removed++;
+    }
+
+    const comments = document.createTreeWalker(root, NodeFilter.SHOW_COMMENT);
+    const dead = [];
+    while (comments.nextNode()) dead.push(comments.currentNode);
+    dead.forEach(node => node.remove());
+    removed += dead.length;
+
+    const drop = new Set(dropAttrs);
+    let truncated = 0;
+    for (const el of root.querySelectorAll('*')) {
+        for (const attr of Array.from(el.attributes)) {
+            if (drop.has(attr.name) || attr.name.startsWith('on')) {
+                el.removeAttribute(attr.name);
+            } else if (attr.value.length > maxAttr) {
+                el.setAttribute(attr.name, attr.value.slice(0, maxAttr) + '…');
+            }
+        }
+        if (el.children.length > maxChildren) {
+            const extra = Array.from(el.children).slice(maxChildren);
+            extra.forEach(child => child.remove());
+            el.appendChild(document.createComment(` ${extra.length} more elements `));
+            truncated += extra.length;
+        }
+    }
+
+    const texts = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+    while (texts.nextNode()) {
+        const node = texts.currentNode;
+        if (node.parentElement && node.parentElement.closest('pre, textarea, script')) continue;
+        let text = node.data.replace(/\\s+/g, ' ');
+        if (text.length > maxText) text = text.slice(0, maxText) + '…';
+        if (text !== node.data) node.data = text;
+    }
+
+    const html = doctype + root.outerHTML;
+    return {html, bytesBefore, bytesAfter: encoder.encode(html).length, removed, truncated};
+}
+"""
+
+
+def prune_args() -> Dict[str, Any]:
+    return {
+        "dropTags": DROP_TAGS,
+        "dropAttrs": DROP_ATTRS,
+        "keepHiddenTags": KEEP_HIDDEN_TAGS,
+        "keepSelectors": KEEP_SELECTORS,
+        "maxChildren": settings.dom_prune_max_children,
+        "maxText": settings.dom_prune_max_text,
+        "maxAttr": MAX_ATTR,
+    }
+
+
+async def pruned_content(page: Page) -> Tuple[str, Dict[str, Any]]:
+    """
+    The page's HTML, pruned in the browser before it crosses the CDP pipe.
+    Returns (html, transfer stats). Falls back to page.content() if pruning is off or fails.
+    """
+    if settings.dom_pruning_enabled:
+        try:
+            result = await page.evaluate(PRUNE_SCRIPT, prune_args())
+            before, after = result["bytesBefore"], result["bytesAfter"]
+            return result["html"], {
+                "pruned": True,
+                "bytes_before": before,
+                "bytes_after": after,
+                "ratio": round(after / before, 3) if before else None,
+                "nodes_removed": result["removed"],
+                "children_truncated": result["truncated"],
+            }
+        except Exception as e:
+            logger.warning(f"In-browser pruning failed, transferring the full page: {e}")
+
+    content = await page.content()
+    size = len(content.encode("utf-8"))
+    return content, {"pruned": False, "bytes_before": size, "bytes_after": size, "ratio": 1.0}
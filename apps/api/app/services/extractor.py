@@ -1,49 +1,248 @@
+import asyncio
 import json
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.llm import get_llm_for_user
+from app.core.config import settings
+from app.services.chunking import estimate_tokens, merge_chunk_results, split_chunks
+from app.services.distill import page_text
+from app.services.llm import LLMProvider, get_llm_for_user
+from app.services.llm.limits import provider_concurrency, provider_slot
+from app.services.selectors import SelectorSpecError, compile_selectors, run_selectors, selector_skeleton
 
 logger = logging.getLogger(__name__)
 
+# Instructions and framing around the page text in each prompt
+PROMPT_OVERHEAD_TOKENS = 300
+MIN_CHUNK_TOKENS = 1000
+
 class ExtractionService:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self._provider: Optional[LLMProvider] = None
+        self._provider_lock = asyncio.Lock()
+        # Input, chunking and timing details of the last extraction
+        self.last_extraction_stats: Dict[str, Any] = {}
+
+    async def _get_provider(self, user_id: UUID) -> LLMProvider:
+        """
+        Resolve the user's LLM provider once per service instance.
+        Concurrent extractions (e.g. one per page) must not share the DB session at the same time.
+        """
+        async with self._provider_lock:
+            if self._provider is None:
+                self._provider = await get_llm_for_user(user_id, self.db)
+            return self._provider
 
     async def extract_structured_data(
         self,
         html: str, 
         schema: Dict[str, Any],
-        user_id: UUID
+        user_id: UUID,
+        snapshot: Optional[str] = None,
+        selectors: Optional[Dict[str, Any]] = None,
+        url: str = ""
     ) -> Dict[str, Any]:
-        """Use LLM to extract data from HTML based on a JSON schema"""
+        """
+        Extract data matching a JSON schema from a page. The bridge's selectors run first
+        (see app.services.selectors) and answer alone when they fill selector_min_coverage
+        of the fields. Otherwise the HTML is distilled to main-content text (see
+        app.services.distill), or the snapshot is used when distillation is off, and sent
+        to the LLM; a page larger than one prompt goes in overlapping chunks extracted
+        concurrently and merged (see app.services.chunking). Run details land in
+        last_extraction_stats.
+        """
+        selector_stats = None
+        if selectors and html and settings.selector_extraction_enabled:
+            try:
+                data, selector_stats = await run_selectors(html, selectors, url)
+                if selector_stats["coverage"] >= settings.selector_min_coverage:
+                    self.last_extraction_stats = selector_stats
+                    return data
+                logger.info(f"Selectors filled {selector_stats['coverage']:.0%} of fields, falling back to LLM")
+            except Exception as e:
+                logger.warning(f"Selector extraction failed, falling back to LLM: {e}")
+                selector_stats = {"source": "selectors", "error": str(e)}
+
+        try:
+            # Get LLM provider with automatic failover
+            provider = await self._get_provider(user_id)
+        except Exception as e:
+            logger.error(f"Error during LLM extraction: {e}")
+            return {"error": str(e)}
+
+        schema_json = json.dumps(schema, indent=2)
+        if settings.chunked_extraction_enabled:
+            chunk_tokens = self._chunk_tokens(provider, schema_json)
+            header, text, stats = await page_text(html, snapshot, settings.extraction_max_page_tokens)
+            if estimate_tokens(text) > chunk_tokens:
+                chunks = split_chunks(text, chunk_tokens, settings.extraction_chunk_overlap_tokens)
+            else:
+                chunks = [text]
+        else:
+            chunk_tokens = settings.llm_input_token_budget
+            header, text, stats = await page_text(html, snapshot, chunk_tokens)
+            chunks = [text]
+
+        self.last_extraction_stats = {
+            "input": stats["input"],
+            "page_tokens_est": estimate_tokens(text),
+            "truncated": stats.get("truncated", False),
+            "chunks": len(chunks),
+            "chunk_tokens": chunk_tokens,
+        }
+        if selector_stats:
+            self.last_extraction_stats["selectors"] = selector_stats
+
+        if len(chunks) == 1:
+            try:
+                async with provider_slot(provider):
+                    return await self._complete(provider, self._prompt(schema_json, header, text))
+            except Exception as e:
+                logger.error(f"Error during LLM extraction: {e}")
+                return {"error": str(e)}
+
+        return await self._extract_chunks(provider, schema, schema_json, header, chunks)
+
+    async def propose_selectors(
+        self,
+        html: str,
+        schema: Dict[str, Any],
+        user_id: UUID,
+        url: str = "",
+        sample: Optional[Any] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ask the LLM once for selectors that extract `schema` from pages like this one, so
+        later runs need no LLM call. `sample` is a known-good extraction of this page to aim
+        for. Returns the spec, or None when it doesn't compile or fills too few fields here.
+        """
+        skeleton = await asyncio.to_thread(selector_skeleton, html, settings.selector_proposal_token_budget)
+        sample_json = json.dumps(sample, default=str)[:2000] if sample else ""
         prompt = f"""
-        Extract data from the following HTML into a JSON object matching this schema:
+        Write CSS selectors that extract data matching this schema from the page below and from other pages with the same layout:
         {json.dumps(schema, indent=2)}
+        {f"For this page the expected result is: {sample_json}" if sample_json else ""}
 
-        HTML Content (truncated):
-        {html[:15000]} # Truncated to stay within context limits
+        Return a JSON object with one entry per top-level schema field. Each value is either a selector
+        string (text content of the first match) or an object with:
+          "selector": CSS selector, or an XPath expression prefixed with "xpath:",
+          "attr": attribute to read instead of the text (e.g. "href", "src", "content"),
+          "many": true to return the text of every match as a list,
+          "fields": for a list of objects, selectors relative to each match of "selector",
+          "transform": any of "strip", "lower", "upper", "number", "int", "absolute_url", "regex:<pattern>".
+        Prefer stable ids, itemprop and semantic class names over positions.
+
+        Page markup (attributes trimmed, repeated siblings shortened):
+        {skeleton}
 
         Return ONLY the raw JSON object. Do not include markdown formatting.
         """
-
         try:
-            # Get LLM provider with automatic failover
-            provider = await get_llm_for_user(user_id, self.db)
-            
-            response = await provider.complete(
-                messages=[
-                    {"role": "system", "content": "You are a specialized data extraction agent. You only output valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                response_format="json"
-            )
-            
-            result = json.loads(response)
-            return result
+            provider = await self._get_provider(user_id)
+            async with provider_slot(provider):
+                response = await provider.complete(
+                    messages=[
+                        {"role": "system", "content": "You write robust CSS selectors for web scraping. You only output valid JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0,
+                    response_format="json"
+                )
+            spec = json.loads(response)
+            compile_selectors(spec)
+            _, stats = await run_selectors(html, spec, url)
+        except (SelectorSpecError, ValueError, TypeError) as e:
+            logger.warning(f"Proposed selectors rejected: {e}")
+            return None
         except Exception as e:
-            logger.error(f"Error during LLM extraction: {e}")
-            return {"error": str(e)}
+            logger.error(f"Error proposing selectors: {e}")
+            return None
+
+        if stats["coverage"] < settings.selector_min_coverage:
+            logger.info(f"Proposed selectors rejected: only {stats['coverage']:.0%} of fields filled")
+            return None
+        logger.info(f"Proposed selectors accepted ({stats['coverage']:.0%} of fields filled)")
+        return spec
+
+    async def _extract_chunks(
+        self,
+        provider: LLMProvider,
+        schema: Dict[str, Any],
+        schema_json: str,
+        header: str,
+        chunks: List[str]
+    ) -> Dict[str, Any]:
+        """Map: extract every chunk concurrently (capped per provider). Reduce: merge by schema."""
+        in_flight = peak = 0
+        started = time.monotonic()
+
+        async def run(number: int, chunk: str):
+            nonlocal in_flight, peak
+            async with provider_slot(provider):
+                in_flight += 1
+                peak = max(peak, in_flight)
+                try:
+                    part = f"This is part {number} of {len(chunks)} of the page (parts overlap slightly). " \
+                           "Extract only what appears in this part; use null or an empty list for anything that does not."
+                    return await self._complete(provider, self._prompt(schema_json, header, chunk, part))
+                finally:
+                    in_flight -= 1
+
+        results = await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks, start=1)), return_exceptions=True)
+        llm_ms = int((time.monotonic() - started) * 1000)
+
+        errors = [r for r in results if isinstance(r, Exception)]
+        for error in errors:
+            logger.warning(f"Chunk extraction failed: {error}")
+        self.last_extraction_stats.update({
+            "parallelism": peak,
+            "concurrency_cap": provider_concurrency(provider.get_provider_name()),
+            "failed_chunks": len(errors),
+            "llm_ms": llm_ms,
+        })
+        if len(errors) == len(results):
+            logger.error(f"Error during LLM extraction: every chunk failed ({errors[0]})")
+            return {"error": str(errors[0])}
+
+        merge_started = time.monotonic()
+        merged = merge_chunk_results([r for r in results if not isinstance(r, Exception)], schema)
+        self.last_extraction_stats["merge_ms"] = round((time.monotonic() - merge_started) * 1000, 2)
+        logger.info(f"Chunked extraction: {self.last_extraction_stats}")
+        return merged
+
+    def _chunk_tokens(self, provider: LLMProvider, schema_json: str) -> int:
+        """Chunk size: extraction_chunk_tokens, or less if the model's context can't hold it plus the prompt."""
+        available = (
+            provider.get_max_context_length()
+            - estimate_tokens(schema_json)
+            - PROMPT_OVERHEAD_TOKENS
+            - settings.extraction_response_reserve_tokens
+        )
+        return max(MIN_CHUNK_TOKENS, min(settings.extraction_chunk_tokens, available))
+
+    def _prompt(self, schema_json: str, header: str, text: str, part: Optional[str] = None) -> str:
+        return f"""
+        Extract data from the following page into a JSON object matching this schema:
+        {schema_json}
+        {part or ""}
+
+        {header}
+        {text}
+
+        Return ONLY the raw JSON object. Do not include markdown formatting.
+        """
+
+    async def _complete(self, provider: LLMProvider, prompt: str) -> Any:
+        response = await provider.complete(
+            messages=[
+                {"role": "system", "content": "You are a specialized data extraction agent. You only output valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0,
+            response_format="json"
+        )
+        return json.loads(response)
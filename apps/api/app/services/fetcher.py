@@ -0,0 +1,200 @@
+"""
+HTTP-first static fetch tier.
+
+Many bridges target server-rendered pages that a plain GET returns complete. We try
+that first, decide from heuristics whether a browser render is needed, and remember
+the decision per bridge (or domain) so later runs go straight to the right tier.
+"""
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+
+from app.core.config import settings
+from app.core.http_clients import PURPOSE_FETCH, get_http_client
+from app.core.redis import get_redis
+from app.services.selectors import css_selector
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+MODE_STATIC = "static"
+MODE_RENDER = "render"
+
+# Below this much visible body text the page is almost certainly rendered client-side
+MIN_BODY_TEXT = 200
+# SPA markers only count when the page is also fairly light on text
+SPA_TEXT_THRESHOLD = 1000
+
+SPA_MARKERS = [
+    re.compile(r'<div[^>]+id=["\'](?:root|app|__next|__nuxt|svelte)["\'][^>]*>\s*</div>', re.I),
+    re.compile(r'<noscript[^>]*>[^<]*(?:enable|requires?)\s+javascript', re.I),
+    re.compile(r'<app-root[^>]*>\s*</app-root>', re.I),
+]
+
+NON_CONTENT_TAGS = ["script", "style", "noscript", "template"]
+
+MAX_REDIRECTS = 10
+
+
+class StaticFetchService:
+    """Plain HTTP fetch plus the heuristics that decide whether it was enough."""
+
+    async def fetch(
+        self,
+        url: str,
+        cookies: Optional[List[Dict[str, Any]]] = None,
+        validators: Optional[Dict[str, str]] = None,
+    ) -> Optional[httpx.Response]:
+        """
+        GET the URL with session cookies. When ETag/Last-Modified validators are given the
+        request is conditional and a 304 response is returned as-is.
+        Returns None for non-HTML or failed responses.
+        """
+        jar = httpx.Cookies()
+        for cookie in cookies or []:
+            if cookie.get("name") and cookie.get("value") is not None:
+                jar.set(
+                    cookie["name"],
+                    cookie["value"],
+                    domain=cookie.get("domain", "").lstrip("."),
+                    path=cookie.get("path", "/"),
+                )
+
+        headers = {"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        try:
+            resp = await self._get(url, headers, jar)
+        except Exception as e:
+            logger.info(f"Static fetch failed for {url}: {e}")
+            return None
+
+        if resp.status_code == 304:
+            return resp
+        if resp.status_code != 200 or "html" not in resp.headers.get("content-type", "html"):
+            logger.info(f"Static fetch unusable for {url} (status {resp.status_code})")
+            return None
+        return resp
+
+    async def _get(self, url: str, headers: Dict[str, str], jar: httpx.Cookies) -> httpx.Response:
+        """
+        GET on the shared client, following redirects here so the session jar (which the
+        shared client doesn't keep) is applied, and updated, on every hop.
+        """
+        client = get_http_client(PURPOSE_FETCH)
+        request = client.build_request("GET", url, headers=headers)
+        for _ in range(MAX_REDIRECTS + 1):
+            jar.set_cookie_header(request)
+            resp = await client.send(request)
+            jar.extract_cookies(resp)
+            if not resp.next_request:
+                return resp
+            await resp.aclose()
+            request = resp.next_request
+            request.headers.pop("Cookie", None)
+        raise httpx.TooManyRedirects(f"Exceeded {MAX_REDIRECTS} redirects", request=request)
+
+    def needs_render(
+        self,
+        html: str,
+        extraction_schema: Optional[Dict[str, Any]] = None,
+        selectors: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[bool, str]:
+        """
+        Decide whether statically fetched HTML is complete.
+        Returns (needs_render, reason).
+        """
+        try:
+            doc = lxml_html.fromstring(html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            doc = lxml_html.fromstring(html.encode("utf-8"))
+        except Exception:
+            return True, "unparseable"
+
+        # 1. Known selectors must match elements with text
+        for field, spec in (selectors or {}).items():
+            selector = css_selector(spec)
+            if not selector:
+                continue
+            try:
+                matches = CSSSelector(selector)(doc)
+            except Exception:
+                continue
+            if not any(el.text_content().strip() or el.attrib for el in matches):
+                return True, f"selector_missing:{field}"
+
+        body_text = self._visible_text(doc)
+
+        # 2. Empty mount points / "enable JavaScript" notices
+        if len(body_text) < SPA_TEXT_THRESHOLD and any(marker.search(html) for marker in SPA_MARKERS):
+            return True, "spa_marker"
+
+        # 3. Empty body
+        if len(body_text) < MIN_BODY_TEXT:
+            return True, "empty_body"
+
+        # 4. None of the schema fields can be located in the markup
+        fields = self._schema_fields(extraction_schema)
+        if fields and not any(self._field_present(doc, body_text, field) for field in fields):
+            return True, "schema_fields_missing"
+
+        return False, "static_ok"
+
+    async def get_mode(self, key: str) -> Optional[str]:
+        """Remembered tier for a bridge/domain, or None if unknown."""
+        try:
+            redis = await get_redis()
+            return await redis.get(f"bridge:fetch_mode:{key}")
+        except Exception as e:
+            logger.warning(f"Fetch mode cache unavailable (Redis error): {e}")
+            return None
+
+    async def set_mode(self, key: str, mode: str):
+        try:
+            redis = await get_redis()
+            await redis.set(f"bridge:fetch_mode:{key}", mode, ex=settings.fetch_mode_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Failed to remember fetch mode for {key}: {e}")
+
+    def _visible_text(self, doc) -> str:
+        body = doc.find("body")
+        if body is None:
+            body = doc
+        for el in list(body.iter(*NON_CONTENT_TAGS)):
+            el.drop_tree()
+        return " ".join(body.text_content().split())
+
+    def _schema_fields(self, schema: Optional[Dict[str, Any]]) -> List[str]:
+        if not schema:
+            return []
+        if isinstance(schema.get("properties"), dict):
+            schema = schema["properties"]
+        return [k for k in schema.keys() if not k.startswith("$") and k not in ("type", "items", "required")]
+
+    def _field_present(self, doc, body_text: str, field: str) -> bool:
+        """A field counts as present if any of its name parts shows up in attributes or text."""
+        parts = re.findall(r"[a-z0-9]{3,}", field.lower())
+        if not parts:
+            return True
+        lowered_text = body_text.lower()
+        for part in parts:
+            if part in lowered_text:
+                return True
+            xpath = (
+                f"//*[contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{part}')"
+                f" or contains(translate(@id, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{part}')"
+                f" or contains(@itemprop, '{part}')]"
+            )
+            if doc.xpath(xpath):
+                return True
+        return False
@@ -0,0 +1,404 @@
+"""
+Site-wide crawl frontier.
+
+A bridge with `crawl_config` covers a whole site instead of one target page:
+    {
+        "sitemaps": ["https://shop.com/sitemap.xml"] | "auto",  # .xml / .xml.gz, nested indexes followed
+        "urls": ["https://shop.com/p/1", ...],
+        "link_patterns": ["/p/\\d+$"],       # same-site links on crawled pages matching these are enqueued
+        "include": [...], "exclude": [...],  # regex filters applied to every URL
+        "max_depth": 2,                      # link hops from a seed
+        "max_urls": 100000
+    }
+"auto" reads the Sitemap: lines of robots.txt, falling back to /sitemap.xml.
+
+The frontier lives in Redis per bridge: a sorted set of queued URLs by priority, a set of
+every URL ever enqueued (so nothing is fetched twice), and a hash of URLs handed to a
+worker but not yet completed. That state is the checkpoint: a crawl resumed after a
+worker restart requeues the unfinished in-flight URLs and carries on.
+"""
+import asyncio
+import gzip
+import hashlib
+import logging
+import re
+import time
+import urllib.robotparser
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from app.core.config import settings
+from app.core.http_clients import PURPOSE_PROBE, get_http_client
+from app.core.redis import get_redis
+from app.services.permissions import PermissionService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRIORITY = 0.5
+SEED_PRIORITY = 1.0
+# Links found deeper in the site are crawled after shallower ones of equal priority
+DEPTH_PENALTY = 0.05
+
+TRACKING_PARAMS = re.compile(r"^(?:utm_\w+|gclid|fbclid|mc_cid|mc_eid|ref|_ga)$", re.I)
+
+# Mark URLs seen and queue the new ones. ARGV: max_urls, then (hash, score, url, depth) groups
+ADD_SCRIPT = """
+local seen = redis.call('SCARD', KEYS[1])
+local max_urls = tonumber(ARGV[1])
+local added = 0
+for i = 2, #ARGV, 4 do
+    if seen >= max_urls then break end
+    if redis.call('SADD', KEYS[1], ARGV[i]) == 1 then
+        redis.call('ZADD', KEYS[2], ARGV[i + 1], ARGV[i + 2])
+        if ARGV[i + 3] ~= '0' then
+            redis.call('HSET', KEYS[3], ARGV[i + 2], ARGV[i + 3])
+        end
+        seen = seen + 1
+        added = added + 1
+    end
+end
+redis.call('HINCRBY', KEYS[4], 'enqueued', added)
+return added
+"""
+
+# Pop the highest-priority URLs and record them as in flight. ARGV: count, now
+POP_SCRIPT = """
+local popped = redis.call('ZPOPMAX', KEYS[1], ARGV[1])
+local urls = {}
+for i = 1, #popped, 2 do
+    redis.call('HSET', KEYS[2], popped[i], ARGV[2] .. '|' .. popped[i + 1])
+    table.insert(urls, popped[i])
+    table.insert(urls, popped[i + 1])
+end
+return urls
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """
+    Canonical form used for dedupe: lowercase scheme and host, no default port, no
+    fragment, no tracking parameters, sorted query. Returns None for non-HTTP URLs.
+    """
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return None
+    scheme = parsed.scheme.lower()
+    if scheme not in ("http", "https") or not parsed.hostname:
+        return None
+    netloc = parsed.hostname.lower()
+    if parsed.port and parsed.port != (443 if scheme == "https" else 80):
+        netloc += f":{parsed.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k))
+    return urlunparse((scheme, netloc, parsed.path or "/", "", urlencode(query), ""))
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+
+def _local(tag: Any) -> str:
+    """Tag name without its XML namespace."""
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def parse_sitemap(content: bytes) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Parse a sitemap or sitemap index (gzipped or not).
+    Returns (url entries with loc/priority/lastmod, nested sitemap URLs).
+    """
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    parser = etree.XMLParser(recover=True, resolve_entities=False, no_network=True, huge_tree=True)
+    root = etree.fromstring(content, parser=parser)
+    if root is None:
+        return [], []
+
+    entries, sitemaps = [], []
+    for node in root:
+        kind = _local(node.tag)
+        if kind not in ("url", "sitemap"):
+            continue
+        fields = {_local(child.tag): (child.text or "").strip() for child in node}
+        loc = fields.get("loc")
+        if not loc:
+            continue
+        if kind == "sitemap":
+            sitemaps.append(loc)
+            continue
+        try:
+            priority = float(fields.get("priority") or DEFAULT_PRIORITY)
+        except ValueError:
+            priority = DEFAULT_PRIORITY
+        entries.append({"loc": loc, "priority": priority, "lastmod": fields.get("lastmod")})
+    return entries, sitemaps
+
+
+def extract_links(html: str, base_url: str, patterns: Iterable[str]) -> List[str]:
+    """Same-site links on a page whose URL matches one of `patterns`."""
+    compiled = [re.compile(p) for p in patterns]
+    if not compiled or not html:
+        return []
+    try:
+        doc = lxml_html.fromstring(html)
+    except ValueError:
+        doc = lxml_html.fromstring(html.encode("utf-8"))
+    except Exception:
+        return []
+
+    host = urlparse(base_url).hostname
+    links = []
+    for el in doc.iter("a"):
+        href = el.get("href")
+        if not href or href.startswith(("#", "javascript:", "mailto:", "tel:")):
+            continue
+        url = urljoin(base_url, href)
+        if urlparse(url).hostname != host:
+            continue
+        if any(p.search(url) for p in compiled):
+            links.append(url)
+    return links
+
+
+class CrawlFrontier:
+    """Redis-backed, deduplicated, prioritized URL frontier for one bridge."""
+
+    def __init__(self, bridge_id: str, config: Optional[Dict[str, Any]] = None):
+        self.bridge_id = str(bridge_id)
+        self.config = config or {}
+        prefix = f"bridge:frontier:{self.bridge_id}"
+        self.queue_key = f"{prefix}:queue"
+        self.seen_key = f"{prefix}:seen"
+        self.depth_key = f"{prefix}:depth"
+        self.inflight_key = f"{prefix}:inflight"
+        self.meta_key = f"{prefix}:meta"
+        self.lock_key = f"{prefix}:lock"
+        self.max_urls = self.config.get("max_urls") or settings.frontier_max_urls
+        self._include = [re.compile(p) for p in self.config.get("include") or []]
+        self._exclude = [re.compile(p) for p in self.config.get("exclude") or []]
+        self._robots: Optional[urllib.robotparser.RobotFileParser] = None
+        self._user_agent = PermissionService().user_agent
+        self._lock_token: Optional[str] = None
+
+    def set_robots(self, robots_txt: Optional[str]):
+        """Skip URLs the site's robots.txt disallows."""
+        if robots_txt:
+            self._robots = urllib.robotparser.RobotFileParser()
+            self._robots.parse(robots_txt.splitlines())
+
+    def allowed(self, url: str) -> bool:
+        if self._include and not any(p.search(url) for p in self._include):
+            return False
+        if any(p.search(url) for p in self._exclude):
+            return False
+        if self._robots and not self._robots.can_fetch(self._user_agent, url):
+            return False
+        return True
+
+    def _keys(self) -> List[str]:
+        return [self.queue_key, self.seen_key, self.depth_key, self.inflight_key, self.meta_key]
+
+    async def add(self, urls: Iterable[Tuple[str, float]], depth: int = 0) -> int:
+        """Queue (url, priority) pairs that were never seen before. Returns how many were added."""
+        args: List[Any] = []
+        batch = set()
+        for url, priority in urls:
+            url = normalize_url(url)
+            if not url or url in batch or not self.allowed(url):
+                continue
+            batch.add(url)
+            args.extend([url_key(url), priority - depth * DEPTH_PENALTY, url, depth])
+        if not args:
+            return 0
+
+        redis = await get_redis()
+        added = 0
+        # Chunked so a 50k-URL sitemap doesn't become one huge script call
+        chunk = 4 * 1000
+        for start in range(0, len(args), chunk):
+            added += await redis.eval(
+                ADD_SCRIPT, 4, self.seen_key, self.queue_key, self.depth_key, self.meta_key,
+                self.max_urls, *args[start:start + chunk]
+            )
+        return added
+
+    async def pop(self, count: int) -> List[Tuple[str, int]]:
+        """Take up to `count` URLs, highest priority first, as (url, depth)."""
+        redis = await get_redis()
+        popped = await redis.eval(POP_SCRIPT, 2, self.queue_key, self.inflight_key, count, int(time.time()))
+        urls = popped[0::2]
+        if not urls:
+            return []
+        depths = await redis.hmget(self.depth_key, urls)
+        return [(url, int(depth or 0)) for url, depth in zip(urls, depths)]
+
+    async def complete(self, urls: List[str], failed: int = 0):
+        """Checkpoint a finished batch: it leaves the in-flight set and is never fetched again."""
+        if not urls:
+            return
+        redis = await get_redis()
+        pipe = redis.pipeline()
+        pipe.hdel(self.inflight_key, *urls)
+        pipe.hdel(self.depth_key, *urls)
+        pipe.hincrby(self.meta_key, "done", len(urls) - failed)
+        if failed:
+            pipe.hincrby(self.meta_key, "failed", failed)
+        pipe.hset(self.meta_key, "checkpoint_at", int(time.time()))
+        for key in self._keys():
+            pipe.expire(key, settings.frontier_ttl_seconds)
+        await pipe.execute()
+
+    async def requeue_inflight(self) -> int:
+        """Put URLs left in flight by a stopped or crashed run back on the queue."""
+        redis = await get_redis()
+        inflight = await redis.hgetall(self.inflight_key)
+        if not inflight:
+            return 0
+        pipe = redis.pipeline()
+        for url, lease in inflight.items():
+            score = float(lease.split("|", 1)[1]) if "|" in lease else DEFAULT_PRIORITY
+            pipe.zadd(self.queue_key, {url: score})
+        pipe.delete(self.inflight_key)
+        await pipe.execute()
+        logger.info(f"Requeued {len(inflight)} in-flight URLs for bridge {self.bridge_id}")
+        return len(inflight)
+
+    async def is_seeded(self) -> bool:
+        redis = await get_redis()
+        return bool(await redis.hget(self.meta_key, "seeded_at"))
+
+    async def seed(self, origin_url: str) -> int:
+        """Load the configured seeds: URL list, then sitemaps. Returns the number queued."""
+        added = await self.add(((url, SEED_PRIORITY) for url in self.config.get("urls") or []))
+
+        sitemaps = self.config.get("sitemaps")
+        if sitemaps == "auto":
+            sitemaps = await self._sitemaps_from_robots(origin_url)
+        if sitemaps:
+            added += await self.ingest_sitemaps(sitemaps)
+
+        if not self.config.get("urls") and not sitemaps:
+            # Link-following crawls start from the bridge's own page
+            added += await self.add([(origin_url, SEED_PRIORITY)])
+
+        redis = await get_redis()
+        await redis.hset(self.meta_key, mapping={"seeded_at": int(time.time()), "state": "running"})
+        logger.info(f"Seeded crawl frontier for bridge {self.bridge_id} with {added} URLs")
+        return added
+
+    async def ingest_sitemaps(self, sitemap_urls: List[str]) -> int:
+        """Walk sitemaps and nested sitemap indexes breadth-first, queueing their URLs."""
+        pending = list(sitemap_urls)
+        visited = set()
+        added = 0
+        while pending and len(visited) < settings.sitemap_max_files:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+
+            content = await self._fetch_sitemap(sitemap_url)
+            if content is None:
+                continue
+            try:
+                entries, nested = await asyncio.to_thread(parse_sitemap, content)
+            except Exception as e:
+                logger.warning(f"Could not parse sitemap {sitemap_url}: {e}")
+                continue
+            pending.extend(nested)
+            added += await self.add((entry["loc"], entry["priority"]) for entry in entries)
+        return added
+
+    async def _fetch_sitemap(self, url: str) -> Optional[bytes]:
+        client = get_http_client(PURPOSE_PROBE)
+        try:
+            async with client.stream("GET", url, timeout=settings.sitemap_fetch_timeout_seconds) as resp:
+                if resp.status_code != 200:
+                    logger.info(f"Sitemap {url} returned status {resp.status_code}")
+                    return None
+                chunks, size = [], 0
+                async for chunk in resp.aiter_bytes():
+                    size += len(chunk)
+                    if size > settings.sitemap_max_bytes:
+                        logger.warning(f"Sitemap {url} exceeds {settings.sitemap_max_bytes} bytes, skipping")
+                        return None
+                    chunks.append(chunk)
+                return b"".join(chunks)
+        except Exception as e:
+            logger.warning(f"Failed to fetch sitemap {url}: {e}")
+            return None
+
+    async def _sitemaps_from_robots(self, origin_url: str) -> List[str]:
+        parsed = urlparse(origin_url)
+        root = f"{parsed.scheme}://{parsed.netloc}"
+        try:
+            resp = await get_http_client(PURPOSE_PROBE).get(f"{root}/robots.txt")
+            if resp.status_code == 200:
+                found = re.findall(r"(?im)^\s*sitemap:\s*(\S+)", resp.text)
+                if found:
+                    return found
+        except Exception as e:
+            logger.info(f"Could not read robots.txt sitemaps for {root}: {e}")
+        return [f"{root}/sitemap.xml"]
+
+    async def acquire(self) -> bool:
+        """Claim the frontier for one run at a time. The claim expires if the worker dies."""
+        redis = await get_redis()
+        token = uuid.uuid4().hex
+        if await redis.set(self.lock_key, token, nx=True, ex=settings.frontier_lease_seconds):
+            self._lock_token = token
+            return True
+        return False
+
+    async def refresh(self):
+        if self._lock_token:
+            redis = await get_redis()
+            await redis.expire(self.lock_key, settings.frontier_lease_seconds)
+
+    async def release(self):
+        if self._lock_token:
+            redis = await get_redis()
+            await redis.eval(RELEASE_SCRIPT, 1, self.lock_key, self._lock_token)
+            self._lock_token = None
+
+    async def set_state(self, state: str):
+        redis = await get_redis()
+        await redis.hset(self.meta_key, "state", state)
+
+    async def stats(self) -> Dict[str, Any]:
+        redis = await get_redis()
+        pipe = redis.pipeline()
+        pipe.zcard(self.queue_key)
+        pipe.scard(self.seen_key)
+        pipe.hlen(self.inflight_key)
+        pipe.hgetall(self.meta_key)
+        pipe.exists(self.lock_key)
+        queued, seen, inflight, meta, locked = await pipe.execute()
+        return {
+            "state": meta.get("state", "idle"),
+            "running": bool(locked),
+            "queued": queued,
+            "in_flight": inflight,
+            "seen": seen,
+            "done": int(meta.get("done", 0)),
+            "failed": int(meta.get("failed", 0)),
+            "seeded_at": int(meta["seeded_at"]) if meta.get("seeded_at") else None,
+            "checkpoint_at": int(meta["checkpoint_at"]) if meta.get("checkpoint_at") else None,
+        }
+
+    async def reset(self):
+        """Forget the frontier entirely (the next crawl reseeds)."""
+        redis = await get_redis()
+        await redis.delete(*self._keys())
+
@@ -1,109 +1,111 @@
 
 import logging
+from datetime import datetime
 from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
 from playwright.async_api import Page
-import asyncio
+
+from app.services.interaction_plan import PlanExecutor, compile_script
 
 logger = logging.getLogger(__name__)
 
 class InteractionService:
-    async def perform_interaction(self, page: Page, script: List[Dict[str, Any]]):
+    async def perform_interaction(self, page: Page, script: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Executes a sequence of actions on the page.
         Script Format: [ {"action": "click", "selector": "#btn"}, {"action": "wait", "ms": 2000} ]
+        The script is compiled into a plan that waits on page conditions instead of fixed
+        delays (see app.services.interaction_plan). Returns the per-step timing report.
+        Raises InteractionError at the first failing step that isn't marked optional.
         """
         if not script:
-            return
-
-        logger.info(f"Executing interaction script with {len(script)} steps")
-        
-        for step in script:
-            action = step.get("action")
-            selector = step.get("selector")
-            
-            try:
-                if action == "click":
-                    logger.info(f"Clicking: {selector}")
-                    await page.click(selector, timeout=5000)
-                
-                elif action == "type":
-                    text = step.get("text", "")
-                    logger.info(f"Typing into {selector}")
-                    await page.fill(selector, text, timeout=5000)
-                
-                elif action == "scroll_bottom":
-                    logger.info("Scrolling to bottom")
-                    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                
-                elif action == "wait":
-                    ms = step.get("ms", 1000)
-                    logger.info(f"Waiting {ms}ms")
-                    await page.wait_for_timeout(ms)
-                
-                elif action == "wait_for_selector":
-                    logger.info(f"Waiting for selector: {selector}")
-                    await page.wait_for_selector(selector, timeout=10000)
+            return []
 
-                elif action == "screenshot":
-                    # Debugging only
-                    logger.info("Taking debug screenshot")
-                    await page.screenshot(path="debug_interaction.png")
+        plan = compile_script(script)
+        logger.info(f"Executing interaction script with {len(script)} steps ({len(plan)} round-trips)")
+        report = await PlanExecutor(page).run(plan)
+        logger.info(f"Interaction script finished in {sum(r.get('ms', 0) for r in report if not r.get('batched')):.0f}ms")
+        return report
 
-                # Small pause between actions to be human-like
-                await page.wait_for_timeout(500)
-                
-            except Exception as e:
-                logger.error(f"Error executing step {step}: {e}")
-                # We log but continue, or should we abort?
-                # For now, continue best effort.
+    def build_storage_state(
+        self,
+        session_data: Optional[Dict[str, Any]],
+        auth_config: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Playwright storage_state for a new context: the saved session (cookies and per-origin
+        localStorage) plus any cookie-auth cookies, so nothing has to be injected or reloaded
+        after the page opens. Returns None when there is nothing to restore.
+        """
+        cookies = list((session_data or {}).get("cookies", []))
+        origins = list((session_data or {}).get("origins", []))
+        if auth_config and auth_config.get("type") == "cookie":
+            cookies.extend(auth_config.get("cookies", []))
 
-    async def inject_session_data(self, page: Page, session_data: Dict[str, Any]):
-        """Restores cookies and local storage from saved session data."""
-        if not session_data:
-            return
+        cookies = [c for c in (self._storage_cookie(c) for c in cookies) if c]
+        if not cookies and not origins:
+            return None
+        logger.info(f"Restoring {len(cookies)} cookies and storage for {len(origins)} origins")
+        return {"cookies": cookies, "origins": origins}
 
-        cookies = session_data.get("cookies", [])
-        if cookies:
-            logger.info(f"Restoring {len(cookies)} session cookies")
-            await page.context.add_cookies(cookies)
-        
-        # LocalStorage injection requires being on the domain, so we might need a dummy navigation
-        # or handle it after initial goto. For now, focusing on cookies.
+    def _storage_cookie(self, cookie: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """storage_state needs fully specified cookies; config cookies often only carry a url."""
+        domain = cookie.get("domain")
+        if not domain and cookie.get("url"):
+            domain = urlparse(cookie["url"]).hostname
+        if not cookie.get("name") or cookie.get("value") is None or not domain:
+            return None
+        return {
+            "name": cookie["name"],
+            "value": cookie["value"],
+            "domain": domain,
+            "path": cookie.get("path", "/"),
+            "expires": cookie.get("expires", -1),
+            "httpOnly": cookie.get("httpOnly", False),
+            "secure": cookie.get("secure", False),
+            "sameSite": cookie.get("sameSite", "Lax"),
+        }
 
     async def capture_session_data(self, page: Page) -> Dict[str, Any]:
-        """Captures current cookies and storage to save session state."""
-        cookies = await page.context.cookies()
-        logger.info(f"Captured {len(cookies)} session cookies")
+        """Captures the full storage state (cookies and per-origin localStorage) for next time."""
+        state = await page.context.storage_state()
+        logger.info(f"Captured {len(state.get('cookies', []))} session cookies and storage for {len(state.get('origins', []))} origins")
         
         return {
-            "cookies": cookies,
-            "timestamp": "iso-now" # TODO: Add real timestamp
+            **state,
+            "captured_at": datetime.utcnow().isoformat()
         }
 
+    async def is_logged_in(self, page: Page, auth_config: Optional[Dict[str, Any]], timeout_ms: int = 5000) -> bool:
+        """
+        Whether a restored session is still authenticated, judged by auth_config["logged_in_selector"]
+        appearing within `timeout_ms`. Without a selector the restored session is trusted.
+        """
+        selector = (auth_config or {}).get("logged_in_selector")
+        if not selector:
+            return True
+        try:
+            await page.wait_for_selector(selector, state="attached", timeout=max(1, min(timeout_ms, 5000)))
+            return True
+        except Exception:
+            return False
+
     async def perform_auth(self, page: Page, auth_config: Dict[str, Any]):
         """
         Handles authentication before extraction.
-        Config Format: { "type": "cookie", "cookies": [...] }
+        Config Format: { "type": "cookie", "cookies": [...] } or { "type": "login_flow", "steps": [...], "logged_in_selector": ... }
+        Cookie auth is applied through build_storage_state when the context is created.
         """
         if not auth_config:
             return
 
         auth_type = auth_config.get("type")
-        
-        if auth_type == "cookie":
-            cookies = auth_config.get("cookies", [])
-            logger.info(f"Injecting {len(cookies)} config cookies")
-            await page.context.add_cookies(cookies)
-            try:
-                await page.reload()
-            except:
-                pass
 
-        elif auth_type == "login_flow":
+        if auth_type == "login_flow":
             # Complex login flow defined as interaction steps
             steps = auth_config.get("steps", [])
             logger.info("Executing Login Flow")
             await self.perform_interaction(page, steps)
-            # Wait for navigation/redirect
-            await page.wait_for_load_state("networkidle")
+            # Wait for navigation/redirect (steps can add "wait_for" conditions of their own)
+            await page.wait_for_load_state("domcontentloaded")
 
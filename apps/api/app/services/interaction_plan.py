@@ -0,0 +1,290 @@
+"""
+Interaction-script compiler.
+
+Scripts used to run step by step with a fixed 500ms pause after each action, fixed
+`wait` sleeps, and errors swallowed, so a broken script still burned every timeout.
+Here a script is compiled into a plan that:
+  - waits on real conditions after each action (navigation, selector state, DOM or
+    network quiet) instead of fixed delays; a `wait` step ends as soon as the page settles,
+  - batches consecutive in-page steps (scrolls, typing into CSS-addressed fields, and
+    clicks marked "batch": true) into a single page.evaluate round-trip,
+  - stops at the first failing step (unless the step is "optional": true) and reports
+    per-step timings either way.
+
+Step options (all optional):
+    "timeout": ms for this step (default 5000)
+    "wait_for": "navigation" | "network_quiet" | "dom_quiet" | "none" | <selector>
+    "state": selector state for wait_for_selector / selector waits (default "visible")
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import Page
+
+from app.core.config import settings
+from app.services.readiness import ReadinessEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STEP_TIMEOUT_MS = 5000
+
+_ENGINE_PREFIX = re.compile(r"^[a-z][a-z0-9_-]*=", re.I)
+PLAYWRIGHT_PSEUDO_CLASSES = (":has-text(", ":text(", ":text-is(", ":visible", ":nth-match(", ":left-of(", ":right-of(", ":near(")
+
+# Condition waited on after an action when the step doesn't say
+DEFAULT_WAITS = {
+    "click": "dom_quiet",
+    "scroll_bottom": "dom_quiet",
+    "type": "none",
+    "wait_for_selector": "none",
+    "wait": "dom_quiet",
+    "screenshot": "none",
+}
+
+BATCH_SCRIPT = """
+(steps) => {
+    const results = [];
+    for (const step of steps) {
+        const started = performance.now();
+        try {
+            if (step.action === 'scroll_bottom') {
+                window.scrollTo(0, document.body.scrollHeight);
+            } else {
+                const el = document.querySelector(step.selector);
+                if (!el) throw new Error(`No element matches ${step.selector}`);
+                if (step.action === 'click') {
+                    el.click();
+                } else if (step.action === 'type') {
+                    el.focus();
+                    if (el.isContentEditable) {
+                        el.textContent = step.text;
+                    } else {
+                        // Native setter so framework-controlled inputs see the change
+                        const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+                        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, step.text);
+                    }
+                    el.dispatchEvent(new Event('input', {bubbles: true}));
+                    el.dispatchEvent(new Event('change', {bubbles: true}));
+                }
+            }
+        } catch (e) {
+            return {results, error: {index: step.index, message: String(e && e.message || e)}};
+        }
+        results.push({index: step.index, ms: Math.round((performance.now() - started) * 100) / 100});
+    }
+    return {results, error: null};
+}
+"""
+
+
+class InteractionError(Exception):
+    """A required interaction step failed. Carries the timing report up to the failure."""
+
+    def __init__(self, index: int, action: str, message: str, report: List[Dict[str, Any]]):
+        super().__init__(f"Interaction step {index} ({action}) failed: {message}")
+        self.index = index
+        self.action = action
+        self.report = report
+
+
+def is_css_selector(selector: Optional[str]) -> bool:
+    """Playwright-only selectors (text=..., xpath, >> chains, :has-text) can't run in document.querySelector."""
+    if not selector:
+        return False
+    if _ENGINE_PREFIX.match(selector) or selector.startswith(("/", "(")) or ">>" in selector:
+        return False
+    return not any(pseudo in selector for pseudo in PLAYWRIGHT_PSEUDO_CLASSES)
+
+
+def _batchable(step: Dict[str, Any]) -> bool:
+    action = step.get("action")
+    if step.get("wait_for") not in (None, "none"):
+        return False
+    if action == "scroll_bottom":
+        return True
+    if action == "type":
+        return is_css_selector(step.get("selector"))
+    if action == "click":
+        # Clicks may navigate: only batch when the script author says it's safe
+        return bool(step.get("batch")) and is_css_selector(step.get("selector"))
+    return False
+
+
+def compile_script(script: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Turn a script into an execution plan of
+        {"kind": "batch", "steps": [...], "wait_for": ...}  (one page.evaluate)
+        {"kind": "step", "step": {...}, "wait_for": ...}
+    Each step keeps its original position as "index".
+    """
+    plan: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+
+    def flush():
+        if not batch:
+            return
+        if len(batch) == 1:
+            step = batch[0]
+            plan.append({"kind": "step", "step": step, "wait_for": _wait_for(step)})
+        else:
+            # One settle for the whole batch, using the strongest condition its steps asked for
+            waits = [_wait_for(s) for s in batch]
+            plan.append({"kind": "batch", "steps": list(batch), "wait_for": "dom_quiet" if "dom_quiet" in waits else "none"})
+        batch.clear()
+
+    for index, raw in enumerate(script):
+        step = {**raw, "index": index}
+        if _batchable(step) and not step.get("optional"):
+            batch.append(step)
+            continue
+        flush()
+        plan.append({"kind": "step", "step": step, "wait_for": _wait_for(step)})
+    flush()
+    return plan
+
+
+def _wait_for(step: Dict[str, Any]) -> str:
+    return step.get("wait_for") or DEFAULT_WAITS.get(step.get("action"), "none")
+
+
+class PlanExecutor:
+    """Runs a compiled plan on a page and records per-step timings."""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.report: List[Dict[str, Any]] = []
+        self._inflight = 0
+        self._last_network_activity = time.monotonic()
+
+    async def run(self, plan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+        try:
+            for entry in plan:
+                if entry["kind"] == "batch":
+                    await self._run_batch(entry)
+                else:
+                    await self._run_step(entry)
+        finally:
+            self.page.remove_listener("request", self._on_request)
+            self.page.remove_listener("requestfinished", self._on_request_done)
+            self.page.remove_listener("requestfailed", self._on_request_done)
+        return self.report
+
+    async def _run_batch(self, entry: Dict[str, Any]):
+        steps = entry["steps"]
+        started = time.monotonic()
+        payload = [
+            {"index": s["index"], "action": s["action"], "selector": s.get("selector"), "text": s.get("text", "")}
+            for s in steps
+        ]
+        outcome = await self.page.evaluate(BATCH_SCRIPT, payload)
+        by_index = {s["index"]: s for s in steps}
+        for result in outcome["results"]:
+            self.report.append({
+                "index": result["index"],
+                "action": by_index[result["index"]]["action"],
+                "ms": result["ms"],
+                "batched": True,
+                "status": "ok",
+            })
+
+        error = outcome.get("error")
+        if error:
+            step = by_index[error["index"]]
+            self.report.append({"index": step["index"], "action": step["action"], "batched": True, "status": "error", "error": error["message"]})
+            raise InteractionError(step["index"], step["action"], error["message"], self.report)
+
+        condition = await self._settle(entry["wait_for"], steps[-1])
+        self.report.append({
+            "index": [s["index"] for s in steps],
+            "action": "batch",
+            "ms": round((time.monotonic() - started) * 1000, 2),
+            "condition": condition,
+            "status": "ok",
+        })
+
+    async def _run_step(self, entry: Dict[str, Any]):
+        step = entry["step"]
+        action = step.get("action")
+        started = time.monotonic()
+        record: Dict[str, Any] = {"index": step["index"], "action": action}
+        try:
+            await self._perform(step)
+            record["condition"] = await self._settle(entry["wait_for"], step)
+            record["status"] = "ok"
+        except Exception as e:
+            record.update({"status": "skipped" if step.get("optional") else "error", "error": str(e).splitlines()[0]})
+            if not step.get("optional"):
+                record["ms"] = round((time.monotonic() - started) * 1000, 2)
+                self.report.append(record)
+                raise InteractionError(step["index"], action, record["error"], self.report) from e
+            logger.info(f"Optional step {step['index']} ({action}) skipped: {record['error']}")
+        record["ms"] = round((time.monotonic() - started) * 1000, 2)
+        self.report.append(record)
+
+    async def _perform(self, step: Dict[str, Any]):
+        action = step.get("action")
+        selector = step.get("selector")
+        timeout = step.get("timeout", DEFAULT_STEP_TIMEOUT_MS)
+
+        if action == "click":
+            logger.info(f"Clicking: {selector}")
+            await self.page.click(selector, timeout=timeout)
+        elif action == "type":
+            logger.info(f"Typing into {selector}")
+            await self.page.fill(selector, step.get("text", ""), timeout=timeout)
+        elif action == "scroll_bottom":
+            await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        elif action == "wait_for_selector":
+            logger.info(f"Waiting for selector: {selector}")
+            await self.page.wait_for_selector(selector, state=step.get("state", "visible"), timeout=step.get("timeout", 10000))
+        elif action == "wait":
+            # Settling happens in _settle, bounded by the requested duration
+            pass
+        elif action == "screenshot":
+            # Debugging only
+            await self.page.screenshot(path="debug_interaction.png")
+        else:
+            raise ValueError(f"Unknown action '{action}'")
+
+    async def _settle(self, wait_for: str, step: Dict[str, Any]) -> str:
+        """Wait for the step's condition. Returns the condition that ended the wait."""
+        # A `wait` step's ms is now an upper bound rather than a fixed sleep
+        budget = step.get("ms", 1000) if step.get("action") == "wait" else step.get("timeout", DEFAULT_STEP_TIMEOUT_MS)
+
+        if wait_for == "none":
+            return "none"
+        if wait_for == "navigation":
+            await self.page.wait_for_load_state("domcontentloaded", timeout=budget)
+            return "navigation"
+        if wait_for == "network_quiet":
+            return await self._network_quiet(budget)
+        if wait_for == "dom_quiet":
+            result = await ReadinessEngine(budget_ms=budget).wait(self.page)
+            return result["condition"]
+        # Anything else is a selector to wait for
+        await self.page.wait_for_selector(wait_for, state=step.get("state", "visible"), timeout=budget)
+        return "selector"
+
+    async def _network_quiet(self, budget_ms: int) -> str:
+        """No requests in flight for readiness_quiet_ms, or the budget runs out."""
+        quiet = settings.readiness_quiet_ms / 1000
+        deadline = time.monotonic() + budget_ms / 1000
+        while time.monotonic() < deadline:
+            if self._inflight <= 0 and time.monotonic() - self._last_network_activity >= quiet:
+                return "network_quiet"
+            await asyncio.sleep(0.05)
+        return "budget"
+
+    def _on_request(self, _request):
+        self._inflight += 1
+        self._last_network_activity = time.monotonic()
+
+    def _on_request_done(self, _request):
+        self._inflight = max(0, self._inflight - 1)
+        self._last_network_activity = time.monotonic()
@@ -0,0 +1,36 @@
+"""
+Per-provider concurrency caps for LLM calls.
+
+Chunked extraction fans out one call per chunk; without a cap a large page (or several
+bridges at once) would burst past a provider's rate limit, and a local Ollama would
+queue everything anyway. Semaphores are per event loop, like the shared HTTP clients.
+"""
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+from app.core.config import settings
+from app.services.llm.base import LLMProvider
+
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def provider_concurrency(name: str) -> int:
+    """The cap for a provider: llm_provider_concurrency override ("ollama=1,openai=8") or the default."""
+    for entry in settings.llm_provider_concurrency.split(","):
+        provider, _, limit = entry.partition("=")
+        if provider.strip() == name and limit.strip().isdigit():
+            return max(1, int(limit))
+    return max(1, settings.llm_max_concurrency_per_provider)
+
+
+@asynccontextmanager
+async def provider_slot(provider: LLMProvider) -> AsyncIterator[None]:
+    """Hold one of the provider's concurrent-call slots for the duration of a call."""
+    name = provider.get_provider_name()
+    loop_semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if name not in loop_semaphores:
+        loop_semaphores[name] = asyncio.Semaphore(provider_concurrency(name))
+    async with loop_semaphores[name]:
+        yield
@@ -31,7 +31,7 @@ class AnthropicProvider(LLMProvider):
         if not ANTHROPIC_AVAILABLE:
             raise ImportError("anthropic package not installed. Run: poetry add anthropic")
         super().__init__(api_key, model)
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = anthropic.AsyncAnthropic(api_key=api_key)
     
     async def complete(
         self,
@@ -62,7 +62,7 @@ class AnthropicProvider(LLMProvider):
             if system_msg:
                 kwargs["system"] = system_msg
             
-            response = self.client.messages.create(**kwargs)
+            response = await self.client.messages.create(**kwargs)
             return response.content[0].text
             
         except Exception as e:
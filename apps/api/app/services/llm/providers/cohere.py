@@ -28,7 +28,7 @@ class CohereProvider(LLMProvider):
         if not COHERE_AVAILABLE:
             raise ImportError("cohere package not installed. Run: poetry add cohere")
         super().__init__(api_key, model)
-        self.client = cohere.ClientV2(api_key=api_key)
+        self.client = cohere.AsyncClientV2(api_key=api_key)
     
     async def complete(
         self,
@@ -52,7 +52,7 @@ class CohereProvider(LLMProvider):
             if response_format == "json" and messages:
                 messages[-1]["content"] += "\n\nRespond with valid JSON only."
             
-            response = self.client.chat(**kwargs)
+            response = await self.client.chat(**kwargs)
             return response.message.content[0].text
             
         except Exception as e:
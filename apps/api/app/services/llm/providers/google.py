@@ -58,7 +58,7 @@ class GoogleProvider(LLMProvider):
             if max_tokens:
                 generation_config["max_output_tokens"] = max_tokens
             
-            response = self.model_instance.generate_content(
+            response = await self.model_instance.generate_content_async(
                 prompt,
                 generation_config=generation_config
             )
@@ -9,7 +9,7 @@ from app.services.llm.base import LLMProvider
 logger = logging.getLogger(__name__)
 
 try:
-    from groq import Groq
+    from groq import AsyncGroq
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
@@ -29,7 +29,7 @@ class GroqProvider(LLMProvider):
         if not GROQ_AVAILABLE:
             raise ImportError("groq package not installed. Run: poetry add groq")
         super().__init__(api_key, model)
-        self.client = Groq(api_key=api_key)
+        self.client = AsyncGroq(api_key=api_key)
     
     async def complete(
         self,
@@ -52,7 +52,7 @@ class GroqProvider(LLMProvider):
             if response_format == "json":
                 kwargs["response_format"] = {"type": "json_object"}
             
-            response = self.client.chat.completions.create(**kwargs)
+            response = await self.client.chat.completions.create(**kwargs)
             return response.choices[0].message.content
             
         except Exception as e:
@@ -52,7 +52,7 @@ class MistralProvider(LLMProvider):
             if response_format == "json":
                 kwargs["response_format"] = {"type": "json_object"}
             
-            response = self.client.chat.complete(**kwargs)
+            response = await self.client.chat.complete_async(**kwargs)
             return response.choices[0].message.content
             
         except Exception as e:
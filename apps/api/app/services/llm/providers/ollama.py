@@ -4,16 +4,11 @@ Supports self-hosted LLMs like Llama3, Mistral, Qwen, etc.
 """
 import logging
 from typing import Dict, Any, List, Optional
+from app.core.http_clients import PURPOSE_LLM, get_http_client
 from app.services.llm.base import LLMProvider
 
 logger = logging.getLogger(__name__)
 
-try:
-    import httpx
-    HTTPX_AVAILABLE = True
-except ImportError:
-    HTTPX_AVAILABLE = False
-
 
 class OllamaProvider(LLMProvider):
     """Ollama local model provider"""
@@ -28,8 +23,6 @@ class OllamaProvider(LLMProvider):
     ]
     
     def __init__(self, api_key: str = "ollama", model: str = "llama3.3", base_url: str = "http://localhost:11434"):
-        if not HTTPX_AVAILABLE:
-            raise ImportError("httpx package required for Ollama")
         # Ollama doesn't use API keys, but we keep the interface consistent
         super().__init__(api_key, model)
         self.base_url = base_url
@@ -59,15 +52,14 @@ class OllamaProvider(LLMProvider):
             if response_format == "json" and messages:
                 messages[-1]["content"] += "\n\nRespond with valid JSON only."
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/api/chat",
-                    json=payload,
-                    timeout=60.0
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result["message"]["content"]
+            response = await get_http_client(PURPOSE_LLM).post(
+                f"{self.base_url}/api/chat",
+                json=payload,
+                timeout=60.0
+            )
+            response.raise_for_status()
+            result = response.json()
+            return result["message"]["content"]
             
         except Exception as e:
             logger.error(f"Ollama API error: {e}")
@@ -24,7 +24,7 @@ class OpenAIProvider(LLMProvider):
     
     def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
         super().__init__(api_key, model)
-        self.client = openai.OpenAI(api_key=api_key)
+        self.client = openai.AsyncOpenAI(api_key=api_key)
     
     async def complete(
         self,
@@ -47,7 +47,7 @@ class OpenAIProvider(LLMProvider):
             if response_format == "json":
                 kwargs["response_format"] = {"type": "json_object"}
             
-            response = self.client.chat.completions.create(**kwargs)
+            response = await self.client.chat.completions.create(**kwargs)
             return response.choices[0].message.content
             
         except Exception as e:
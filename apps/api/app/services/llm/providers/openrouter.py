@@ -31,7 +31,7 @@ class OpenRouterProvider(LLMProvider):
             raise ImportError("openai package required for OpenRouter")
         super().__init__(api_key, model)
         # OpenRouter uses OpenAI-compatible API
-        self.client = openai.OpenAI(
+        self.client = openai.AsyncOpenAI(
             api_key=api_key,
             base_url="https://openrouter.ai/api/v1"
         )
@@ -62,7 +62,7 @@ class OpenRouterProvider(LLMProvider):
                 else:
                     messages.insert(0, {"role": "system", "content": "Respond with valid JSON only."})
             
-            response = self.client.chat.completions.create(**kwargs)
+            response = await self.client.chat.completions.create(**kwargs)
             return response.choices[0].message.content
             
         except Exception as e:
@@ -0,0 +1,208 @@
+"""
+Network-response sniffing.
+
+Many sites render from JSON APIs that the browser already downloads during navigation.
+While a page renders we capture fetch/XHR JSON responses and index them per bridge by
+URL pattern. A bridge bound to one of those endpoints via Bridge.json_source:
+    { "url_pattern": "api.site.com/v1/products?page&sort", "json_path": "data.items[*]" }
+reads the structured payload directly instead of sending rendered HTML to the LLM.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlparse
+
+from playwright.async_api import Page, Response
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_RESOURCE_TYPES = {"fetch", "xhr"}
+
+_ID_SEGMENT = re.compile(r"^(?:\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{16,})$", re.I)
+_PATH_TOKEN = re.compile(r"([^.\[\]]+)|\[(\*|-?\d+)\]")
+
+
+def url_pattern(url: str) -> str:
+    """
+    Stable pattern for an endpoint URL: id-like path segments become {id} and
+    query values are dropped, e.g. api.site.com/v1/items/{id}?page&sort
+    """
+    parsed = urlparse(url)
+    segments = ["{id}" if _ID_SEGMENT.match(s) else s for s in parsed.path.split("/")]
+    pattern = parsed.netloc.lower() + "/".join(segments)
+    keys = sorted({k for k, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    if keys:
+        pattern += "?" + "&".join(keys)
+    return pattern
+
+
+def resolve_json_path(payload: Any, path: Optional[str]) -> Any:
+    """
+    Resolve a dotted JSON path such as "data.items[*].name" or "$.results[0]".
+    `[*]` maps the rest of the path over a list. Missing keys resolve to None.
+    """
+    if not path or path == "$":
+        return payload
+    if path.startswith("$"):
+        path = path[1:].lstrip(".")
+
+    tokens = [name if name else index for name, index in _PATH_TOKEN.findall(path)]
+    return _resolve(payload, tokens, 0)
+
+
+def _resolve(value: Any, tokens: List[str], position: int) -> Any:
+    for i in range(position, len(tokens)):
+        token = tokens[i]
+        if value is None:
+            return None
+        if token == "*":
+            if not isinstance(value, list):
+                return None
+            return [_resolve(item, tokens, i + 1) for item in value]
+        if isinstance(value, list):
+            try:
+                value = value[int(token)]
+            except (ValueError, IndexError):
+                return None
+        elif isinstance(value, dict):
+            value = value.get(token)
+        else:
+            return None
+    return value
+
+
+def describe_shape(payload: Any, depth: int = 2) -> Any:
+    """Small structural summary of a payload (keys and list lengths) for the endpoint index."""
+    if isinstance(payload, dict):
+        if depth <= 0:
+            return "object"
+        return {k: describe_shape(v, depth - 1) for k, v in list(payload.items())[:20]}
+    if isinstance(payload, list):
+        if depth <= 0 or not payload:
+            return f"array[{len(payload)}]"
+        return [f"array[{len(payload)}]", describe_shape(payload[0], depth - 1)]
+    return type(payload).__name__
+
+
+class NetworkCapture:
+    """Collects JSON fetch/XHR responses from a page while it renders."""
+
+    def __init__(self, json_source: Optional[Dict[str, Any]] = None, max_bytes: Optional[int] = None):
+        self.bound_pattern = (json_source or {}).get("url_pattern")
+        self.max_bytes = max_bytes or settings.json_capture_max_bytes
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+        self.payload: Any = None
+        self.skipped_oversize = 0
+        self._bound = asyncio.Event()
+        self._pending: List[asyncio.Task] = []
+
+    def attach(self, page: Page):
+        page.on("response", self._on_response)
+
+    def _on_response(self, response: Response):
+        if response.request.resource_type not in CAPTURE_RESOURCE_TYPES:
+            return
+        if "json" not in response.headers.get("content-type", ""):
+            return
+        if len(self.endpoints) >= settings.json_capture_max_responses and not self.bound_pattern:
+            return
+        self._pending.append(asyncio.create_task(self._capture(response)))
+
+    async def _capture(self, response: Response):
+        pattern = url_pattern(response.url)
+        is_bound = pattern == self.bound_pattern
+
+        # Cap by the declared size before buffering the body
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            self._oversize(pattern, response.url, int(declared))
+            return
+
+        try:
+            body = await response.body()
+        except Exception as e:
+            logger.debug(f"Could not read response body for {response.url}: {e}")
+            return
+        if len(body) > self.max_bytes:
+            self._oversize(pattern, response.url, len(body))
+            return
+
+        try:
+            payload = await asyncio.to_thread(json.loads, body)
+        except ValueError:
+            return
+
+        self.endpoints[pattern] = {
+            "url_pattern": pattern,
+            "sample_url": response.url,
+            "method": response.request.method,
+            "status": response.status,
+            "size_bytes": len(body),
+            "shape": describe_shape(payload),
+            "last_seen": int(time.time()),
+        }
+        if is_bound and not self._bound.is_set():
+            self.payload = payload
+            self._bound.set()
+
+    def _oversize(self, pattern: str, url: str, size: int):
+        self.skipped_oversize += 1
+        logger.info(f"Skipping JSON response over {self.max_bytes} bytes from {url} ({size} bytes)")
+        self.endpoints[pattern] = {
+            "url_pattern": pattern,
+            "sample_url": url,
+            "size_bytes": size,
+            "oversize": True,
+            "last_seen": int(time.time()),
+        }
+
+    async def wait_for_bound(self, timeout_ms: int) -> bool:
+        """Wait until the bound endpoint's payload has been captured."""
+        if not self.bound_pattern:
+            return False
+        try:
+            await asyncio.wait_for(self._bound.wait(), timeout=max(timeout_ms, 1) / 1000)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def drain(self, timeout: float = 5.0):
+        """Finish reading in-flight bodies before the page closes."""
+        if self._pending:
+            await asyncio.wait(self._pending, timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "json_endpoints_seen": len(self.endpoints),
+            "json_oversize_skipped": self.skipped_oversize,
+            "json_source_hit": self.payload is not None,
+        }
+
+
+async def save_endpoint_index(key: str, endpoints: Dict[str, Dict[str, Any]]):
+    """Merge captured endpoints into the bridge's endpoint index."""
+    if not endpoints:
+        return
+    try:
+        redis = await get_redis()
+        index_key = f"bridge:json_endpoints:{key}"
+        pipe = redis.pipeline()
+        pipe.hset(index_key, mapping={p: json.dumps(info) for p, info in endpoints.items()})
+        pipe.expire(index_key, settings.json_endpoint_index_ttl_seconds)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to save JSON endpoint index for {key}: {e}")
+
+
+async def get_endpoint_index(key: str) -> List[Dict[str, Any]]:
+    """Captured JSON endpoints for a bridge, most recently seen first."""
+    redis = await get_redis()
+    raw = await redis.hgetall(f"bridge:json_endpoints:{key}")
+    endpoints = [json.loads(value) for value in raw.values()]
+    return sorted(endpoints, key=lambda e: e.get("last_seen", 0), reverse=True)
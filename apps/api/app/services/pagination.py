@@ -0,0 +1,166 @@
+"""
+Pagination rules for multi-page bridges.
+
+Bridge.pagination formats:
+    { "type": "next_link", "selector": "a.next", "max_pages": 10 }
+    { "type": "url_template", "template": "https://site.com/list?page={page}", "start": 1, "end": 5 }
+    { "type": "infinite_scroll", "item_selector": ".post", "max_items": 200, "max_seconds": 30 }
+
+Optional stop condition (next_link / url_template):
+    "stop_when": { "selector_missing": ".product" }
+A page that fails to load or repeats the previous page's content also stops the crawl.
+
+Infinite scroll keeps scrolling until no new items appear, or the item, scroll or time
+budget is reached. Every batch of new items is streamed downstream as its own segment,
+and harvested items are emptied in the page so the DOM doesn't keep growing.
+"""
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PAGES = 10
+
+DEFAULT_SCROLL_MAX_ITEMS = 500
+DEFAULT_SCROLL_MAX_SECONDS = 60
+DEFAULT_SCROLL_MAX_ROUNDS = 100
+# Rounds in a row without new items before the feed counts as exhausted
+SCROLL_IDLE_ROUNDS = 2
+
+# Collects not-yet-harvested items, empties them (keeping their height so the scroll
+# position holds), then scrolls for more.
+HARVEST_SCRIPT = """
+({selector, limit, prune}) => {
+    const fresh = Array.from(document.querySelectorAll(selector))
+        .filter(el => !el.closest('[data-bridge-harvested]'));
+    const items = [];
+    for (const el of fresh.slice(0, limit)) {
+        items.push(el.outerHTML);
+        el.setAttribute('data-bridge-harvested', '');
+        if (prune) {
+            el.style.minHeight = `${el.getBoundingClientRect().height}px`;
+            el.replaceChildren();
+        }
+    }
+    window.scrollTo(0, document.body.scrollHeight);
+    return {items, remaining: fresh.length - items.length};
+}
+"""
+
+
+def unharvested_selector(selector: str) -> str:
+    """
+    `selector` narrowed to items HARVEST_SCRIPT hasn't collected yet. The filter goes on
+    every top-level comma part, so `.post, .ad` waits for either kind, not just new ads.
+    """
+    parts, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(selector):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(selector[start:i])
+            start = i + 1
+    parts.append(selector[start:])
+    return ", ".join(f"{part.strip()}:not([data-bridge-harvested])" for part in parts if part.strip())
+
+
+def page_numbers(pagination: Dict[str, Any]) -> List[int]:
+    """Page numbers to fetch for a url_template rule."""
+    start = int(pagination.get("start", 1))
+    max_pages = int(pagination.get("max_pages", DEFAULT_MAX_PAGES))
+    end = int(pagination.get("end", start + max_pages - 1))
+    return list(range(start, min(end, start + max_pages - 1) + 1))
+
+
+def page_url(pagination: Dict[str, Any], page: int) -> str:
+    return pagination["template"].format(page=page)
+
+
+def _parse(html: str):
+    try:
+        return lxml_html.fromstring(html)
+    except ValueError:
+        return lxml_html.fromstring(html.encode("utf-8"))
+
+
+def find_next_link(html: str, selector: str, base_url: str) -> Optional[str]:
+    """Resolve the href of the first element matching the next-link selector."""
+    try:
+        for el in CSSSelector(selector)(_parse(html)):
+            href = el.get("href")
+            if href and not href.startswith(("#", "javascript:")):
+                return urljoin(base_url, href)
+    except Exception as e:
+        logger.warning(f"Failed to resolve next link '{selector}': {e}")
+    return None
+
+
+def content_fingerprint(html: str) -> str:
+    return hashlib.sha256(" ".join(html.split()).encode("utf-8")).hexdigest()
+
+
+def should_stop(pagination: Dict[str, Any], html: Optional[str]) -> bool:
+    """Evaluate the stop condition for a fetched page."""
+    if not html:
+        return True
+    stop_when = pagination.get("stop_when") or {}
+    selector = stop_when.get("selector_missing")
+    if selector:
+        try:
+            return not CSSSelector(selector)(_parse(html))
+        except Exception as e:
+            logger.warning(f"Invalid stop selector '{selector}': {e}")
+    return False
+
+
+def _page_items(data: Any) -> List[Any]:
+    """Items a single page contributed (list results, or the single list inside an object)."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        lists = [v for v in data.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            return lists[0]
+        return [data]
+    return [] if data is None else [data]
+
+
+def merge_page_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-page extraction results into one list result with page provenance.
+    Each result is { "page": n, "url": ..., "data": ... }.
+    """
+    items: List[Any] = []
+    pages: List[Dict[str, Any]] = []
+
+    for result in sorted(results, key=lambda r: r["page"]):
+        data = result.get("data")
+        page_info = {"page": result["page"], "url": result["url"], "item_count": 0}
+
+        if isinstance(data, dict) and "error" in data:
+            page_info["error"] = data["error"]
+            pages.append(page_info)
+            continue
+
+        page_items = _page_items(data)
+        for item in page_items:
+            if isinstance(item, dict):
+                items.append({**item, "_page": result["page"]})
+            else:
+                items.append({"value": item, "_page": result["page"]})
+        page_info["item_count"] = len(page_items)
+        pages.append(page_info)
+
+    return {"items": items, "pages": pages}
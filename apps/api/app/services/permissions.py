@@ -1,6 +1,6 @@
 import urllib.robotparser
-import httpx
 import logging
+import math
 import re
 from datetime import datetime, timedelta
 from typing import Optional, Tuple, Dict
@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models import DomainPermission
 from app.core.database import AsyncSessionLocal
+from app.core.config import settings
+from app.core.http_clients import PURPOSE_PROBE, get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +75,13 @@ class PermissionService:
             
         return True
 
+    async def get_crawl_delay(self, url: str, db: AsyncSession) -> int:
+        """Seconds to wait between requests to the URL's domain (robots.txt Crawl-delay)."""
+        permission = await db.get(DomainPermission, self._get_domain(url))
+        if permission and permission.crawl_delay is not None:
+            return permission.crawl_delay
+        return settings.politeness_default_crawl_delay
+
     def _get_domain(self, url: str) -> str:
         from urllib.parse import urlparse
         return urlparse(url).netloc
@@ -88,126 +97,121 @@ class PermissionService:
         robots_content = None
         security_content = None
 
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-            # A. Fetch robots.txt
-            try:
-                resp = await client.get(robots_url)
-                if resp.status_code == 200:
-                    robots_content = resp.text
-                    rp = urllib.robotparser.RobotFileParser()
-                    rp.parse(robots_content.splitlines())
-                    
-                    # Check extraction permission
-                    is_allowed = rp.can_fetch(self.user_agent, f"https://{domain}/")
-                    
-                    # Check crawl delay (if present)
-                    # Note: standard library robotparser doesn't support crawl-delay naturally in all versions
-                    # We'll do a naive regex check if needed, or stick to default
-                    # For now, default 1s
-            except Exception as e:
-                logger.warning(f"Failed to fetch robots.txt for {domain}: {e}")
-                # Fail open (allow) if robots.txt is missing/error, standard practice
-                is_allowed = True
+        client = get_http_client(PURPOSE_PROBE)
+        # A. Fetch robots.txt
+        try:
+            resp = await client.get(robots_url)
+            if resp.status_code == 200:
+                robots_content = resp.text
+                rp = urllib.robotparser.RobotFileParser()
+                rp.parse(robots_content.splitlines())
+                
+                # Check extraction permission
+                is_allowed = rp.can_fetch(self.user_agent, f"https://{domain}/")
+                
+                # Check crawl delay (if present), enforced by the politeness scheduler
+                delay = rp.crawl_delay(self.user_agent)
+                if delay is not None:
+                    crawl_delay = max(1, math.ceil(float(delay)))
+        except Exception as e:
+            logger.warning(f"Failed to fetch robots.txt for {domain}: {e}")
+            # Fail open (allow) if robots.txt is missing/error, standard practice
+            is_allowed = True
 
-            # B. Fetch security.txt
-            try:
-                resp = await client.get(security_url)
-                if resp.status_code == 200:
-                    security_content = resp.text
-                    # Parse Contact
-                    # Format: Contact: mailto:security@example.com
-                    match = re.search(r"(?i)^Contact:\s*(.*)$", security_content, re.MULTILINE)
-                    if match:
-                        contact = match.group(1).strip()
-            except Exception as e:
-                logger.warning(f"Failed to fetch security.txt for {domain}: {e}")
+        # B. Fetch security.txt
+        try:
+            resp = await client.get(security_url)
+            if resp.status_code == 200:
+                security_content = resp.text
+                # Parse Contact
+                # Format: Contact: mailto:security@example.com
+                match = re.search(r"(?i)^Contact:\s*(.*)$", security_content, re.MULTILINE)
+                if match:
+                    contact = match.group(1).strip()
+        except Exception as e:
+            logger.warning(f"Failed to fetch security.txt for {domain}: {e}")
 
-            # C. Homepage Fallback
-            if not contact:
-                try:
-                    # Use Playwright for robust JS execution and link extraction
-                    from playwright.async_api import async_playwright
-                    async with async_playwright() as p:
-                        browser = await p.chromium.launch(headless=True)
-                        try:
-                            page = await browser.new_page()
-                            # Set timeout and wait condition
-                            await page.goto(f"https://{domain}/", wait_until="networkidle", timeout=15000)
+        # C. Homepage Fallback
+        if not contact:
+            try:
+                # Pooled browser, so the scan shares the worker's memory guard
+                from app.core.browser_pool import get_browser_pool
+                pool = await get_browser_pool()
+                async with pool.context() as context:
+                    page = await context.new_page()
+                    # Set timeout and wait condition
+                    await page.goto(f"https://{domain}/", wait_until="networkidle", timeout=15000)
+                    
+                    # Extract links using DOM API
+                    links = await page.evaluate("""() => {
+                        const results = {
+                            email: null,
+                            twitter: null,
+                            github: null,
+                            linkedin: null
+                        };
+                        
+                        document.querySelectorAll('a[href]').forEach(a => {
+                            const href = a.href.toLowerCase();
                             
-                            # Extract links using DOM API
-                            links = await page.evaluate("""() => {
-                                const results = {
-                                    email: null,
-                                    twitter: null,
-                                    github: null,
-                                    linkedin: null
-                                };
-                                
-                                document.querySelectorAll('a[href]').forEach(a => {
-                                    const href = a.href.toLowerCase();
-                                    
-                                    // Email (Mailto)
-                                    if (!results.email && href.startsWith('mailto:')) {
-                                        results.email = href.replace('mailto:', '').split('?')[0];
-                                    }
-                                    
-                                    // Socials with priority
-                                    // GitHub
-                                    if (href.includes('github.com/')) {
-                                        const path = href.split('github.com/')[1];
-                                        const isProfile = path && !path.includes('/');
-                                        if (!results.github || isProfile) {
-                                            results.github = a.href;
-                                        }
-                                    }
-                                    // Twitter
-                                    if (!results.twitter && (href.includes('twitter.com/') || href.includes('x.com/'))) {
-                                        results.twitter = a.href;
-                                    }
-                                    // LinkedIn
-                                    if (href.includes('linkedin.com/')) {
-                                        results.linkedin = a.href;
-                                    }
-                                });
-
-                                // Fallback: Scan text for email if no mailto link found
-                                if (!results.email) {
-                                    const bodyText = document.body.innerText;
-                                    // DEBUG: Log the body text to see what we are scanning
-                                    // console.log("Body Text Snippet:", bodyText.substring(0, 1000)); 
-                                    
-                                    // Broader regex to catch emails
-                                    const emailMatch = bodyText.match(/([a-zA-Z0-9._-]+@[a-zA-Z0-9._-]+\.[a-zA-Z0-9._-]+)/i);
-                                    if (emailMatch) {
-                                        results.email = emailMatch[0];
-                                    }
-                                    
-                                    // Debug: Capture ALL links to see what we missed
-                                    results.debug_links = Array.from(document.querySelectorAll('a[href]')).map(a => a.href);
-                                    // Pass body text back for debug
-                                    results.debug_body = bodyText.substring(0, 10000); 
+                            // Email (Mailto)
+                            if (!results.email && href.startsWith('mailto:')) {
+                                results.email = href.replace('mailto:', '').split('?')[0];
+                            }
+                            
+                            // Socials with priority
+                            // GitHub
+                            if (href.includes('github.com/')) {
+                                const path = href.split('github.com/')[1];
+                                const isProfile = path && !path.includes('/');
+                                if (!results.github || isProfile) {
+                                    results.github = a.href;
                                 }
+                            }
+                            // Twitter
+                            if (!results.twitter && (href.includes('twitter.com/') || href.includes('x.com/'))) {
+                                results.twitter = a.href;
+                            }
+                            // LinkedIn
+                            if (href.includes('linkedin.com/')) {
+                                results.linkedin = a.href;
+                            }
+                        });
 
-                                return results;
-                            }""")
-                            
-                            if links['email']: contact = links['email']
-                            if 'debug_links' in links:
-                                print(f"DEBUG LINKS: {links['debug_links']}")
-                            if 'debug_body' in links:
-                                print(f"DEBUG BODY TEXT: {links['debug_body']}")
-                            socials['twitter'] = links['twitter']
-                            socials['github'] = links['github']
-                            socials['linkedin'] = links['linkedin']
+                        // Fallback: Scan text for email if no mailto link found
+                        if (!results.email) {
+                            const bodyText = document.body.innerText;
+                            // DEBUG: Log the body text to see what we are scanning
+                            // console.log("Body Text Snippet:", bodyText.substring(0, 1000)); 
                             
-                            logger.info(f"Discovered contacts: {links}")
+                            // Broader regex to catch emails
+                            const emailMatch = bodyText.match(/([a-zA-Z0-9._-]+@[a-zA-Z0-9._-]+\.[a-zA-Z0-9._-]+)/i);
+                            if (emailMatch) {
+                                results.email = emailMatch[0];
+                            }
                             
-                        finally:
-                            await browser.close()
+                            // Debug: Capture ALL links to see what we missed
+                            results.debug_links = Array.from(document.querySelectorAll('a[href]')).map(a => a.href);
+                            // Pass body text back for debug
+                            results.debug_body = bodyText.substring(0, 10000); 
+                        }
 
-                except Exception as e:
-                     logger.warning(f"Failed to scrape homepage for {domain} with Playwright: {e}")
+                        return results;
+                    }""")
+                    
+                    if links['email']: contact = links['email']
+                    if 'debug_links' in links:
+                        print(f"DEBUG LINKS: {links['debug_links']}")
+                    if 'debug_body' in links:
+                        print(f"DEBUG BODY TEXT: {links['debug_body']}")
+                    socials['twitter'] = links['twitter']
+                    socials['github'] = links['github']
+                    socials['linkedin'] = links['linkedin']
+                    
+                    logger.info(f"Discovered contacts: {links}")
+                    
 
-        return is_allowed, crawl_delay, contact, robots_content, security_content, socials
+            except Exception as e:
+                 logger.warning(f"Failed to scrape homepage for {domain} with Playwright: {e}")
 
-        return is_allowed, crawl_delay, contact, robots_content, security_content
+        return is_allowed, crawl_delay, contact, robots_content, security_content, socials
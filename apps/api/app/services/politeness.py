@@ -0,0 +1,190 @@
+"""
+Cluster-wide per-domain politeness scheduler.
+
+Every crawl entry point (API process or Celery worker) leases a slot in Redis before
+navigating. A domain gets at most `max_concurrency` concurrent leases, and lease
+grants are spaced by the domain's crawl-delay. Leases expire on their own, so a
+crashed worker cannot hold a domain forever; a live holder renews its lease while the
+crawl runs, so a long render or interaction doesn't lose the slot halfway through.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Returns 0 when the lease was granted, otherwise the number of ms to wait before retrying.
+# Uses the Redis server clock so workers with skewed clocks agree on spacing.
+ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local lease_ttl = tonumber(ARGV[2])
+local delay = tonumber(ARGV[3])
+local max_concurrency = tonumber(ARGV[4])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= max_concurrency then
+    local earliest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return math.max(1, math.min(tonumber(ARGV[5]), tonumber(earliest[2]) - now))
+end
+
+local next_allowed = tonumber(redis.call('GET', KEYS[2]) or '0')
+if now < next_allowed then
+    return next_allowed - now
+end
+
+redis.call('ZADD', KEYS[1], now + lease_ttl, ARGV[1])
+redis.call('PEXPIRE', KEYS[1], lease_ttl)
+if delay > 0 then
+    redis.call('SET', KEYS[2], now + delay, 'PX', delay)
+end
+return 0
+"""
+
+# Pushes a held lease's expiry out again. Returns 0 if the lease already expired.
+RENEW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local lease_ttl = tonumber(ARGV[2])
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + lease_ttl, ARGV[1])
+redis.call('PEXPIRE', KEYS[1], lease_ttl)
+return 1
+"""
+
+STATS_KEY = "bridge:polite:stats"
+
+
+class PolitenessTimeout(Exception):
+    """Raised when a domain slot could not be acquired within the maximum wait."""
+
+
+class PolitenessScheduler:
+    """Leases per-domain crawl slots from Redis."""
+
+    # Upper bound on a single sleep while a domain is at max concurrency
+    POLL_INTERVAL_MS = 250
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        domain: str,
+        crawl_delay: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> AsyncIterator[float]:
+        """
+        Hold a crawl slot for `domain` for the duration of the block.
+        Yields the scheduling delay (ms) spent waiting for the slot.
+        """
+        domain = domain.lower()
+        delay_ms = int((crawl_delay if crawl_delay is not None else settings.politeness_default_crawl_delay) * 1000)
+        max_concurrency = max_concurrency or settings.politeness_max_concurrency_per_domain
+        lease_id = uuid.uuid4().hex
+
+        redis = None
+        waited_ms = 0.0
+        try:
+            redis = await get_redis()
+            waited_ms = await self._acquire(redis, domain, lease_id, delay_ms, max_concurrency)
+        except PolitenessTimeout:
+            raise
+        except Exception as e:
+            # Fail open: a Redis outage should not stop all crawling
+            logger.warning(f"Politeness scheduler unavailable (Redis error): {e}")
+            redis = None
+
+        renewer = asyncio.create_task(self._renew(redis, domain, lease_id)) if redis is not None else None
+        try:
+            yield waited_ms
+        finally:
+            if renewer is not None:
+                renewer.cancel()
+            if redis is not None:
+                try:
+                    await redis.zrem(self._leases_key(domain), lease_id)
+                except Exception as e:
+                    logger.warning(f"Failed to release crawl slot for {domain}: {e}")
+
+    async def _acquire(self, redis, domain: str, lease_id: str, delay_ms: int, max_concurrency: int) -> float:
+        started = time.monotonic()
+        deadline = started + settings.politeness_max_wait_seconds
+        lease_ttl_ms = int(settings.politeness_lease_ttl_seconds * 1000)
+
+        delayed = False
+        while True:
+            wait_ms = await redis.eval(
+                ACQUIRE_SCRIPT,
+                2,
+                self._leases_key(domain),
+                self._next_key(domain),
+                lease_id,
+                lease_ttl_ms,
+                delay_ms,
+                max_concurrency,
+                self.POLL_INTERVAL_MS,
+            )
+            wait_ms = int(wait_ms)
+            if wait_ms <= 0:
+                break
+            if time.monotonic() + wait_ms / 1000 > deadline:
+                raise PolitenessTimeout(f"Timed out waiting for a crawl slot on {domain}")
+            delayed = True
+            await asyncio.sleep(wait_ms / 1000)
+
+        waited_ms = round((time.monotonic() - started) * 1000, 2) if delayed else 0.0
+        await self._record(redis, waited_ms)
+        if waited_ms > 0:
+            logger.info(f"Waited {waited_ms}ms for crawl slot on {domain}")
+        return waited_ms
+
+    async def _renew(self, redis, domain: str, lease_id: str):
+        """Keep the lease alive while its holder runs, renewing at a third of the TTL."""
+        lease_ttl_ms = int(settings.politeness_lease_ttl_seconds * 1000)
+        while True:
+            await asyncio.sleep(lease_ttl_ms / 3000)
+            try:
+                renewed = await redis.eval(RENEW_SCRIPT, 1, self._leases_key(domain), lease_id, lease_ttl_ms)
+            except Exception as e:
+                logger.warning(f"Failed to renew crawl slot for {domain}: {e}")
+                continue
+            if not int(renewed):
+                logger.warning(f"Crawl slot lease for {domain} expired before it could be renewed")
+                return
+
+    async def _record(self, redis, waited_ms: float):
+        try:
+            pipe = redis.pipeline()
+            pipe.hincrby(STATS_KEY, "acquisitions", 1)
+            pipe.hincrbyfloat(STATS_KEY, "total_wait_ms", waited_ms)
+            if waited_ms > 0:
+                pipe.hincrby(STATS_KEY, "delayed_acquisitions", 1)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Failed to record scheduling delay: {e}")
+
+    def _leases_key(self, domain: str) -> str:
+        return f"bridge:polite:{domain}:leases"
+
+    def _next_key(self, domain: str) -> str:
+        return f"bridge:polite:{domain}:next"
+
+
+async def get_scheduler_stats() -> Dict[str, Any]:
+    """Cluster-wide scheduling delay metrics."""
+    redis = await get_redis()
+    raw = await redis.hgetall(STATS_KEY)
+    acquisitions = int(raw.get("acquisitions", 0))
+    total_wait_ms = float(raw.get("total_wait_ms", 0))
+    return {
+        "acquisitions": acquisitions,
+        "delayed_acquisitions": int(raw.get("delayed_acquisitions", 0)),
+        "avg_scheduling_delay_ms": round(total_wait_ms / acquisitions, 2) if acquisitions else 0.0,
+    }
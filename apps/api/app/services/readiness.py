@@ -0,0 +1,132 @@
+"""
+Adaptive page-readiness detection.
+
+`networkidle` never fires on pages with long-polling or analytics beacons, and fixed
+sleeps are either too short or wasted. Instead we wait inside the page until the
+expected selectors appear, DOM mutations go quiet, or the bridge's budget runs out,
+and report which of those conditions fired.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import Page
+
+from app.core.config import settings
+from app.services.selectors import css_selector
+
+logger = logging.getLogger(__name__)
+
+READINESS_SCRIPT = """
+async ({selectors, quietMs, budgetMs}) => {
+    const start = performance.now();
+    let lastMutation = start;
+    let mutations = 0;
+
+    const observer = new MutationObserver(records => {
+        mutations += records.length;
+        lastMutation = performance.now();
+    });
+    observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+
+    const selectorsReady = () => selectors.length > 0 && selectors.every(sel => {
+        try {
+            const el = document.querySelector(sel);
+            return el && (el.textContent.trim().length > 0 || el.attributes.length > 0);
+        } catch (e) {
+            return true; // Invalid selector should not block readiness
+        }
+    });
+
+    // With known selectors, only settle for a quiet DOM once it has been still for a while
+    const requiredQuiet = selectors.length > 0 ? quietMs * 3 : quietMs;
+
+    return await new Promise(resolve => {
+        const finish = (condition) => {
+            observer.disconnect();
+            clearInterval(timer);
+            resolve({condition, elapsed_ms: Math.round(performance.now() - start), mutations});
+        };
+        const timer = setInterval(() => {
+            const now = performance.now();
+            if (selectorsReady()) return finish('selectors');
+            if (document.readyState !== 'loading' && now - lastMutation >= requiredQuiet) return finish('dom_quiet');
+            if (now - start >= budgetMs) return finish('budget');
+        }, 50);
+    });
+}
+"""
+
+
+def derive_selectors(
+    extraction_schema: Optional[Dict[str, Any]] = None,
+    selectors: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    """CSS selectors whose presence means the data has rendered."""
+    derived: List[str] = []
+    for value in (selectors or {}).values():
+        selector = css_selector(value)
+        if selector:
+            derived.append(selector)
+
+    properties = (extraction_schema or {}).get("properties", extraction_schema or {})
+    if isinstance(properties, dict):
+        for value in properties.values():
+            if isinstance(value, dict) and isinstance(value.get("selector"), str):
+                derived.append(value["selector"])
+
+    # Preserve order, drop duplicates
+    return list(dict.fromkeys(derived))
+
+
+class ReadinessEngine:
+    """Waits for a page to be ready for extraction within a budget."""
+
+    def __init__(
+        self,
+        budget_ms: Optional[int] = None,
+        quiet_ms: Optional[int] = None,
+    ):
+        self.budget_ms = budget_ms or settings.readiness_budget_ms
+        self.quiet_ms = quiet_ms or settings.readiness_quiet_ms
+        self.started_at = time.monotonic()
+
+    @property
+    def remaining_ms(self) -> int:
+        elapsed = (time.monotonic() - self.started_at) * 1000
+        return max(0, int(self.budget_ms - elapsed))
+
+    async def wait(self, page: Page, selectors: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Block until the page is ready or the remaining budget is spent.
+        Returns {"condition": "selectors"|"dom_quiet"|"budget"|"navigation", "elapsed_ms": ..., "mutations": ...}
+        """
+        budget = self.remaining_ms
+        if budget <= 0:
+            return {"condition": "budget", "elapsed_ms": 0, "mutations": 0}
+
+        started = time.monotonic()
+        try:
+            # Python-side guard in case the page stops running timers
+            return await asyncio.wait_for(
+                page.evaluate(
+                    READINESS_SCRIPT,
+                    {"selectors": selectors or [], "quietMs": self.quiet_ms, "budgetMs": budget},
+                ),
+                timeout=budget / 1000 + 5,
+            )
+        except asyncio.TimeoutError:
+            return {"condition": "budget", "elapsed_ms": budget, "mutations": None}
+        except Exception as e:
+            # Execution context destroyed: the page navigated while we were waiting
+            logger.info(f"Readiness wait interrupted: {e}")
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=max(self.remaining_ms, 1))
+            except Exception:
+                pass
+            return {
+                "condition": "navigation",
+                "elapsed_ms": int((time.monotonic() - started) * 1000),
+                "mutations": None,
+            }
@@ -1,11 +1,12 @@
 import re
 import os
 import subprocess
-import requests
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from pathlib import Path
 
+from app.core.http_clients import PURPOSE_VALIDATION, get_http_client
+
 # Common Secret Patterns
 SECRET_PATTERNS = {
     "OpenAI API Key": r"sk-(?:proj-)?[a-zA-Z0-9]{32,128}",
@@ -86,20 +87,17 @@ class SecretScanner:
     async def validate_key(key_type: str, key: str) -> str:
         """Performs a non-destructive check to see if a key is active."""
         try:
+            client = get_http_client(PURPOSE_VALIDATION)
             if "OpenAI" in key_type:
-                resp = requests.get(
+                resp = await client.get(
                     "https://api.openai.com/v1/models",
-                    headers={"Authorization": f"Bearer {key}"},
-                    timeout=5
+                    headers={"Authorization": f"Bearer {key}"}
                 )
                 return "active" if resp.status_code == 200 else "revoked"
             
             if "Google" in key_type:
                 # Simple check for Google API key validity via a public discovery API
-                resp = requests.get(
-                    f"https://www.googleapis.com/discovery/v1/apis?key={key}",
-                    timeout=5
-                )
+                resp = await client.get(f"https://www.googleapis.com/discovery/v1/apis?key={key}")
                 return "active" if resp.status_code == 200 else "revoked"
             
             # Add more validators as needed
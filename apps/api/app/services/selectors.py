@@ -0,0 +1,290 @@
+"""
+Deterministic selector extraction.
+
+A bridge's `selectors` map schema fields to CSS or XPath selectors. Once a bridge has
+working selectors, extraction is a parse plus a few compiled lookups (no LLM call);
+the LLM is only asked once, to propose selectors from a sample page.
+
+Spec format (values are a selector string or a dict):
+
+    {
+        "title": "h1",                                   # CSS, text content
+        "canonical": "link[rel=canonical]@href",         # "@attr" suffix reads an attribute
+        "sku": "xpath://span[@itemprop='sku']/text()",   # "xpath:" prefix (or a leading "/")
+        "price": {"selector": ".price", "transform": ["number"]},
+        "tags": {"selector": ".tag", "many": true},
+        "products": {                                    # list container: one item per match
+            "selector": "li.product",
+            "fields": {
+                "name": "h3",
+                "url": {"selector": "a", "attr": "href", "transform": "absolute_url"},
+                "price": {"selector": ".price", "transform": ["number"]}
+            }
+        }
+    }
+
+Transforms: strip, lower, upper, number, int, absolute_url, regex:<pattern> (first group).
+Compiled specs are cached by content, so each bridge's selectors are compiled once per process.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+
+from app.services.distill import fit_to_budget
+from app.services.snapshot import SKIP_TAGS
+
+logger = logging.getLogger(__name__)
+
+SKELETON_ATTRS = {"id", "class", "itemprop", "itemtype", "href", "src", "alt", "name", "type", "role", "aria-label", "rel", "content", "datetime"}
+SKELETON_TEXT = 60
+SKELETON_SIBLINGS = 3
+
+# "a.title@href": an attribute suffix outside any [...] attribute selector
+_ATTR_SUFFIX = re.compile(r"^(?P<selector>.*[^\s@])@(?P<attr>[\w:-]+)$")
+_NUMBER = re.compile(r"-?\d[\d,]*(?:\.\d+)?|-?\.\d+")
+
+
+class SelectorSpecError(ValueError):
+    """A selector spec that can't be compiled."""
+
+
+def _number(value: str) -> Optional[float]:
+    match = _NUMBER.search(value)
+    if not match:
+        return None
+    number = float(match.group(0).replace(",", ""))
+    return int(number) if number.is_integer() else number
+
+
+def _transform(name: str) -> Callable[[Any, str], Any]:
+    """A transform as fn(value, base_url)."""
+    if name.startswith("regex:"):
+        pattern = re.compile(name[len("regex:"):])
+
+        def regex(value, _base):
+            match = pattern.search(value)
+            if not match:
+                return None
+            return match.group(1) if match.groups() else match.group(0)
+        return regex
+
+    simple = {
+        "strip": lambda v, _b: v.strip(),
+        "lower": lambda v, _b: v.lower(),
+        "upper": lambda v, _b: v.upper(),
+        "number": lambda v, _b: _number(v),
+        "int": lambda v, _b: None if _number(v) is None else int(_number(v)),
+        "absolute_url": lambda v, b: urljoin(b, v.strip()) if b else v.strip(),
+    }
+    if name not in simple:
+        raise SelectorSpecError(f"Unknown transform: {name}")
+    return simple[name]
+
+
+@dataclass
+class CompiledField:
+    find: Callable[[Any], List[Any]]
+    attr: Optional[str] = None
+    transforms: List[Callable[[Any, str], Any]] = field(default_factory=list)
+    many: bool = False
+    fields: Optional[Dict[str, "CompiledField"]] = None
+    default: Any = None
+
+
+def _compile_selector(selector: str) -> Tuple[Callable[[Any], List[Any]], Optional[str]]:
+    """(finder, attribute) for a selector string."""
+    try:
+        if _is_xpath(selector):
+            return etree.XPath(selector[len("xpath:"):] if selector.startswith("xpath:") else selector), None
+        attr = None
+        match = _ATTR_SUFFIX.match(selector)
+        if match:
+            selector, attr = match.group("selector"), match.group("attr")
+        return CSSSelector(selector), attr
+    except Exception as e:
+        raise SelectorSpecError(f"Invalid selector {selector!r}: {e}")
+
+
+def _is_xpath(selector: str) -> bool:
+    return selector.startswith("xpath:") or selector.startswith("/") or selector.startswith("./")
+
+
+def css_selector(spec: Any) -> Optional[str]:
+    """The plain CSS selector of a field spec (no "@attr" suffix), or None for XPath or an invalid spec."""
+    selector = spec.get("selector") if isinstance(spec, dict) else spec
+    if not isinstance(selector, str) or not selector.strip() or _is_xpath(selector.strip()):
+        return None
+    match = _ATTR_SUFFIX.match(selector.strip())
+    return match.group("selector") if match else selector.strip()
+
+
+def _compile_field(spec: Any) -> CompiledField:
+    if isinstance(spec, str):
+        spec = {"selector": spec}
+    if not isinstance(spec, dict) or not isinstance(spec.get("selector"), str) or not spec["selector"].strip():
+        raise SelectorSpecError(f"Selector spec needs a 'selector' string: {spec!r}")
+
+    find, attr = _compile_selector(spec["selector"].strip())
+    transforms = spec.get("transform") or []
+    if isinstance(transforms, str):
+        transforms = [transforms]
+    fields = spec.get("fields")
+    return CompiledField(
+        find=find,
+        attr=spec.get("attr") or attr,
+        transforms=[_transform(name) for name in transforms],
+        many=bool(spec.get("many")) or bool(fields),
+        fields={name: _compile_field(sub) for name, sub in fields.items()} if isinstance(fields, dict) else None,
+        default=spec.get("default"),
+    )
+
+
+@lru_cache(maxsize=512)
+def _compile_json(spec_json: str) -> Dict[str, CompiledField]:
+    spec = json.loads(spec_json)
+    if not isinstance(spec, dict) or not spec:
+        raise SelectorSpecError("Selectors must be a non-empty object")
+    return {name: _compile_field(value) for name, value in spec.items()}
+
+
+def compile_selectors(spec: Dict[str, Any]) -> Dict[str, CompiledField]:
+    """Compile (or fetch from cache) a bridge's selector spec. Raises SelectorSpecError."""
+    return _compile_json(json.dumps(spec))
+
+
+def _value(node: Any, compiled: CompiledField, base_url: str) -> Any:
+    if isinstance(node, str):
+        # XPath text()/@attr results
+        value = str(node)
+    elif compiled.attr:
+        value = node.get(compiled.attr)
+        if value is None:
+            return None
+    else:
+        value = node.text_content()
+    value = " ".join(value.split())
+    for transform in compiled.transforms:
+        if value is None:
+            break
+        try:
+            value = transform(value, base_url)
+        except Exception:
+            value = None
+    return value if value not in ("", None) else compiled.default
+
+
+def _extract_field(root: Any, compiled: CompiledField, base_url: str) -> Any:
+    nodes = compiled.find(root)
+    if not isinstance(nodes, list):
+        # XPath expressions like count() or string() return scalars
+        if isinstance(nodes, float) and nodes.is_integer():
+            nodes = int(nodes)
+        nodes = [str(nodes)]
+    if compiled.fields is not None:
+        return [
+            {name: _extract_field(node, sub, base_url) for name, sub in compiled.fields.items()}
+            for node in nodes
+            if not isinstance(node, str)
+        ]
+    if compiled.many:
+        values = [_value(node, compiled, base_url) for node in nodes]
+        return [v for v in values if v is not None]
+    for node in nodes:
+        value = _value(node, compiled, base_url)
+        if value is not None:
+            return value
+    return compiled.default
+
+
+def coverage(data: Dict[str, Any]) -> float:
+    """Share of top-level fields that came back non-empty."""
+    if not data:
+        return 0.0
+    filled = sum(1 for value in data.values() if value not in (None, "", [], {}))
+    return filled / len(data)
+
+
+def extract_with_selectors(html: str, spec: Dict[str, Any], base_url: str = "") -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Extract `spec`'s fields from `html`. Returns (data, stats). Blocking (lxml parse):
+    see `run_selectors()`. Raises SelectorSpecError for an invalid spec.
+    """
+    compiled = compile_selectors(spec)
+    started = time.perf_counter()
+    try:
+        doc = lxml_html.fromstring(html)
+    except ValueError:
+        doc = lxml_html.fromstring(html.encode("utf-8"))
+    parsed = time.perf_counter()
+
+    data = {name: _extract_field(doc, field_spec, base_url) for name, field_spec in compiled.items()}
+    done = time.perf_counter()
+    return data, {
+        "source": "selectors",
+        "coverage": round(coverage(data), 3),
+        "parse_us": int((parsed - started) * 1_000_000),
+        "extract_us": int((done - parsed) * 1_000_000),
+    }
+
+
+def selector_skeleton(html: str, budget_tokens: int) -> str:
+    """
+    The page's markup reduced to what a selector can target, for the LLM to propose
+    selectors from: scripts/styles dropped, only identifying attributes kept, text cut
+    short, and runs of same-looking siblings (list items, cards) cut to a few examples.
+    """
+    try:
+        doc = lxml_html.fromstring(html)
+    except ValueError:
+        doc = lxml_html.fromstring(html.encode("utf-8"))
+    body = doc.find("body")
+    if body is None:
+        body = doc
+
+    for el in list(body.iter()):
+        if el.getparent() is None:
+            continue
+        if not isinstance(el.tag, str) or el.tag in SKIP_TAGS:
+            el.drop_tree()
+            continue
+        for name in list(el.attrib):
+            value = el.attrib[name]
+            if name not in SKELETON_ATTRS and not (name.startswith("data-") and len(value) <= 40):
+                del el.attrib[name]
+            elif len(value) > 80:
+                el.attrib[name] = value[:80]
+        if el.text and len(el.text.strip()) > SKELETON_TEXT:
+            el.text = el.text.strip()[:SKELETON_TEXT] + "…"
+        if el.tail and len(el.tail.strip()) > SKELETON_TEXT:
+            el.tail = el.tail.strip()[:SKELETON_TEXT] + "…"
+
+    for parent in list(body.iter()):
+        seen: Dict[Tuple[str, str], int] = {}
+        for child in list(parent):
+            key = (child.tag, child.get("class") or "")
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > SKELETON_SIBLINGS:
+                parent.remove(child)
+        extra = {key: count - SKELETON_SIBLINGS for key, count in seen.items() if count > SKELETON_SIBLINGS}
+        for (tag, cls), count in extra.items():
+            parent.append(etree.Comment(f" {count} more <{tag} class='{cls}'> "))
+
+    markup = lxml_html.tostring(body, encoding="unicode")
+    markup = re.sub(r">\s+<", "><", markup)
+    text, _ = fit_to_budget(markup.replace("><", ">\n<"), budget_tokens)
+    return text
+
+
+async def run_selectors(html: str, spec: Dict[str, Any], base_url: str = "") -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """extract_with_selectors in a worker thread, so a large parse never blocks the event loop."""
+    return await asyncio.to_thread(extract_with_selectors, html, spec, base_url)
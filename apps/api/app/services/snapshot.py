@@ -0,0 +1,175 @@
+"""
+Compact page snapshots for LLM input.
+
+Raw HTML is mostly markup noise, and cutting it to a character budget often drops the
+data. A snapshot keeps only visible text and the structure around it, one node per line:
+
+    [n1] h1: Acme Shop
+    [n2] ul
+      [n3] li: Widget $10
+        [n4] a (href=/p/1): Widget
+
+Indentation is nesting. Node ids are assigned in document order, so the same DOM always
+yields the same ids. Rendered pages are snapshotted inside the browser (where visibility
+is known); statically fetched HTML is snapshotted with lxml in the same format.
+"""
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from lxml import html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "canvas", "link", "meta", "head"}
+KEEP_TAGS = {
+    "h1", "h2", "h3", "h4", "h5", "h6", "a", "img", "button", "input", "select", "textarea", "label",
+    "ul", "ol", "li", "dl", "dt", "dd", "table", "tr", "th", "td", "article", "section", "main", "nav",
+    "header", "footer", "form", "p", "time", "figure", "figcaption", "pre", "blockquote",
+}
+KEEP_ATTRS = ["href", "src", "alt", "title", "aria-label", "itemprop", "datetime", "value", "type", "name", "placeholder"]
+MAX_TEXT = 300
+MAX_ATTR = 120
+
+# Rough chars-per-token ratio used for the savings estimate
+CHARS_PER_TOKEN = 4
+
+SNAPSHOT_SCRIPT = """
+({skipTags, keepTags, keepAttrs, maxText, maxAttr}) => {
+    const skip = new Set(skipTags);
+    const keep = new Set(keepTags);
+    const lines = [];
+    let counter = 0;
+    const clean = s => s.replace(/\\s+/g, ' ').trim();
+    const cut = (s, n) => s.length > n ? s.slice(0, n) + '…' : s;
+    const visible = el => {
+        if (el.hidden || el.getAttribute('aria-hidden') === 'true') return false;
+        if (el.checkVisibility) return el.checkVisibility({visibilityProperty: true});
+        const style = getComputedStyle(el);
+        return style.display !== 'none' && style.visibility !== 'hidden';
+    };
+
+    const walk = (el, depth) => {
+        const tag = el.localName;
+        if (skip.has(tag) || !visible(el)) return;
+
+        const attrs = [];
+        for (const name of keepAttrs) {
+            const value = el.getAttribute(name);
+            if (value && clean(value)) attrs.push(`${name}=${cut(clean(value), maxAttr)}`);
+        }
+        // Drop subtrees that carry neither text nor useful attributes
+        if (!attrs.length && !clean(el.textContent)) return;
+
+        let text = '';
+        for (const node of el.childNodes) {
+            if (node.nodeType === Node.TEXT_NODE) text += node.textContent + ' ';
+        }
+        text = cut(clean(text), maxText);
+
+        let childDepth = depth;
+        if (keep.has(tag) || text || attrs.length) {
+            counter += 1;
+            let line = `${'  '.repeat(depth)}[n${counter}] ${tag}`;
+            if (attrs.length) line += ` (${attrs.join(', ')})`;
+            if (text) line += `: ${text}`;
+            lines.push(line);
+            childDepth = depth + 1;
+        }
+        for (const child of el.children) walk(child, childDepth);
+    };
+
+    if (document.body) walk(document.body, 0);
+    return lines.join('\\n');
+}
+"""
+
+_HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.I)
+
+
+def script_args() -> Dict[str, Any]:
+    """Arguments for SNAPSHOT_SCRIPT, shared with the lxml implementation."""
+    return {
+        "skipTags": sorted(SKIP_TAGS),
+        "keepTags": sorted(KEEP_TAGS),
+        "keepAttrs": KEEP_ATTRS,
+        "maxText": MAX_TEXT,
+        "maxAttr": MAX_ATTR,
+    }
+
+
+def _clean(value: str) -> str:
+    return " ".join(value.split())
+
+
+def _cut(value: str, limit: int) -> str:
+    return value[:limit] + "…" if len(value) > limit else value
+
+
+def _hidden(el) -> bool:
+    if el.get("hidden") is not None or el.get("aria-hidden") == "true":
+        return True
+    return bool(_HIDDEN_STYLE.search(el.get("style", "")))
+
+
+def build_snapshot(html: str) -> str:
+    """Snapshot statically fetched HTML in the same format as SNAPSHOT_SCRIPT."""
+    try:
+        doc = lxml_html.fromstring(html)
+    except ValueError:
+        doc = lxml_html.fromstring(html.encode("utf-8"))
+    except Exception as e:
+        logger.warning(f"Failed to parse HTML for snapshot: {e}")
+        return ""
+
+    body = doc.find("body")
+    if body is None:
+        body = doc
+
+    lines: List[str] = []
+    counter = 0
+
+    def walk(el, depth: int):
+        nonlocal counter
+        tag = el.tag if isinstance(el.tag, str) else None
+        if tag is None or tag in SKIP_TAGS or _hidden(el):
+            return
+
+        attrs = []
+        for name in KEEP_ATTRS:
+            value = _clean(el.get(name) or "")
+            if value:
+                attrs.append(f"{name}={_cut(value, MAX_ATTR)}")
+        if not attrs and not _clean(el.text_content()):
+            return
+
+        text = _cut(_clean(" ".join([el.text or ""] + [child.tail or "" for child in el])), MAX_TEXT)
+
+        child_depth = depth
+        if tag in KEEP_TAGS or text or attrs:
+            counter += 1
+            line = f"{'  ' * depth}[n{counter}] {tag}"
+            if attrs:
+                line += f" ({', '.join(attrs)})"
+            if text:
+                line += f": {text}"
+            lines.append(line)
+            child_depth = depth + 1
+        for child in el:
+            walk(child, child_depth)
+
+    walk(body, 0)
+    return "\n".join(lines)
+
+
+def snapshot_stats(html: Optional[str], snapshot: Optional[str], source: str) -> Dict[str, Any]:
+    """Per-run size and estimated token savings of the snapshot over raw HTML."""
+    html_chars = len(html or "")
+    snapshot_chars = len(snapshot or "")
+    return {
+        "snapshot_source": source,
+        "html_chars": html_chars,
+        "snapshot_chars": snapshot_chars,
+        "snapshot_ratio": round(snapshot_chars / html_chars, 3) if html_chars else None,
+        "tokens_saved_est": max(0, (html_chars - snapshot_chars) // CHARS_PER_TOKEN),
+    }
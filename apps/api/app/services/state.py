@@ -3,11 +3,21 @@ import hashlib
 import json
 import logging
 import os
+import re
 import redis.asyncio as redis
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Markup that changes on every request without the page content changing
+_VOLATILE_PATTERNS = [
+    re.compile(r"<script\b.*?</script>", re.I | re.S),
+    re.compile(r"<style\b.*?</style>", re.I | re.S),
+    re.compile(r"<!--.*?-->", re.S),
+    re.compile(r"""\s(?:nonce|data-csrf[\w-]*|csrf[\w-]*)=("[^"]*"|'[^']*')""", re.I),
+    re.compile(r"""<meta[^>]+name=["']csrf[^>]*>""", re.I),
+]
+
 class StateService:
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -52,6 +62,46 @@ class StateService:
         except Exception as e:
             logger.warning(f"State Engine failed to save state: {e}")
 
+    def content_hash(self, html: str) -> str:
+        """Hash of the page with scripts, styles, comments and per-request tokens removed."""
+        for pattern in _VOLATILE_PATTERNS:
+            html = pattern.sub(" ", html)
+        html = re.sub(r">\s+<", "><", html)
+        return self._generate_hash(" ".join(html.split()))
+
+    def config_hash(self, extraction_schema: Any, selectors: Any) -> str:
+        """Hash of what an extraction produces from a page; stored with the fetch validators."""
+        return self._generate_hash({"schema": extraction_schema, "selectors": selectors})
+
+    async def get_fetch_validators(self, context_id: str, config_hash: Optional[str] = None) -> Dict[str, str]:
+        """
+        ETag, Last-Modified and normalized content hash from the last extracted fetch.
+        Returns an empty dict if nothing is stored, or if it was stored for another
+        `config_hash` (the schema or selectors changed, so an unchanged page must be re-extracted).
+        """
+        try:
+            validators = await self.redis.hgetall(f"bridge:validators:{context_id}")
+        except Exception as e:
+            logger.warning(f"State Engine unavailable (Redis error): {e}")
+            return {}
+        if config_hash and validators.get("config_hash") != config_hash:
+            return {}
+        return validators
+
+    async def save_fetch_validators(self, context_id: str, validators: Dict[str, Optional[str]], ttl: int = 86400 * 30):
+        """Store fetch validators, dropping empty values."""
+        try:
+            key = f"bridge:validators:{context_id}"
+            mapping = {k: v for k, v in validators.items() if v}
+            pipe = self.redis.pipeline()
+            pipe.delete(key)
+            if mapping:
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"State Engine failed to save fetch validators: {e}")
+
     async def close(self):
         try:
             await self.redis.close()
@@ -7,58 +7,218 @@ from app.core.database import AsyncSessionLocal
 from app.models import Bridge, UsageLog
 from sqlalchemy import select
 from datetime import datetime
+from uuid import UUID, uuid4
+from collections import defaultdict
 import time
 import logging
-import httpx
-from app.models import Bridge, UsageLog, Webhook, WebhookLog
+from urllib.parse import urlparse
+from app.models import Bridge, UsageLog, Webhook, WebhookLog, DomainPermission, WebMCPTool
+from app.services.pagination import merge_page_results
+from app.services.network_capture import resolve_json_path
+from app.services.archive import SnapshotArchive
+from app.services.state import StateService
+from app.services.frontier import RELEASE_SCRIPT, CrawlFrontier, extract_links
+from app.services.discovery_session import DiscoverySession
 import nest_asyncio
+from celery.signals import worker_process_shutdown
+from app.core.browser_pool import close_browser_pool
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.http_clients import PURPOSE_WEBHOOK, close_http_clients, get_http_client
 
 logger = logging.getLogger(__name__)
 
+WEBMCP_SWEEP_LOCK = "webmcp:sweep:lock"
+
+# Long-lived event loop for this worker process. asyncio.run() would create and tear down
+# a loop per task, taking the browser pool (and DB connections) down with it.
+_worker_loop = None
+
+def _run_async(coro):
+    """Run a coroutine on the worker process's persistent event loop."""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop.run_until_complete(coro)
+
+@worker_process_shutdown.connect
+def _shutdown_worker_resources(**kwargs):
+    """Close pooled browsers and HTTP clients when the worker process exits."""
+    if _worker_loop and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(close_browser_pool())
+        _worker_loop.run_until_complete(close_http_clients())
+        _worker_loop.close()
+
 @celery_app.task(name="app.services.tasks.run_extraction_task")
 def run_extraction_task(bridge_id: str, user_id: str):
     """
     Background task to run website extraction using Playwright and OpenAI.
-    Since Celery is synchronous by default, we use asyncio.run to execute our async services.
+    Since Celery is synchronous by default, we run our async services on the worker's event loop.
     """
-    return asyncio.run(_perform_extraction(bridge_id, user_id))
+    return _run_async(_perform_extraction(bridge_id, user_id))
+
+@celery_app.task(name="app.services.tasks.run_reextraction_task")
+def run_reextraction_task(bridge_id: str, user_id: str, limit: int = None, extraction_schema: dict = None):
+    """Re-run extraction over a bridge's archived snapshots (no crawling)."""
+    return _run_async(_perform_reextraction(bridge_id, user_id, limit, extraction_schema))
+
+@celery_app.task(name="app.services.tasks.run_frontier_crawl_task", time_limit=settings.frontier_task_time_limit_seconds)
+def run_frontier_crawl_task(bridge_id: str, user_id: str):
+    """
+    Crawl the next stretch of a bridge's site-wide frontier. The task re-queues itself
+    until the frontier is empty, so progress is checkpointed every frontier_urls_per_task URLs
+    or frontier_task_seconds, whichever comes first.
+    """
+    result = _run_async(_perform_frontier_crawl(bridge_id, user_id))
+    if result.get("status") == "continuing":
+        run_frontier_crawl_task.delay(bridge_id, user_id)
+    return result
+
+@celery_app.task(name="app.services.tasks.run_webmcp_sweep_task")
+def run_webmcp_sweep_task():
+    """Re-verify stale WebMCP tool manifests (scheduled by beat), so extraction never discovers inline."""
+    return _run_async(_perform_webmcp_sweep())
 
 async def _fire_webhooks(db, user_id, event_type, payload):
     """Fire registered webhooks for a specific event."""
     result = await db.execute(select(Webhook).where(Webhook.user_id == user_id, Webhook.is_active == True))
     webhooks = result.scalars().all()
     
-    async with httpx.AsyncClient() as client:
-        for webhook in webhooks:
-            if event_type in webhook.events:
-                start_time = time.time()
-                try:
-                    resp = await client.post(webhook.url, json={
-                        "event": event_type,
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "payload": payload
-                    }, timeout=10)
-                    
-                    status_code = resp.status_code
-                    resp_body = resp.text[:1000]
-                except Exception as e:
-                    status_code = 500
-                    resp_body = str(e)
-                
-                latency = int((time.time() - start_time) * 1000)
+    client = get_http_client(PURPOSE_WEBHOOK)
+    for webhook in webhooks:
+        if event_type in webhook.events:
+            start_time = time.time()
+            try:
+                resp = await client.post(webhook.url, json={
+                    "event": event_type,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "payload": payload
+                }, timeout=10)
                 
-                # Log webhook attempt
-                log = WebhookLog(
-                    webhook_id=webhook.id,
-                    event_type=event_type,
-                    payload=payload,
-                    status_code=status_code,
-                    response_body=resp_body,
-                    latency_ms=latency
-                )
-                db.add(log)
+                status_code = resp.status_code
+                resp_body = resp.text[:1000]
+            except Exception as e:
+                status_code = 500
+                resp_body = str(e)
+            
+            latency = int((time.time() - start_time) * 1000)
+            
+            # Log webhook attempt
+            log = WebhookLog(
+                webhook_id=webhook.id,
+                event_type=event_type,
+                payload=payload,
+                status_code=status_code,
+                response_body=resp_body,
+                latency_ms=latency
+            )
+            db.add(log)
     await db.commit()
 
+def _crawl_options(bridge: Bridge) -> dict:
+    """Crawler options derived from a bridge's configuration."""
+    return {
+        "auth_config": bridge.auth_config,
+        "interaction_script": bridge.interaction_script,
+        "session_data": bridge.session_data,
+        "resource_profile": bridge.resource_profile,
+        "extraction_schema": bridge.extraction_schema,
+        "selectors": bridge.selectors,
+        "fetch_key": str(bridge.id),
+        "readiness_budget_ms": bridge.readiness_budget_ms,
+    }
+
+async def _extract_paginated(db, crawler: CrawlerService, extractor: ExtractionService, bridge: Bridge, user_id: str):
+    """
+    Crawl every page of a paginated bridge, starting extraction for each page as soon as it arrives.
+    Returns (merged_data, latest_session_data).
+    """
+    async def extract(page):
+        data = await extractor.extract_structured_data(
+            page["html"], bridge.extraction_schema, UUID(user_id), snapshot=page["snapshot"],
+            selectors=bridge.selectors, url=page["url"]
+        )
+        return {"page": page["page"], "url": page["url"], "data": data}
+
+    pending = []
+    archived = []
+    session_data = None
+    async for page in crawler.crawl_pages(bridge.target_url, bridge.pagination, **_crawl_options(bridge)):
+        if page["session_data"]:
+            session_data = page["session_data"]
+        pending.append(asyncio.create_task(extract(page)))
+        if bridge.snapshot_retention and page["html"]:
+            archived.append(page)
+
+    if not pending:
+        raise Exception("Failed to crawl target URL")
+
+    results = await asyncio.gather(*pending)
+
+    # Archive after extraction so the shared DB session is not used concurrently
+    archive = SnapshotArchive()
+    for page in archived:
+        await archive.store(db, bridge, page["url"], page["html"], page["snapshot"])
+
+    return merge_page_results(results), session_data
+
+async def _propose_selectors(db, extractor: ExtractionService, bridge: Bridge, user_id: str, html: str, data, crawl_metrics: dict):
+    """
+    After an LLM extraction, ask once (per backoff window) for selectors reproducing it, so
+    later runs of this bridge skip the LLM. Also runs when existing selectors stopped covering
+    the page (e.g. after a redesign), replacing them.
+    """
+    if not settings.selector_autopropose or not settings.selector_extraction_enabled or not data:
+        return
+    try:
+        redis = await get_redis()
+        if not await redis.set(f"bridge:selectors:proposed:{bridge.id}", 1, nx=True, ex=settings.selector_propose_backoff_seconds):
+            return
+    except Exception as e:
+        logger.warning(f"Skipping selector proposal, Redis unavailable: {e}")
+        return
+
+    spec = await extractor.propose_selectors(html, bridge.extraction_schema, UUID(user_id), bridge.target_url, sample=data)
+    crawl_metrics["selector_proposal"] = "accepted" if spec else "rejected"
+    if spec:
+        bridge.selectors = spec
+        await db.commit()
+        logger.info(f"Saved proposed selectors for bridge {bridge.id}")
+
+async def _take_discovery(bridge: Bridge):
+    """
+    The discovery page load for a bridge that has never been extracted, if it is still cached.
+    Bridges whose page depends on auth, interactions or a JSON endpoint always crawl.
+    """
+    if bridge.last_successful_extraction or bridge.auth_config or bridge.interaction_script or bridge.json_source:
+        return None
+    return await DiscoverySession().take(bridge.target_url)
+
+async def _record_unchanged(db, bridge: Bridge, user_id: str, reason: str, start_time: float, crawl_metrics: dict):
+    """Log a run that was skipped because the page has not changed since the last extraction."""
+    logger.info(f"Page unchanged for bridge {bridge.id} ({reason}). Skipping extraction.")
+    bridge.last_error = None
+
+    usage_log = UsageLog(
+        user_id=user_id,
+        bridge_id=bridge.id,
+        method="TASK",
+        path=f"/bridges/{bridge.id}/extract",
+        status_code=304, # Not Modified: distinct from successful (200) and failed (500) runs
+        latency_ms=int((time.time() - start_time) * 1000),
+        metrics={**crawl_metrics, "skipped": reason}
+    )
+    db.add(usage_log)
+    await db.commit()
+
+    return {
+        "status": "skipped",
+        "reason": reason,
+        "bridge_id": str(bridge.id),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 async def _perform_extraction(bridge_id: str, user_id: str):
     start_time = time.time()
     async with AsyncSessionLocal() as db:
@@ -70,29 +230,35 @@ async def _perform_extraction(bridge_id: str, user_id: str):
 
             data = None
             used_source = "crawler"
+            crawl_metrics = {}
 
             # 1. Try WebMCP (High Priority)
             if bridge.has_webmcp:
                 try:
                     logger.info(f"Bridge {bridge.id} has WebMCP. Attempting browser protocol extraction...")
-                    from app.services.webmcp import WebMCPService
-                    
-                    async with WebMCPService(headless=True) as webmcp:
-                        # Discover current tools (in case they changed)
-                        tools = await webmcp.discover_tools(bridge.target_url)
-                        
-                        # Simple heuristic: Look for 'extract', 'get_data', or 'scrape'
-                        target_tool = next((t for t in tools if t['name'] in ['extract', 'get_data', 'scrape', 'get_content']), None)
-                        
-                        if target_tool:
-                            logger.info(f"Executing WebMCP tool: {target_tool['name']}")
-                            result = await webmcp.execute_tool(bridge.target_url, target_tool['name'], {})
-                            if result.get('status') == 'success':
-                                data = result.get('result')
-                                used_source = "webmcp"
-                                logger.info(f"WebMCP extraction successful for {bridge.id}")
-                        else:
-                            logger.info("No suitable WebMCP extraction tool found. Falling back.")
+                    from app.services.webmcp import WebMCPService, save_manifests, stored_manifest
+
+                    rows = (await db.execute(select(WebMCPTool).where(WebMCPTool.bridge_id == bridge.id))).scalars().all()
+                    # Trust the stored manifest (kept fresh by the sweeper); only a never-probed bridge discovers here
+                    manifest = stored_manifest(rows)
+                    run = None
+                    if manifest != []:
+                        async with WebMCPService(headless=True) as webmcp:
+                            # One page load; a cached tool that fails is re-probed on the same page
+                            run = await webmcp.discover_and_execute(bridge.target_url, manifest=manifest)
+
+                        crawl_metrics["webmcp"] = {"manifest": "probed" if run["discovered"] else "cached", "tool": run["tool_name"]}
+                        if run["discovered"]:
+                            await save_manifests(db, {bridge.id: (rows, run["tools"])})
+                            await db.commit()
+
+                    result = run["result"] if run else None
+                    if result and result.get('status') == 'success':
+                        data = result.get('result')
+                        used_source = "webmcp"
+                        logger.info(f"WebMCP extraction successful for {bridge.id}")
+                    elif not run or not run["tool_name"]:
+                        logger.info("No suitable WebMCP extraction tool found. Falling back.")
                             
                 except Exception as e:
                     logger.warning(f"WebMCP extraction failed (fallback to crawler): {e}")
@@ -100,27 +266,76 @@ async def _perform_extraction(bridge_id: str, user_id: str):
             # 2. Crawler Fallback (If WebMCP failed or yielded no data)
             if not data:
                 crawler = CrawlerService()
-                extractor = ExtractionService()
+                extractor = ExtractionService(db)
 
-                html, new_session_data = await crawler.get_page_content(
-                    url=bridge.target_url,
-                    auth_config=bridge.auth_config,
-                    interaction_script=bridge.interaction_script,
-                    session_data=bridge.session_data
-                )
-                if not html:
-                    raise Exception("Failed to crawl target URL")
+                if bridge.pagination:
+                    # Multi-page bridge: pages stream into extraction and merge into one list result
+                    data, new_session_data = await _extract_paginated(db, crawler, extractor, bridge, user_id)
+                    crawl_metrics = crawler.last_crawl_stats
+                else:
+                    state_service = StateService()
+                    try:
+                        # Conditional fetch + content hash: skip the LLM entirely when nothing changed
+                        config_hash = state_service.config_hash(bridge.extraction_schema, bridge.selectors)
+                        validators = await state_service.get_fetch_validators(bridge_id, config_hash)
+                        discovered = await _take_discovery(bridge)
+                        if discovered:
+                            # First run right after creation: reuse the page loaded for discovery
+                            html, new_session_data = discovered["html"], None
+                            snapshot = discovered["snapshot"]
+                            crawl_metrics = {
+                                "fetch_tier": "discovery_cache",
+                                "discovery_age_s": int(time.time() - discovered["captured_at"]),
+                            }
+                        else:
+                            html, new_session_data = await crawler.get_page_content(
+                                url=bridge.target_url,
+                                validators=validators,
+                                json_source=bridge.json_source,
+                                **_crawl_options(bridge)
+                            )
+                            snapshot = crawler.last_snapshot
+                            crawl_metrics = crawler.last_crawl_stats
+
+                        if crawl_metrics.get("not_modified"):
+                            return await _record_unchanged(db, bridge, user_id, "not_modified", start_time, crawl_metrics)
+                        if crawler.captured_json is not None:
+                            # Bound to the site's own JSON endpoint: read the payload, no LLM call
+                            data = resolve_json_path(crawler.captured_json, bridge.json_source.get("json_path"))
+                            used_source = "json_endpoint"
+                        elif not html:
+                            raise Exception("Failed to crawl target URL")
+                        else:
+                            content_hash = state_service.content_hash(html)
+                            if content_hash == validators.get("content_hash"):
+                                return await _record_unchanged(db, bridge, user_id, "content_unchanged", start_time, crawl_metrics)
+
+                            await SnapshotArchive().store(db, bridge, bridge.target_url, html, snapshot)
+                            data = await extractor.extract_structured_data(
+                                html, bridge.extraction_schema, UUID(user_id), snapshot=snapshot,
+                                selectors=bridge.selectors, url=bridge.target_url
+                            )
+                            crawl_metrics["extraction"] = extractor.last_extraction_stats
+                            if extractor.last_extraction_stats.get("source") == "selectors":
+                                used_source = "selectors"
+                            if not (isinstance(data, dict) and "error" in data):
+                                await state_service.save_fetch_validators(bridge_id, {
+                                    **crawl_metrics.get("validators", {}),
+                                    "content_hash": content_hash,
+                                    "config_hash": config_hash,
+                                })
+                                if used_source != "selectors":
+                                    await _propose_selectors(db, extractor, bridge, user_id, html, data, crawl_metrics)
+                    finally:
+                        await state_service.close()
                 
                 # Save new session data (Persist cookies for next run)
                 if new_session_data:
                     bridge.session_data = new_session_data
                     db.add(bridge) # Ensure update is tracked
                     logger.info(f"Updated session data for bridge {bridge.id}")
-
-                data = await extractor.extract_structured_data(html, bridge.extraction_schema, UUID(user_id))
             
             # 4. Deduplication (State Engine)
-            from app.services.state import StateService
             state_service = StateService()
             try:
                 is_seen = await state_service.is_seen(bridge_id, data)
@@ -151,7 +366,8 @@ async def _perform_extraction(bridge_id: str, user_id: str):
                 method="TASK",
                 path=f"/bridges/{bridge.id}/extract",
                 status_code=200,
-                latency_ms=latency_ms
+                latency_ms=latency_ms,
+                metrics=crawl_metrics or None
             )
             db.add(usage_log)
             await db.commit()
@@ -196,3 +412,221 @@ async def _perform_extraction(bridge_id: str, user_id: str):
                 })
 
             return {"status": "error", "message": str(e)}
+
+async def _crawl_frontier_url(extractor: ExtractionService, frontier: CrawlFrontier, bridge: Bridge, user_id: str, url: str, depth: int):
+    """Fetch and extract one frontier URL, queueing matching links found on the page."""
+    crawler = CrawlerService()
+    entry = {"url": url, "depth": depth}
+    try:
+        html, _session = await crawler.get_page_content(url=url, **_crawl_options(bridge))
+        if not html:
+            raise Exception("Failed to crawl URL")
+        entry["html"] = html
+        entry["snapshot"] = crawler.last_snapshot
+        entry["data"] = await extractor.extract_structured_data(
+            html, bridge.extraction_schema, UUID(user_id), snapshot=crawler.last_snapshot,
+            selectors=bridge.selectors, url=url
+        )
+
+        link_patterns = bridge.crawl_config.get("link_patterns")
+        max_depth = bridge.crawl_config.get("max_depth", 2)
+        if link_patterns and depth < max_depth:
+            links = await asyncio.to_thread(extract_links, html, url, link_patterns)
+            entry["links_added"] = await frontier.add(((link, 0.5) for link in links), depth=depth + 1)
+    except Exception as e:
+        logger.warning(f"Frontier crawl failed for {url}: {e}")
+        entry["error"] = str(e)
+    return entry
+
+async def _perform_webmcp_sweep():
+    """
+    Probe the WebMCP bridges whose manifests are older than webmcp_manifest_ttl_seconds
+    (never-verified and oldest first), a batch per sweep, on one shared browser context
+    with bounded concurrency, then write all results back with bulk upserts.
+    """
+    from app.services.webmcp import WebMCPService, manifest_is_stale, probe_tools, save_manifests
+
+    start_time = time.time()
+    token = uuid4().hex
+    redis = None
+    try:
+        redis = await get_redis()
+        if not await redis.set(WEBMCP_SWEEP_LOCK, token, nx=True, ex=settings.webmcp_sweep_interval_seconds):
+            logger.info("WebMCP sweep already running")
+            return {"status": "running"}
+    except Exception as e:
+        logger.warning(f"WebMCP sweep lock unavailable, sweeping anyway: {e}")
+        redis = None
+
+    try:
+        async with AsyncSessionLocal() as db:
+            bridges = (await db.execute(
+                select(Bridge).where(Bridge.has_webmcp == True, Bridge.status == "active")
+            )).scalars().all()
+            if not bridges:
+                return {"status": "completed", "verified": 0, "failed": 0}
+
+            rows_by_bridge = defaultdict(list)
+            rows = await db.execute(select(WebMCPTool).where(WebMCPTool.bridge_id.in_([b.id for b in bridges])))
+            for row in rows.scalars().all():
+                rows_by_bridge[row.bridge_id].append(row)
+
+            def oldest(bridge):
+                return min((row.last_verified_at or datetime.min for row in rows_by_bridge[bridge.id]), default=datetime.min)
+
+            due = sorted((b for b in bridges if manifest_is_stale(rows_by_bridge[b.id])), key=oldest)
+            due = due[:settings.webmcp_sweep_batch_size]
+            if not due:
+                return {"status": "completed", "verified": 0, "failed": 0}
+
+            semaphore = asyncio.Semaphore(settings.webmcp_sweep_concurrency)
+
+            async def verify(webmcp, bridge):
+                async with semaphore:
+                    try:
+                        page = await webmcp.open_page(bridge.target_url, shim=True)
+                        try:
+                            return bridge, await probe_tools(page, bridge.target_url)
+                        finally:
+                            await page.close()
+                    except Exception as e:
+                        # Unreachable pages keep their manifest; they're retried next sweep
+                        logger.warning(f"WebMCP re-verification failed for bridge {bridge.id}: {e}")
+                        return bridge, None
+
+            async with WebMCPService(headless=True) as webmcp:
+                results = await asyncio.gather(*(verify(webmcp, b) for b in due))
+
+            manifests = {bridge.id: (rows_by_bridge[bridge.id], tools) for bridge, tools in results if tools is not None}
+            await save_manifests(db, manifests)
+            await db.commit()
+
+            summary = {
+                "status": "completed",
+                "verified": len(manifests),
+                "failed": len(due) - len(manifests),
+                "remaining": max(0, sum(1 for b in bridges if manifest_is_stale(rows_by_bridge[b.id])) - len(due)),
+                "duration_ms": int((time.time() - start_time) * 1000),
+            }
+            logger.info(f"WebMCP sweep: {summary}")
+            return summary
+    finally:
+        if redis is not None:
+            try:
+                await redis.eval(RELEASE_SCRIPT, 1, WEBMCP_SWEEP_LOCK, token)
+            except Exception as e:
+                logger.warning(f"Failed to release WebMCP sweep lock: {e}")
+
+async def _perform_frontier_crawl(bridge_id: str, user_id: str):
+    start_time = time.time()
+    async with AsyncSessionLocal() as db:
+        bridge = await db.get(Bridge, bridge_id)
+        if not bridge or not bridge.crawl_config:
+            logger.error(f"Bridge {bridge_id} not found or has no crawl_config")
+            return {"status": "error", "message": "Bridge not found or not configured for site-wide crawling"}
+
+        frontier = CrawlFrontier(str(bridge.id), bridge.crawl_config)
+        if not await frontier.acquire():
+            logger.info(f"Frontier crawl for bridge {bridge_id} is already running")
+            return {"status": "running", "bridge_id": str(bridge.id)}
+
+        pages = failed = 0
+        try:
+            permission = await db.get(DomainPermission, urlparse(bridge.target_url).netloc)
+            frontier.set_robots(permission.robots_txt if permission else None)
+
+            if not await frontier.is_seeded():
+                await frontier.seed(bridge.target_url)
+            else:
+                # Resuming: whatever the previous run left in flight was never completed
+                await frontier.requeue_inflight()
+
+            extractor = ExtractionService(db)
+            semaphore = asyncio.Semaphore(settings.frontier_concurrency)
+
+            async def run(url, depth):
+                async with semaphore:
+                    return await _crawl_frontier_url(extractor, frontier, bridge, user_id, url, depth)
+
+            deadline = start_time + settings.frontier_task_seconds
+            while pages < settings.frontier_urls_per_task and time.time() < deadline:
+                batch = await frontier.pop(min(settings.frontier_batch_size, settings.frontier_urls_per_task - pages))
+                if not batch:
+                    break
+                try:
+                    results = await asyncio.wait_for(
+                        asyncio.gather(*(run(url, depth) for url, depth in batch)),
+                        timeout=max(deadline - time.time(), 1),
+                    )
+                except asyncio.TimeoutError:
+                    # Out of time mid-batch: put the unfinished batch back for the next run
+                    logger.info(f"Frontier crawl for bridge {bridge_id} reached its time budget mid-batch")
+                    await db.rollback()
+                    await frontier.requeue_inflight()
+                    break
+
+                archive = SnapshotArchive()
+                for entry in results:
+                    if "html" in entry:
+                        await archive.store(db, bridge, entry["url"], entry["html"], entry["snapshot"])
+                await db.commit()
+
+                batch_failed = sum(1 for entry in results if "error" in entry)
+                await frontier.complete([url for url, _depth in batch], batch_failed)
+                await frontier.refresh()
+                pages += len(results)
+                failed += batch_failed
+
+                await _fire_webhooks(db, user_id, "crawl.batch", {
+                    "bridge_id": str(bridge.id),
+                    "results": [
+                        {key: entry.get(key) for key in ("url", "data", "error") if key in entry}
+                        for entry in results
+                    ]
+                })
+
+            stats = await frontier.stats()
+            status = "continuing" if stats["queued"] else "complete"
+            if status == "complete":
+                await frontier.set_state("complete")
+                bridge.last_successful_extraction = datetime.utcnow()
+
+            db.add(UsageLog(
+                user_id=user_id,
+                bridge_id=bridge.id,
+                method="TASK",
+                path=f"/bridges/{bridge.id}/crawl",
+                status_code=200,
+                latency_ms=int((time.time() - start_time) * 1000),
+                metrics={"pages": pages, "failed": failed, "frontier": stats}
+            ))
+            await db.commit()
+            logger.info(f"Frontier crawl for bridge {bridge_id}: {pages} pages ({failed} failed), {stats['queued']} queued")
+            return {"status": status, "bridge_id": str(bridge.id), "pages": pages, "failed": failed, "frontier": stats}
+        except Exception as e:
+            logger.error(f"Frontier crawl failed for bridge {bridge_id}: {e}")
+            await frontier.set_state("error")
+            return {"status": "error", "message": str(e)}
+        finally:
+            await frontier.release()
+
+async def _perform_reextraction(bridge_id: str, user_id: str, limit: int = None, extraction_schema: dict = None):
+    start_time = time.time()
+    async with AsyncSessionLocal() as db:
+        bridge = await db.get(Bridge, bridge_id)
+        if not bridge:
+            logger.error(f"Bridge {bridge_id} not found for re-extraction task")
+            return {"status": "error", "message": "Bridge not found"}
+
+        results = await SnapshotArchive().reextract(db, bridge, UUID(user_id), limit, extraction_schema)
+        failed = sum(1 for r in results if "error" in r or (isinstance(r.get("data"), dict) and "error" in r["data"]))
+        logger.info(f"Re-extracted {len(results)} archived snapshots for bridge {bridge_id} ({failed} failed)")
+
+        return {
+            "status": "success",
+            "bridge_id": str(bridge.id),
+            "snapshots": len(results),
+            "failed": failed,
+            "latency_ms": int((time.time() - start_time) * 1000),
+            "results": results
+        }
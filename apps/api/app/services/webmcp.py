@@ -1,148 +1,297 @@
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+from uuid import UUID
+from playwright.async_api import BrowserContext, Page
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.browser_pool import BrowserPool, POOL_WEBMCP, WEBMCP_LAUNCH_ARGS, get_browser_pool
+from app.core.config import settings
+from app.models import Bridge, WebMCPTool
+
+from app.services.politeness import PolitenessScheduler
 
 logger = logging.getLogger(__name__)
 
+# Stand-in window.modelContext for discovery only, injected before page scripts run. It is
+# installed only when the browser has no native modelContext, and it cannot execute tools:
+# execution always goes to the site's real implementation.
+WEBMCP_SHIM_SCRIPT = """
+console.log("Polyfill script starting...");
+try {
+    if (window.modelContext || navigator.modelContext) {
+        console.log("Native WebMCP present; shim not injected.");
+    } else {
+        console.log("Injecting WebMCP Shim...");
+
+        const registry = [];
+
+        const mockContext = {
+            __webmcpShim: true,
+            registerTool: (tool) => {
+                console.log("Shim: Tool registered:", tool.name);
+                registry.push(tool);
+            },
+            getTools: async () => registry
+        };
+
+        window.modelContext = mockContext;
+        navigator.modelContext = mockContext;
+        console.log("Shim injected successfully. window.modelContext is now:", typeof window.modelContext);
+    }
+} catch (e) {
+    console.error("Shim injection failed:", e);
+}
+"""
+
+GET_TOOLS_SCRIPT = """
+async (waitMs) => {
+    try {
+        if (typeof window.modelContext.getTools !== 'function') return [];
+
+        // Poll until page scripts stop registering tools, instead of sleeping a fixed second
+        const deadline = Date.now() + waitMs;
+        let tools = await window.modelContext.getTools();
+        while (Date.now() < deadline) {
+            await new Promise(r => setTimeout(r, 100));
+            const next = await window.modelContext.getTools();
+            if (tools.length && next.length === tools.length) break;
+            tools = next;
+        }
+        return tools.map(t => ({
+            tool_name: t.name,
+            tool_type: t.type || 'unknown',
+            description: t.description || '',
+            parameters_schema: t.parameters || {}
+        }));
+    } catch (e) {
+        console.error("WebMCP getTools error:", e);
+        return [];
+    }
+}
+"""
+
+CALL_TOOL_SCRIPT = """
+async ({name, params, waitMs}) => {
+    if (!window.modelContext || typeof window.modelContext.executeTool !== 'function') {
+        throw new Error("WebMCP not available");
+    }
+
+    // With a cached manifest nothing waited for registration yet, so wait for this tool
+    const deadline = Date.now() + waitMs;
+    while (typeof window.modelContext.getTools === 'function') {
+        const tools = await window.modelContext.getTools();
+        if (tools.some(t => t.name === name)) break;
+        if (Date.now() >= deadline) throw new Error(`Tool not registered: ${name}`);
+        await new Promise(r => setTimeout(r, 100));
+    }
+
+    // Note: The spec might evolve, assuming executeTool(name, params)
+    return await window.modelContext.executeTool(name, params);
+}
+"""
+
+# Tools a bridge's extraction run will call, in order of preference
+EXTRACTION_TOOL_NAMES = ("extract", "get_data", "scrape", "get_content")
+
+
+async def probe_tools(page: Page, url: str) -> List[Dict[str, Any]]:
+    """Read the tools registered on `window.modelContext` of an already loaded page."""
+    has_webmcp = await page.evaluate("() => typeof window.modelContext !== 'undefined'")
+    logger.info(f"WebMCP Check Result: {has_webmcp}")
+    
+    if not has_webmcp:
+        # Try to see why
+        debug_info = await page.evaluate("() => ({ windowKeys: Object.keys(window).filter(k => k.includes('model')), navigatorKeys: Object.keys(navigator).filter(k => k.includes('model')) })")
+        logger.info(f"Debug Info: {debug_info}")
+        logger.info(f"No WebMCP global found on {url}")
+        return []
+    
+    return await page.evaluate(GET_TOOLS_SCRIPT, settings.webmcp_tool_wait_ms)
+
+
+def pick_extraction_tool(tools: List[Dict[str, Any]]) -> Optional[str]:
+    names = {t["tool_name"] for t in tools}
+    return next((name for name in EXTRACTION_TOOL_NAMES if name in names), None)
+
+
+def stored_manifest(rows: List[WebMCPTool]) -> Optional[List[Dict[str, Any]]]:
+    """
+    The bridge's stored tool manifest (available tools only). None means the bridge has
+    never been probed; an empty list means it was, and exposes nothing usable.
+    """
+    if not rows:
+        return None
+    return [
+        {
+            "tool_name": row.tool_name,
+            "tool_type": row.tool_type,
+            "description": row.description,
+            "parameters_schema": row.parameters_schema,
+        }
+        for row in rows
+        if row.is_available
+    ]
+
+
+def manifest_is_stale(rows: List[WebMCPTool], now: Optional[datetime] = None) -> bool:
+    """Whether the sweeper should re-verify these rows (any older than webmcp_manifest_ttl_seconds)."""
+    if not rows:
+        return True
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=settings.webmcp_manifest_ttl_seconds)
+    return any(row.last_verified_at is None or row.last_verified_at < cutoff for row in rows)
+
+
+def diff_manifest(
+    bridge_id: UUID,
+    rows: List[WebMCPTool],
+    tools: List[Dict[str, Any]],
+    now: datetime,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Diff a probed manifest against the stored rows: (inserts, updates) as parameter sets
+    for bulk INSERT / UPDATE-by-primary-key. Tools that disappeared are kept but marked
+    unavailable, so their history survives a temporary outage.
+    """
+    existing = {row.tool_name: row for row in rows}
+    inserts, updates = [], []
+    for tool in tools:
+        values = {
+            "tool_type": tool.get("tool_type") or "unknown",
+            "description": tool.get("description"),
+            "parameters_schema": tool.get("parameters_schema"),
+            "is_available": True,
+            "last_verified_at": now,
+            "updated_at": now,
+        }
+        row = existing.pop(tool["tool_name"], None)
+        if row is None:
+            inserts.append({"bridge_id": bridge_id, "tool_name": tool["tool_name"], **values})
+        else:
+            updates.append({"id": row.id, **values})
+    for row in existing.values():
+        updates.append({"id": row.id, "is_available": False, "last_verified_at": now, "updated_at": now})
+    return inserts, updates
+
+
+async def save_manifests(
+    db: AsyncSession,
+    manifests: Dict[UUID, Tuple[List[WebMCPTool], List[Dict[str, Any]]]],
+):
+    """
+    Write probed manifests ({bridge_id: (stored rows, probed tools)}) with one bulk
+    INSERT, one bulk UPDATE and one webmcp_tool_count update. The caller commits.
+    """
+    if not manifests:
+        return
+    now = datetime.utcnow()
+    inserts, updates = [], []
+    for bridge_id, (rows, tools) in manifests.items():
+        new, changed = diff_manifest(bridge_id, rows, tools, now)
+        inserts.extend(new)
+        updates.extend(changed)
+
+    if inserts:
+        await db.execute(insert(WebMCPTool), inserts)
+    if updates:
+        await db.execute(update(WebMCPTool), updates)
+    await db.execute(
+        update(Bridge),
+        [{"id": bridge_id, "webmcp_tool_count": len(tools)} for bridge_id, (_, tools) in manifests.items()],
+    )
+
+
 class WebMCPService:
     """
     Service for discovering and executing WebMCP tools on a webpage.
     Uses Playwright to control a browser instance (ideally Chrome Canary)
-    with WebMCP flags enabled.
+    with WebMCP flags enabled, borrowed from the shared WebMCP browser pool.
     """
     
     def __init__(self, headless: bool = True):
         self.headless = headless
-        self.playwright = None
-        self.browser: Optional[Browser] = None
+        self.pool: Optional[BrowserPool] = None
         self.context: Optional[BrowserContext] = None
+        self._stack: Optional[AsyncExitStack] = None
     
     async def __aenter__(self):
-        """Launch browser with WebMCP flags."""
-        self.playwright = await async_playwright().start()
-        
-        # Try to launch Chrome (Canary if available path provided, else default Chromium)
-        # Note: In production, one would point `executable_path` to Chrome Canary
+        """Borrow a context from the WebMCP browser pool (local or remote browsers with WebMCP flags)."""
+        self._stack = AsyncExitStack()
         try:
-            self.browser = await self.playwright.chromium.launch(
-                channel="chrome", # Attempts to use installed Chrome
-                headless=self.headless,
-                args=[
-                    "--enable-features=WebMCP",
-                    "--enable-experimental-web-platform-features",
-                    "--no-sandbox", # Often needed in containerized envs
-                    "--disable-setuid-sandbox"
-                ]
-            )
-        except Exception as e:
-            logger.warning(f"Failed to launch 'chrome' channel, falling back to bundled chromium: {e}")
-            self.browser = await self.playwright.chromium.launch(
-                headless=self.headless,
-                args=[
-                    "--enable-features=WebMCP",
-                    "--enable-experimental-web-platform-features"
-                ]
-            )
-            
-        self.context = await self.browser.new_context()
+            if self.headless:
+                self.pool = await get_browser_pool(POOL_WEBMCP)
+            else:
+                # Headed browsers are for local debugging: use a private, local pool
+                self.pool = BrowserPool(size=1, headless=False, launch_args=WEBMCP_LAUNCH_ARGS, channel="chrome")
+                await self.pool.start()
+                self._stack.push_async_callback(self.pool.close)
+            self.context = await self._stack.enter_async_context(self.pool.context())
+        except Exception:
+            await self._stack.aclose()
+            raise
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Cleanup resources."""
-        if self.context:
-            await self.context.close()
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
+        """Return the context to the pool."""
+        if self._stack:
+            await self._stack.aclose()
+            self._stack = None
+        self.context = None
     
-    async def discover_tools(self, url: str) -> List[Dict[str, Any]]:
+    async def open_page(self, url: str, shim: bool = False) -> Page:
         """
-        Navigate to a URL and discover WebMCP tools exposed on `window.modelContext`.
-        
-        Returns a list of tool definitions.
+        Open a page and navigate to `url`; the caller closes it. `shim` injects the
+        discovery-only WebMCP shim, so only probing paths may pass it.
         """
         page = await self.context.new_page()
-        
+
         # Debug Console
         page.on("console", lambda msg: logger.info(f"BROWSER CONSOLE: {msg.text}"))
         page.on("pageerror", lambda exc: logger.error(f"BROWSER ERROR: {exc}"))
 
         try:
-            # Inject Polyfill/Shim ALWAYS for debugging
-            await page.add_init_script("""
-                console.log("Polyfill script starting...");
-                try {
-                    const params = new URLSearchParams(window.location.search);
-                    console.log("Injecting WebMCP Shim...");
-                    
-                    const registry = [];
-                    
-                    const mockContext = {
-                        registerTool: (tool) => {
-                            console.log("Shim: Tool registered:", tool.name);
-                            registry.push(tool);
-                        },
-                        getTools: async () => registry,
-                        executeTool: async (name, params) => {
-                             console.log("Shim: Executing", name, params);
-                             return { status: "success", result: "Executed via shim" };
-                        }
-                    };
-                    
-                    window.modelContext = mockContext;
-                    navigator.modelContext = mockContext;
-                    console.log("Shim injected successfully. window.modelContext is now:", typeof window.modelContext);
-                } catch (e) {
-                    console.error("Shim injection failed:", e);
-                }
-            """)
-
-            # Navigate to the page
-            try:
+            if shim:
+                await page.add_init_script(WEBMCP_SHIM_SCRIPT)
+            async with PolitenessScheduler().slot(urlparse(url).netloc):
                 await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            except Exception as nav_error:
-                logger.error(f"Navigation failed: {nav_error}")
-                return []
-
-            # Check for WebMCP presence
-            has_webmcp = await page.evaluate("() => typeof window.modelContext !== 'undefined'")
-            logger.info(f"WebMCP Check Result: {has_webmcp}")
-            
-            if not has_webmcp:
-                # Try to see why
-                debug_info = await page.evaluate("() => ({ windowKeys: Object.keys(window).filter(k => k.includes('model')), navigatorKeys: Object.keys(navigator).filter(k => k.includes('model')) })")
-                logger.info(f"Debug Info: {debug_info}")
-                logger.info(f"No WebMCP global found on {url}")
-                return []
-            
-            # 2. Get tool definitions
-            tools = await page.evaluate("""
-                async () => {
-                    try {
-                        // Allow small delay for page scripts to register tools
-                        await new Promise(r => setTimeout(r, 1000));
-                        
-                        if (typeof window.modelContext.getTools === 'function') {
-                            const tools = await window.modelContext.getTools();
-                            return tools.map(t => ({
-                                tool_name: t.name,
-                                tool_type: t.type || 'unknown',
-                                description: t.description || '',
-                                parameters_schema: t.parameters || {} 
-                            }));
-                        }
-                        return [];
-                    } catch (e) {
-                        console.error("WebMCP getTools error:", e);
-                        return [];
-                    }
-                }
-            """)
-            
+        except Exception:
+            await page.close()
+            raise
+        return page
+
+    async def call_tool(self, page: Page, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a tool on an already loaded page."""
+        try:
+            result = await page.evaluate(
+                CALL_TOOL_SCRIPT,
+                {"name": tool_name, "params": parameters, "waitMs": settings.webmcp_tool_wait_ms},
+            )
+            return {"status": "success", "result": result}
+        except Exception as e:
+            logger.error(f"Tool execution failed: {e}")
+            return {"status": "error", "error": str(e)}
+
+    async def discover_tools(self, url: str) -> List[Dict[str, Any]]:
+        """
+        Navigate to a URL and discover WebMCP tools exposed on `window.modelContext`.
+        
+        Returns a list of tool definitions.
+        """
+        try:
+            page = await self.open_page(url, shim=True)
+        except Exception as nav_error:
+            logger.error(f"Navigation failed: {nav_error}")
+            return []
+
+        try:
+            tools = await probe_tools(page, url)
             logger.info(f"Discovered {len(tools)} tools on {url}")
             return tools
-            
         except Exception as e:
             logger.error(f"Error discovering tools on {url}: {e}")
             return []
@@ -153,24 +302,79 @@ class WebMCPService:
         """
         Execute a WebMCP tool on a page.
         """
-        page = await self.context.new_page()
         try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            
-            result = await page.evaluate("""
-                async ({name, params}) => {
-                    if (!window.modelContext) throw new Error("WebMCP not available");
-                    
-                    // Call executeTool
-                    // Note: The spec might evolve, assuming executeTool(name, params)
-                    return await window.modelContext.executeTool(name, params);
-                }
-            """, {"name": tool_name, "params": parameters})
-            
-            return {"status": "success", "result": result}
-            
+            page = await self.open_page(url)
         except Exception as e:
             logger.error(f"Tool execution failed: {e}")
             return {"status": "error", "error": str(e)}
+
+        try:
+            return await self.call_tool(page, tool_name, parameters)
+        finally:
+            await page.close()
+
+    async def execute_batch(
+        self,
+        page: Page,
+        calls: List[Dict[str, Any]],
+        parallel: bool = False,
+        stop_on_error: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several tool calls ({"tool_name", "parameters"}) on one loaded page, in order
+        or all at once. Results come back in call order, each with its duration;
+        with `stop_on_error` an ordered batch skips the calls after a failure.
+        """
+        async def run(call):
+            started = time.monotonic()
+            outcome = await self.call_tool(page, call["tool_name"], call.get("parameters") or {})
+            return {"tool_name": call["tool_name"], **outcome, "duration_ms": int((time.monotonic() - started) * 1000)}
+
+        if parallel:
+            return list(await asyncio.gather(*(run(call) for call in calls)))
+
+        results = []
+        failed = False
+        for call in calls:
+            if failed and stop_on_error:
+                results.append({"tool_name": call["tool_name"], "status": "skipped", "duration_ms": 0})
+                continue
+            result = await run(call)
+            failed = failed or result["status"] != "success"
+            results.append(result)
+        return results
+
+    async def discover_and_execute(
+        self,
+        url: str,
+        manifest: Optional[List[Dict[str, Any]]] = None,
+        tool_name: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Discover and execute on one page load. With a cached `manifest` discovery is
+        skipped; if the cached tool turns out to be gone, the same page is probed again.
+        `tool_name` defaults to the preferred extraction tool in the manifest.
+
+        Returns {"tools", "discovered", "tool_name", "result"}; "discovered" tells the
+        caller the manifest was re-probed and should be saved. Runs without the shim, so
+        results always come from the site's own tools.
+        """
+        page = await self.open_page(url)
+        try:
+            tools, discovered = manifest, False
+            if tools is None:
+                tools, discovered = await probe_tools(page, url), True
+
+            name = tool_name or pick_extraction_tool(tools)
+            result = await self.call_tool(page, name, parameters or {}) if name else None
+
+            if not discovered and result is not None and result["status"] != "success":
+                logger.info(f"Cached WebMCP manifest for {url} looks stale; probing the page again")
+                tools, discovered = await probe_tools(page, url), True
+                name = tool_name or pick_extraction_tool(tools)
+                result = await self.call_tool(page, name, parameters or {}) if name else None
+
+            return {"tools": tools, "discovered": discovered, "tool_name": name, "result": result}
         finally:
             await page.close()
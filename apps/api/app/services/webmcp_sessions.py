@@ -0,0 +1,142 @@
+"""
+Short-lived WebMCP page sessions.
+
+A batch execute can keep its page open under a handle so an agent's follow-up calls
+skip the browser checkout and navigation. Sessions live in the API process that opened
+them (the page is a live Playwright object), expire after `webmcp_session_ttl_seconds`
+without use, and are capped at `webmcp_max_sessions`, and at half the WebMCP browser pool,
+since each one holds a pooled context that discovery, execution and the sweeper also need.
+"""
+import asyncio
+import logging
+import secrets
+import time
+from typing import Dict, Optional
+
+from playwright.async_api import Page
+
+from app.core.browser_pool import POOL_WEBMCP, BrowserPool, get_browser_pool
+from app.core.config import settings
+from app.services.webmcp import WebMCPService
+
+logger = logging.getLogger(__name__)
+
+REAPER_INTERVAL_SECONDS = 5
+
+
+class WebMCPSessionLimitError(RuntimeError):
+    """Every session slot in this process is in use."""
+
+
+def session_limit(pool: BrowserPool) -> int:
+    """Sessions this process may keep open: at most half the pool's contexts stay parked."""
+    return min(settings.webmcp_max_sessions, pool.capacity // 2)
+
+
+class WebMCPSession:
+    def __init__(self, service: WebMCPService, page: Page, url: str):
+        self.id = secrets.token_urlsafe(16)
+        self.service = service
+        self.page = page
+        self.url = url
+        # Batches on one page run one at a time
+        self.lock = asyncio.Lock()
+        self.expires_at = 0.0
+        self.touch()
+
+    def touch(self):
+        self.expires_at = time.monotonic() + settings.webmcp_session_ttl_seconds
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at and not self.lock.locked()
+
+    @property
+    def expires_in(self) -> int:
+        return max(0, int(self.expires_at - time.monotonic()))
+
+    async def close(self):
+        try:
+            await self.page.close()
+        except Exception as e:
+            logger.debug(f"WebMCP session {self.id} page already gone: {e}")
+        await self.service.__aexit__(None, None, None)
+
+
+class WebMCPSessionStore:
+    def __init__(self):
+        self.sessions: Dict[str, WebMCPSession] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def open(self, url: str) -> WebMCPSession:
+        """Check out a WebMCP context, load `url` and register the page under a new handle."""
+        await self._close_expired()
+        limit = session_limit(await get_browser_pool(POOL_WEBMCP))
+        if len(self.sessions) >= limit:
+            raise WebMCPSessionLimitError(f"All {limit} WebMCP sessions are in use")
+
+        service = WebMCPService(headless=True)
+        await service.__aenter__()
+        try:
+            page = await service.open_page(url)
+        except Exception:
+            await service.__aexit__(None, None, None)
+            raise
+
+        session = WebMCPSession(service, page, url)
+        self.sessions[session.id] = session
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+        logger.info(f"Opened WebMCP session {session.id} on {url}")
+        return session
+
+    def get(self, session_id: str) -> Optional[WebMCPSession]:
+        session = self.sessions.get(session_id)
+        if session is None or session.expired:
+            return None
+        # Renewed before the caller's first await, so the reaper can't close it underneath
+        session.touch()
+        return session
+
+    async def close(self, session_id: str) -> bool:
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        await session.close()
+        logger.info(f"Closed WebMCP session {session_id}")
+        return True
+
+    async def close_all(self):
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        for session_id in list(self.sessions):
+            await self.close(session_id)
+
+    async def _close_expired(self):
+        for session_id in [sid for sid, session in self.sessions.items() if session.expired]:
+            await self.close(session_id)
+
+    async def _reap(self):
+        """Close idle sessions; exits once there are none left."""
+        while self.sessions:
+            await asyncio.sleep(REAPER_INTERVAL_SECONDS)
+            try:
+                await self._close_expired()
+            except Exception as e:
+                logger.warning(f"WebMCP session reaper error: {e}")
+
+
+_store: Optional[WebMCPSessionStore] = None
+
+
+def get_webmcp_sessions() -> WebMCPSessionStore:
+    global _store
+    if _store is None:
+        _store = WebMCPSessionStore()
+    return _store
+
+
+async def close_webmcp_sessions():
+    if _store is not None:
+        await _store.close_all()
@@ -32,6 +32,16 @@ async def lifespan(app: FastAPI):
     # Cleanup connections
     await close_redis()
     
+    # Kept-alive WebMCP pages go back before the pools close
+    from app.services.webmcp_sessions import close_webmcp_sessions
+    await close_webmcp_sessions()
+
+    from app.core.browser_pool import close_browser_pool
+    await close_browser_pool()
+    
+    from app.core.http_clients import close_http_clients
+    await close_http_clients()
+    
     # Stop Security Monitoring
     from app.core.watcher import stop_background_watcher
     stop_background_watcher()
@@ -80,7 +90,7 @@ async def health_check(db: AsyncSession = Depends(get_db)):
     import typing
     import subprocess
     
-    health_status: typing.Dict[str, str] = {
+    health_status: typing.Dict[str, typing.Any] = {
         "status": "healthy",
         "database": "disconnected",
         "redis": "disconnected",
@@ -113,6 +123,25 @@ async def health_check(db: AsyncSession = Depends(get_db)):
             health_status["playwright"] = "ready"
     except Exception:
         pass
+    
+    # Scheduling delay across all workers
+    try:
+        from app.services.politeness import get_scheduler_stats
+        health_status["politeness"] = await get_scheduler_stats()
+    except Exception as e:
+        logger.error(f"Politeness stats unavailable: {e}")
+    
+    # Browser Pool metrics (only present once a crawl has started the pool)
+    from app.core.browser_pool import get_browser_pool_stats
+    pool_stats = get_browser_pool_stats()
+    if pool_stats:
+        health_status["browser_pool"] = pool_stats
+    
+    # Outbound HTTP connection reuse
+    from app.core.http_clients import get_http_client_stats
+    http_stats = get_http_client_stats()
+    if http_stats:
+        health_status["http_clients"] = http_stats
         
     return health_status
 
@@ -0,0 +1,33 @@
+import sqlite3
+import os
+
+DB_PATH = "test.db"
+
+def migrate_db():
+    if not os.path.exists(DB_PATH):
+        print(f"Database {DB_PATH} not found.")
+        return
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        columns = [
+            ("bridges", "resource_profile", "VARCHAR(50)"),
+            ("usage_logs", "metrics", "JSON"),
+        ]
+        for table, column, column_type in columns:
+            try:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                print(f"Added '{column}' column to '{table}'.")
+            except sqlite3.OperationalError as e:
+                if "duplicate column name" in str(e):
+                    print(f"Column '{column}' already exists. Skipping.")
+                else:
+                    print(f"Migration failed: {e}")
+        conn.commit()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
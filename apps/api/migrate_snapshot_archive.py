@@ -0,0 +1,47 @@
+import sqlite3
+import os
+
+DB_PATH = "test.db"
+
+def migrate_db():
+    if not os.path.exists(DB_PATH):
+        print(f"Database {DB_PATH} not found.")
+        return
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    try:
+        try:
+            print("Adding 'snapshot_retention' column to 'bridges' table...")
+            cursor.execute("ALTER TABLE bridges ADD COLUMN snapshot_retention INTEGER")
+            print("Added 'snapshot_retention' column.")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" in str(e):
+                print("Column 'snapshot_retention' already exists. Skipping.")
+            else:
+                print(f"Migration failed: {e}")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS page_snapshots (
+                id TEXT PRIMARY KEY,
+                bridge_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                content_hash VARCHAR(64) NOT NULL,
+                snapshot_hash VARCHAR(64),
+                size_bytes INTEGER NOT NULL,
+                compressed_bytes INTEGER NOT NULL,
+                captured_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(bridge_id) REFERENCES bridges(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_page_snapshots_bridge_id ON page_snapshots (bridge_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_page_snapshots_content_hash ON page_snapshots (content_hash)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_page_snapshots_snapshot_hash ON page_snapshots (snapshot_hash)")
+        conn.commit()
+        print("Migration successful: Created 'page_snapshots' table.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_db()
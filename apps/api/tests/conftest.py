@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+import pytest
+
+
+class FakeProvider:
+    """LLM provider stand-in: `respond(messages)` builds the JSON reply, calls are counted."""
+
+    def __init__(self):
+        self.respond = lambda messages: {}
+        self.calls = 0
+        self.active = self.peak = 0
+
+    def get_provider_name(self):
+        return "fake"
+
+    def get_max_context_length(self):
+        return 128000
+
+    async def complete(self, messages, temperature=0, response_format=None):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return json.dumps(self.respond(messages))
+
+
+@pytest.fixture
+def fake_provider():
+    return FakeProvider()
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio calls the services make."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def getdel(self, key):
+        return self.values.pop(key, None)
+
+    async def hgetall(self, key):
+        return dict(self.values.get(key) or {})
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
@@ -0,0 +1,109 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from app.core import browser_pool
+from app.core.browser_pool import MB, BrowserCapacityError, BrowserPool, PooledBrowser
+from app.core.config import settings
+
+
+class FakeBrowser:
+    def is_connected(self):
+        return True
+
+    async def close(self):
+        pass
+
+
+def test_memory_per_page_is_measured_against_the_idle_baseline():
+    pooled = PooledBrowser(FakeBrowser())
+
+    assert pooled.record_memory(300 * MB) is None
+    pooled.open_pages = 2
+    assert pooled.record_memory(500 * MB) == 100
+    pooled.open_pages = 4
+    assert pooled.record_memory(700 * MB) == 100
+
+    stats = pooled.memory_stats()
+    assert stats["idle_rss_mb"] == 300
+    assert stats["peak_rss_mb"] == 700
+    assert stats["mb_per_page"] == 100
+
+
+def test_checkout_queues_until_a_page_closes_then_refuses(monkeypatch):
+    monkeypatch.setattr(settings, "browser_max_open_pages", 1)
+    monkeypatch.setattr(settings, "browser_capacity_wait_seconds", 1)
+
+    async def run():
+        pool = BrowserPool(size=1, max_contexts_per_browser=4)
+        pool._playwright = object()
+        full = PooledBrowser(FakeBrowser())
+        full.open_pages = 1
+        pool._browsers = [full]
+
+        asyncio.get_running_loop().call_later(0.2, pool._page_closed, full)
+        assert await pool._checkout() is full
+        assert pool.stats()["memory"]["capacity_waits"] == 1
+
+        full.open_pages = 1
+        with pytest.raises(BrowserCapacityError):
+            await pool._checkout()
+        assert pool.stats()["memory"]["capacity_refusals"] == 1
+
+    asyncio.run(run())
+
+
+def test_browser_over_rss_limit_is_recycled(monkeypatch):
+    monkeypatch.setattr(settings, "browser_max_rss_mb", 1000)
+    monkeypatch.setattr(browser_pool, "_tree_rss", lambda pid: 1500 * MB)
+
+    async def run():
+        pool = BrowserPool(size=1)
+        pooled = PooledBrowser(FakeBrowser(), pid=1234)
+        pooled.active_contexts = 1
+        pool._browsers = [pooled]
+
+        await pool._sample_memory()
+        assert pooled.over_memory and pooled.retiring
+        assert pool.stats()["memory"]["memory_recycles"] == 1
+
+        await pool._checkin(pooled)
+        assert pool._browsers == []
+
+    asyncio.run(run())
+
+
+def test_loop_change_stops_the_previous_loops_browser_processes(monkeypatch):
+    psutil = pytest.importorskip("psutil")
+    # Stand-ins for the Playwright driver and a launched browser of a pool left on a dead loop
+    driver = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    launched = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    created = []
+
+    def create_pool(kind):
+        pool = BrowserPool(size=1)
+        created.append(pool)
+        return pool
+
+    async def start(self):
+        if not created.index(self):
+            self._playwright = object()
+            self._driver_pid = driver.pid
+            self._browsers = [PooledBrowser(FakeBrowser(), pid=launched.pid)]
+
+    monkeypatch.setattr(browser_pool, "_create_pool", create_pool)
+    monkeypatch.setattr(BrowserPool, "start", start)
+    monkeypatch.setattr(browser_pool, "_pools", {})
+    try:
+        first = asyncio.run(browser_pool.get_browser_pool())
+        second = asyncio.run(browser_pool.get_browser_pool())
+
+        assert second is not first and browser_pool._pools == {browser_pool.POOL_DEFAULT: second}
+        assert not psutil.pid_exists(driver.pid) and not psutil.pid_exists(launched.pid)
+        assert first._browsers == [] and first._playwright is None
+    finally:
+        driver.kill()
+        launched.kill()
+        browser_pool._pool_loop = None
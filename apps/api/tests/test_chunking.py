@@ -0,0 +1,60 @@
+import asyncio
+
+from app.services import extractor as extractor_module
+from app.services.chunking import merge_chunk_results, split_chunks
+from app.services.extractor import ExtractionService
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "store": {"type": "string"},
+        "products": {"type": "array", "items": {"type": "object", "properties": {"name": {}, "url": {}, "price": {}}}},
+    },
+}
+
+
+def test_split_chunks_overlaps_on_line_boundaries():
+    text = "\n".join(f"- item {i:02d} " + "x" * 20 for i in range(20))
+    chunks = split_chunks(text, chunk_tokens=40, overlap_tokens=8)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 160 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.split("\n")[0] == previous.split("\n")[-1]
+    assert {line for chunk in chunks for line in chunk.split("\n")} == set(text.split("\n"))
+
+
+def test_merge_concatenates_lists_dedupes_overlap_and_keeps_first_scalar():
+    merged = merge_chunk_results([
+        {"store": "Acme", "products": [{"name": "A", "url": "/a"}, {"name": "B", "url": "/b"}]},
+        {"store": "Acme Outlet", "products": [{"name": "B", "url": "/b", "price": "$2"}, {"name": "C", "url": "/c"}]},
+        {"store": None, "products": []},
+        {"error": "bad json"},
+    ], SCHEMA)
+    assert merged == {
+        "store": "Acme",
+        "products": [{"name": "A", "url": "/a"}, {"name": "B", "url": "/b", "price": "$2"}, {"name": "C", "url": "/c"}],
+    }
+
+
+def products_from_lines(messages):
+    page = messages[1]["content"]
+    items = [{"name": line.split()[1], "url": f"/{line.split()[1]}"} for line in page.split("\n") if line.strip().startswith("- ")]
+    return {"store": "Acme", "products": items}
+
+
+def test_large_pages_are_extracted_in_concurrent_chunks(monkeypatch, fake_provider):
+    monkeypatch.setattr(extractor_module.settings, "extraction_chunk_tokens", 1000)
+    monkeypatch.setattr(extractor_module.settings, "llm_max_concurrency_per_provider", 2)
+    rows = "".join(f"<li>p{i:03d} {'lorem ipsum ' * 10}</li>" for i in range(200))
+    html = f"<html><body><h1>Acme</h1><ul>{rows}</ul></body></html>"
+
+    service = ExtractionService(db=None)
+    fake_provider.respond = products_from_lines
+    service._provider = fake_provider
+    result = asyncio.run(service.extract_structured_data(html, SCHEMA, user_id=None))
+
+    assert [p["name"] for p in result["products"]] == [f"p{i:03d}" for i in range(200)]
+    stats = service.last_extraction_stats
+    assert stats["chunks"] > 2 and stats["failed_chunks"] == 0
+    assert stats["parallelism"] == fake_provider.peak == 2
+    assert "merge_ms" in stats
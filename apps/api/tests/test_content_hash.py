@@ -0,0 +1,26 @@
+import asyncio
+
+from app.services.state import StateService
+
+
+def test_content_hash_ignores_volatile_markup():
+    state = StateService()
+    first = '<html><head><script>var t=1</script><meta name="csrf-token" content="abc"></head><body nonce="a1"><p>Price: 10</p><!-- rendered 12:00 --></body></html>'
+    second = '<html><head><script>var t=2</script><meta name="csrf-token" content="xyz"></head><body nonce="b2">\n  <p>Price:   10</p>\n</body></html>'
+    assert state.content_hash(first) == state.content_hash(second)
+
+
+def test_content_hash_detects_content_change():
+    state = StateService()
+    assert state.content_hash("<p>Price: 10</p>") != state.content_hash("<p>Price: 12</p>")
+
+
+def test_fetch_validators_are_dropped_when_schema_or_selectors_change(fake_redis):
+    state = StateService()
+    config = state.config_hash({"title": "string"}, None)
+    fake_redis.values["bridge:validators:b1"] = {"etag": '"v1"', "content_hash": "abc", "config_hash": config}
+    state.redis = fake_redis
+
+    assert asyncio.run(state.get_fetch_validators("b1", config))["etag"] == '"v1"'
+    assert asyncio.run(state.get_fetch_validators("b1", state.config_hash({"title": "string", "price": "number"}, None))) == {}
+    assert asyncio.run(state.get_fetch_validators("b1", state.config_hash({"title": "string"}, {"title": "h1"}))) == {}
@@ -0,0 +1,36 @@
+import asyncio
+
+from app.services import discovery_session
+from app.services.discovery_session import DiscoverySession
+
+
+def test_one_page_load_serves_discovery_and_the_first_extraction(monkeypatch, fake_redis):
+    loads = []
+
+    async def get_redis():
+        return fake_redis
+
+    async def load(self, url):
+        loads.append(url)
+        await asyncio.sleep(0.05)
+        return {"url": url, "html": "<h1>Hi</h1>", "snapshot": "[n1] h1: Hi", "elements": [], "webmcp_tools": [],
+                "captured_at": 0}
+
+    monkeypatch.setattr(discovery_session, "get_redis", get_redis)
+    monkeypatch.setattr(DiscoverySession, "load", load)
+
+    async def run():
+        session = DiscoverySession()
+        # /survey and /analyze arriving together share one navigation
+        first, second = await asyncio.gather(
+            session.get("https://Shop.com/p?utm_source=x"), session.get("https://shop.com/p")
+        )
+        assert first == second
+        assert (await session.get("https://shop.com/p"))["snapshot"] == "[n1] h1: Hi"
+
+        taken = await session.take("https://shop.com/p")
+        assert taken["html"] == "<h1>Hi</h1>"
+        assert await session.take("https://shop.com/p") is None
+
+    asyncio.run(run())
+    assert len(loads) == 1
@@ -0,0 +1,55 @@
+from app.services.distill import REST_MARKER, TRUNCATED_MARKER, distill_html
+
+PAGE = """<html><head><title>Acme Shop</title><script>var tracking = 1;</script><style>.a{}</style></head><body>
+<header class="site-header"><nav><a href="/">Home</a><a href="/about">About</a></nav></header>
+<div class="cookie-banner">We use cookies. <button>Accept</button></div>
+<div class="layout">
+  <aside class="sidebar"><ul><li><a href="/c/1">Category one</a></li></ul></aside>
+  <div id="results"><h1>Widgets</h1>
+    <ul>
+      <li><img src="/i/1.jpg" alt="Widget"><a href="/p/1">Blue Widget with a long name</a> <span>$10</span></li>
+      <li><a href="/p/2">Red Widget with a long name</a> <span>$12</span><ul><li>Only 2 left</li></ul></li>
+    </ul>
+    <table><tr><th>Size</th><th>Price</th></tr><tr><td>S</td><td>$10</td></tr></table>
+    <dl><dt>SKU</dt><dd>W-1</dd></dl>
+  </div>
+  <p class="note">Prices include VAT and free delivery on orders over $50.</p>
+</div>
+<footer>© Acme</footer></body></html>"""
+
+
+def test_distill_keeps_main_content_lists_and_tables_and_drops_boilerplate():
+    text, stats = distill_html(PAGE, 1000)
+    assert text.split("\n") == [
+        "Title: Acme Shop",
+        "# Widgets",
+        "- ![Widget](/i/1.jpg) [Blue Widget with a long name](/p/1) $10",
+        "- [Red Widget with a long name](/p/2) $12",
+        "  - Only 2 left",
+        "| Size | Price |",
+        "|---|---|",
+        "| S | $10 |",
+        "SKU: W-1",
+        REST_MARKER,
+        "Prices include VAT and free delivery on orders over $50.",
+    ]
+    assert stats["main"] == "scored" and not stats["truncated"]
+
+
+def test_distill_cuts_to_the_token_budget_on_a_line_boundary():
+    text, stats = distill_html(PAGE, 12)
+    assert text == f"Title: Acme Shop\n# Widgets\n{TRUNCATED_MARKER}"
+    assert stats["truncated"]
+
+
+def test_distill_keeps_card_level_header_and_footer():
+    cards = "".join(
+        f"<article class='card'><header><h2>Product {i}</h2></header><p>A sturdy everyday product.</p><footer>${i}.99</footer></article>"
+        for i in range(1, 4)
+    )
+    html = f"<html><body><header><a href='/'>Home</a></header><main>{cards}</main><footer>Copyright Acme</footer></body></html>"
+    text, _ = distill_html(html, budget_tokens=2000)
+    for i in range(1, 4):
+        assert f"## Product {i}" in text
+        assert f"${i}.99" in text
+    assert "Home" not in text and "Copyright" not in text
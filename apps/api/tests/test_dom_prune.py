@@ -0,0 +1,33 @@
+import asyncio
+
+from app.services.dom_prune import pruned_content
+
+
+class FakePage:
+    def __init__(self, result=None):
+        self.result = result
+
+    async def evaluate(self, script, args):
+        if self.result is None:
+            raise RuntimeError("Execution context was destroyed")
+        assert args["maxChildren"] > 0
+        return self.result
+
+    async def content(self):
+        return "<html><body>é</body></html>"
+
+
+def test_pruned_content_reports_transfer_savings():
+    page = FakePage({"html": "<html><body>x</body></html>", "bytesBefore": 4000, "bytesAfter": 1000, "removed": 12, "truncated": 0})
+    html, stats = asyncio.run(pruned_content(page))
+    assert html == "<html><body>x</body></html>"
+    assert stats == {
+        "pruned": True, "bytes_before": 4000, "bytes_after": 1000, "ratio": 0.25,
+        "nodes_removed": 12, "children_truncated": 0,
+    }
+
+
+def test_pruned_content_falls_back_to_full_page():
+    html, stats = asyncio.run(pruned_content(FakePage()))
+    assert html == "<html><body>é</body></html>"
+    assert stats == {"pruned": False, "bytes_before": 28, "bytes_after": 28, "ratio": 1.0}
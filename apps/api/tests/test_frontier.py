@@ -0,0 +1,37 @@
+import gzip
+
+from app.services.frontier import extract_links, normalize_url, parse_sitemap
+
+
+def test_parse_gzipped_sitemap_and_index():
+    urlset = gzip.compress(b"""<?xml version="1.0"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+          <url><loc>https://shop.com/p/1</loc><priority>0.9</priority><lastmod>2026-01-01</lastmod></url>
+          <url><loc> https://shop.com/p/2 </loc></url>
+        </urlset>""")
+    entries, nested = parse_sitemap(urlset)
+    assert nested == []
+    assert entries == [
+        {"loc": "https://shop.com/p/1", "priority": 0.9, "lastmod": "2026-01-01"},
+        {"loc": "https://shop.com/p/2", "priority": 0.5, "lastmod": None},
+    ]
+
+    index = b"""<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+          <sitemap><loc>https://shop.com/products.xml.gz</loc></sitemap>
+        </sitemapindex>"""
+    assert parse_sitemap(index) == ([], ["https://shop.com/products.xml.gz"])
+
+
+def test_normalize_url_dedupes_equivalent_urls():
+    assert normalize_url("HTTPS://Shop.com:443/p/1?b=2&utm_source=x&a=1#reviews") == "https://shop.com/p/1?a=1&b=2"
+    assert normalize_url("https://shop.com") == "https://shop.com/"
+    assert normalize_url("mailto:hi@shop.com") is None
+
+
+def test_extract_links_keeps_same_site_matches():
+    html = """<html><body>
+        <a href="/p/1">One</a><a href="p/2?x=1">Two</a><a href="/about">About</a>
+        <a href="https://other.com/p/3">Elsewhere</a><a href="#top">Top</a>
+    </body></html>"""
+    links = extract_links(html, "https://shop.com/catalog/", [r"/p/\d+"])
+    assert links == ["https://shop.com/p/1", "https://shop.com/catalog/p/2?x=1"]
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.core import http_clients
+from app.core.http_clients import PURPOSE_FETCH, close_http_clients, get_http_client_stats
+from app.services.fetcher import StaticFetchService
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/start":
+            self.send_response(302)
+            self.send_header("Location", "/end")
+            self.send_header("Set-Cookie", "step=redirected; Path=/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = f"<html><body>{self.headers.get('Cookie', '')}</body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_fetch_keeps_session_cookies_across_redirects_on_a_reused_connection(server, monkeypatch):
+    monkeypatch.setattr(http_clients, "_stats", {})
+
+    async def run():
+        try:
+            fetcher = StaticFetchService()
+            cookies = [{"name": "sid", "value": "abc", "domain": "127.0.0.1", "path": "/"}]
+            first = await fetcher.fetch(f"{server}/start", cookies=cookies)
+            second = await fetcher.fetch(f"{server}/end")
+        finally:
+            await close_http_clients()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert "sid=abc" in first.text and "step=redirected" in first.text
+    # The shared client must not remember cookies between fetches
+    assert "sid" not in second.text and "step" not in second.text
+
+    stats = get_http_client_stats()[PURPOSE_FETCH]
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+
+
+def test_loop_change_closes_the_previous_loops_client_on_that_loop(server, monkeypatch):
+    monkeypatch.setattr(http_clients, "_stats", {})
+
+    async def fetch():
+        client = http_clients.get_http_client(PURPOSE_FETCH)
+        await client.get(f"{server}/end")
+        return client
+
+    old_loop = asyncio.new_event_loop()
+    try:
+        old = old_loop.run_until_complete(fetch())
+        new = asyncio.run(fetch())
+        assert new is not old and not old.is_closed
+        # The close was left on the old loop and runs the next time it does
+        old_loop.run_until_complete(asyncio.sleep(0.01))
+        assert old.is_closed
+    finally:
+        asyncio.run(close_http_clients())
+        old_loop.close()
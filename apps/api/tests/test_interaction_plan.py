@@ -0,0 +1,28 @@
+from app.services.interaction_plan import compile_script, is_css_selector
+
+
+def test_consecutive_in_page_steps_are_batched():
+    plan = compile_script([
+        {"action": "type", "selector": "#q", "text": "shoes"},
+        {"action": "type", "selector": "input[name=zip]", "text": "10001"},
+        {"action": "click", "selector": "#search"},
+        {"action": "wait", "ms": 2000},
+        {"action": "scroll_bottom"},
+    ])
+    assert [entry["kind"] for entry in plan] == ["batch", "step", "step", "step"]
+    assert [s["index"] for s in plan[0]["steps"]] == [0, 1]
+    assert plan[1]["wait_for"] == "dom_quiet"
+    assert plan[3]["step"]["index"] == 4
+
+
+def test_playwright_selectors_are_not_batched():
+    assert not is_css_selector("text=Sign in")
+    assert not is_css_selector("button:has-text('Next')")
+    assert not is_css_selector("//div[@id='x']")
+    assert is_css_selector("form#login input[type=email]")
+
+    plan = compile_script([
+        {"action": "type", "selector": "text=Email", "text": "a@b.c"},
+        {"action": "type", "selector": "#password", "text": "x", "optional": True},
+    ])
+    assert [entry["kind"] for entry in plan] == ["step", "step"]
@@ -0,0 +1,15 @@
+from app.services.network_capture import resolve_json_path, url_pattern
+
+
+def test_url_pattern_normalizes_ids_and_query_values():
+    first = url_pattern("https://api.shop.com/v1/products/123/reviews?page=2&sort=new")
+    second = url_pattern("https://api.shop.com/v1/products/987/reviews?sort=old&page=5")
+    assert first == second == "api.shop.com/v1/products/{id}/reviews?page&sort"
+
+
+def test_resolve_json_path():
+    payload = {"data": {"items": [{"name": "A", "price": 1}, {"name": "B", "price": 2}]}}
+    assert resolve_json_path(payload, "data.items[*].name") == ["A", "B"]
+    assert resolve_json_path(payload, "$.data.items[1]") == {"name": "B", "price": 2}
+    assert resolve_json_path(payload, "data.missing.key") is None
+    assert resolve_json_path(payload, None) is payload
@@ -0,0 +1,47 @@
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+
+from app.services.pagination import find_next_link, merge_page_results, page_numbers, should_stop, unharvested_selector
+
+
+def test_page_numbers_respect_range_and_max_pages():
+    assert page_numbers({"start": 2, "end": 4}) == [2, 3, 4]
+    assert page_numbers({"start": 1, "end": 100, "max_pages": 3}) == [1, 2, 3]
+
+
+def test_find_next_link_resolves_relative_href():
+    html = "<html><body><a class='next' href='?page=3'>Next</a></body></html>"
+    assert find_next_link(html, "a.next", "https://shop.example.com/list?page=2") == "https://shop.example.com/list?page=3"
+    assert find_next_link(html, "a.prev", "https://shop.example.com/list") is None
+
+
+def test_stop_when_selector_missing():
+    pagination = {"stop_when": {"selector_missing": ".item"}}
+    assert should_stop(pagination, "<html><body><p>No results</p></body></html>")
+    assert not should_stop(pagination, "<html><body><div class='item'>A</div></body></html>")
+    assert should_stop(pagination, None)
+
+
+def test_merge_keeps_page_provenance_in_page_order():
+    merged = merge_page_results([
+        {"page": 2, "url": "u2", "data": {"products": [{"name": "c"}]}},
+        {"page": 1, "url": "u1", "data": [{"name": "a"}, {"name": "b"}]},
+        {"page": 3, "url": "u3", "data": {"error": "LLM failed"}},
+    ])
+    assert [item["name"] for item in merged["items"]] == ["a", "b", "c"]
+    assert [item["_page"] for item in merged["items"]] == [1, 1, 2]
+    assert merged["pages"][2] == {"page": 3, "url": "u3", "item_count": 0, "error": "LLM failed"}
+
+
+def test_unharvested_selector_filters_every_comma_part():
+    selector = unharvested_selector('.post, a[title="x, y"], li:is(.ad, .promo)')
+    assert selector == (
+        '.post:not([data-bridge-harvested]), a[title="x, y"]:not([data-bridge-harvested]), '
+        'li:is(.ad, .promo):not([data-bridge-harvested])'
+    )
+
+    doc = lxml_html.fromstring(
+        "<div><p class='post' data-bridge-harvested>old</p><p class='post'>new</p>"
+        "<i class='ad' data-bridge-harvested>old ad</i></div>"
+    )
+    assert [el.text for el in CSSSelector(unharvested_selector(".post, .ad"))(doc)] == ["new"]
@@ -0,0 +1,49 @@
+import asyncio
+
+from conftest import FakeRedis
+
+from app.services import politeness
+from app.services.politeness import ACQUIRE_SCRIPT, RENEW_SCRIPT, PolitenessScheduler
+
+
+class LeaseRedis(FakeRedis):
+    def __init__(self):
+        super().__init__()
+        self.renewals = 0
+        self.released = []
+
+    async def eval(self, script, numkeys, *args):
+        if script == RENEW_SCRIPT:
+            self.renewals += 1
+            return 1
+        assert script == ACQUIRE_SCRIPT
+        return 0
+
+    async def zrem(self, key, lease_id):
+        self.released.append(lease_id)
+
+    def pipeline(self):
+        raise ConnectionError("stats are best effort")
+
+
+def test_slot_lease_is_renewed_while_held_and_released_after(monkeypatch):
+    redis = LeaseRedis()
+
+    async def get_redis():
+        return redis
+
+    monkeypatch.setattr(politeness, "get_redis", get_redis)
+    monkeypatch.setattr(politeness.settings, "politeness_lease_ttl_seconds", 0.3)
+
+    async def run():
+        async with PolitenessScheduler().slot("Shop.Example", crawl_delay=0):
+            # A render longer than the lease TTL
+            await asyncio.sleep(0.35)
+        renewals = redis.renewals
+        await asyncio.sleep(0.25)
+        return renewals
+
+    renewals = asyncio.run(run())
+    assert renewals >= 2
+    assert redis.renewals == renewals
+    assert len(redis.released) == 1
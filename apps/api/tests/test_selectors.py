@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.services.extractor import ExtractionService
+from app.services.selectors import SelectorSpecError, compile_selectors, css_selector, extract_with_selectors
+
+HTML = """
+<html><head><link rel="canonical" href="/shop"></head><body>
+<h1> Acme  Shop </h1>
+<span itemprop="sku">W-1</span>
+<ul>
+  <li class="product"><h3>Blue</h3><a href="/p/1">view</a><span class="price">$1,299.00</span></li>
+  <li class="product"><h3>Red</h3><a href="p/2">view</a><span class="price">12 EUR</span></li>
+</ul>
+<span class="tag">new</span><span class="tag">sale</span>
+</body></html>
+"""
+
+SPEC = {
+    "title": "h1",
+    "canonical": {"selector": "link[rel=canonical]@href", "transform": "absolute_url"},
+    "sku": "xpath://span[@itemprop='sku']/text()",
+    "tags": {"selector": ".tag", "many": True, "transform": ["upper"]},
+    "products": {
+        "selector": "li.product",
+        "fields": {
+            "name": "h3",
+            "url": {"selector": "a", "attr": "href", "transform": "absolute_url"},
+            "price": {"selector": ".price", "transform": ["number"]},
+        },
+    },
+    "rating": ".rating",
+}
+
+
+def test_selectors_extract_containers_attributes_and_transforms():
+    data, stats = extract_with_selectors(HTML, SPEC, "https://shop.example/c/")
+    assert data == {
+        "title": "Acme Shop",
+        "canonical": "https://shop.example/shop",
+        "sku": "W-1",
+        "tags": ["NEW", "SALE"],
+        "products": [
+            {"name": "Blue", "url": "https://shop.example/p/1", "price": 1299},
+            {"name": "Red", "url": "https://shop.example/c/p/2", "price": 12},
+        ],
+        "rating": None,
+    }
+    assert stats["source"] == "selectors"
+    assert stats["coverage"] == round(5 / 6, 3)
+
+
+def test_invalid_specs_are_rejected():
+    with pytest.raises(SelectorSpecError):
+        compile_selectors({"title": "h1[["})
+    with pytest.raises(SelectorSpecError):
+        compile_selectors({"price": {"selector": ".price", "transform": "nope"}})
+    assert css_selector("a.title@href") == "a.title"
+    assert css_selector({"selector": "xpath://h1"}) is None
+
+
+def test_covering_selectors_skip_the_llm_and_weak_ones_fall_back(fake_provider):
+    service = ExtractionService(db=None)
+    fake_provider.respond = lambda messages: {"title": "from llm"}
+    service._provider = fake_provider
+
+    data = asyncio.run(service.extract_structured_data(HTML, {"title": "string"}, None, selectors={"title": "h1"}))
+    assert data == {"title": "Acme Shop"}
+    assert fake_provider.calls == 0
+    assert service.last_extraction_stats["source"] == "selectors"
+
+    data = asyncio.run(service.extract_structured_data(HTML, {"title": "string"}, None, selectors={"title": "h2"}))
+    assert data == {"title": "from llm"}
+    assert fake_provider.calls == 1
+    assert service.last_extraction_stats["selectors"]["coverage"] == 0
@@ -0,0 +1,36 @@
+from app.services.snapshot import build_snapshot, snapshot_stats
+
+PAGE = """
+<html><head><style>.x{color:red}</style><script>var a = 1;</script></head>
+<body>
+  <div class="wrapper"><div class="inner">
+    <h1 class="title">Acme Shop</h1>
+    <ul class="products">
+      <li class="product"><a href="/p/1">Widget</a> <span class="price">$10</span></li>
+      <li class="product"><a href="/p/2">Gadget</a> <span class="price">$12</span></li>
+    </ul>
+    <div style="display: none">Hidden promo</div>
+    <div class="empty"><div></div></div>
+  </div></div>
+</body></html>
+"""
+
+
+def test_snapshot_keeps_text_and_structure():
+    snapshot = build_snapshot(PAGE)
+    assert snapshot.splitlines() == [
+        "[n1] h1: Acme Shop",
+        "[n2] ul",
+        "  [n3] li",
+        "    [n4] a (href=/p/1): Widget",
+        "    [n5] span: $10",
+        "  [n6] li",
+        "    [n7] a (href=/p/2): Gadget",
+        "    [n8] span: $12",
+    ]
+
+
+def test_snapshot_stats():
+    stats = snapshot_stats(PAGE, build_snapshot(PAGE), "html")
+    assert stats["snapshot_chars"] < stats["html_chars"]
+    assert stats["tokens_saved_est"] > 0
@@ -0,0 +1,16 @@
+import os
+
+from app.services.archive import SnapshotArchive
+
+
+def test_blobs_are_compressed_and_content_addressed(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    html = "<html><body>" + "<p>Repeated product row</p>" * 500 + "</body></html>"
+
+    content_hash, size, compressed = archive._write_blob(html)
+    again_hash, _, _ = archive._write_blob(html)
+
+    assert again_hash == content_hash
+    assert compressed < size / 10
+    assert archive._read_blob(content_hash) == html
+    assert len(os.listdir(tmp_path / content_hash[:2])) == 1
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services import crawler as crawler_module
+from app.services.fetcher import MODE_STATIC, StaticFetchService
+
+ARTICLE = "<p>" + "Server rendered product listing with plenty of readable text. " * 10 + "</p>"
+
+
+def test_server_rendered_page_is_static():
+    html = f"<html><body><h1 class='title'>Shop</h1><span class='price'>$10</span>{ARTICLE}</body></html>"
+    needs_render, reason = StaticFetchService().needs_render(html, {"title": "string", "price": "number"})
+    assert not needs_render, reason
+
+
+def test_empty_mount_point_needs_render():
+    html = "<html><body><div id='root'></div><script src='/app.js'></script></body></html>"
+    needs_render, reason = StaticFetchService().needs_render(html)
+    assert needs_render
+    assert reason == "spa_marker"
+
+
+def test_missing_selector_needs_render():
+    html = f"<html><body><ul class='items'></ul>{ARTICLE}</body></html>"
+    needs_render, reason = StaticFetchService().needs_render(html, selectors={"items": "ul.items li"})
+    assert needs_render
+    assert reason == "selector_missing:items"
+
+
+def test_empty_body_needs_render():
+    needs_render, reason = StaticFetchService().needs_render("<html><body><p>Loading...</p></body></html>")
+    assert needs_render
+    assert reason == "empty_body"
+
+
+def test_static_fetch_serves_sufficient_html(monkeypatch):
+    html = f"<html><body><h1 class='title'>Shop</h1>{ARTICLE}</body></html>"
+    modes = {}
+
+    async def get_mode(self, key):
+        return modes.get(key)
+
+    async def set_mode(self, key, mode):
+        modes[key] = mode
+
+    async def fetch(self, url, cookies, validators=None):
+        return SimpleNamespace(status_code=200, text=html, headers={"etag": '"v1"'})
+
+    monkeypatch.setattr(crawler_module.StaticFetchService, "get_mode", get_mode)
+    monkeypatch.setattr(crawler_module.StaticFetchService, "set_mode", set_mode)
+    monkeypatch.setattr(crawler_module.StaticFetchService, "fetch", fetch)
+
+    crawler = crawler_module.CrawlerService()
+    content = asyncio.run(crawler._try_static_fetch("https://shop.example/", "bridge-1", None, None, {"title": "string"}, None))
+    assert content == html
+    assert modes == {"bridge-1": MODE_STATIC}
+    assert crawler.last_crawl_stats["fetch_tier"] == "static"
+    assert crawler.last_crawl_stats["validators"]["etag"] == '"v1"'
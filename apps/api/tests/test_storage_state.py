@@ -0,0 +1,23 @@
+from app.services.interaction import InteractionService
+
+
+def test_storage_state_merges_session_and_cookie_auth():
+    session = {
+        "cookies": [{"name": "sid", "value": "abc", "domain": ".shop.com", "path": "/", "expires": 1900000000,
+                     "httpOnly": True, "secure": True, "sameSite": "Lax"}],
+        "origins": [{"origin": "https://shop.com", "localStorage": [{"name": "token", "value": "t"}]}],
+        "captured_at": "2026-01-01T00:00:00",
+    }
+    auth = {"type": "cookie", "cookies": [{"name": "consent", "value": "yes", "url": "https://shop.com/"}]}
+
+    state = InteractionService().build_storage_state(session, auth)
+
+    assert set(state) == {"cookies", "origins"}
+    assert state["origins"] == session["origins"]
+    assert [c["name"] for c in state["cookies"]] == ["sid", "consent"]
+    assert state["cookies"][1]["domain"] == "shop.com"
+    assert state["cookies"][1]["path"] == "/"
+
+
+def test_storage_state_empty_without_session():
+    assert InteractionService().build_storage_state(None, {"type": "login_flow", "steps": []}) is None
@@ -0,0 +1,151 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import browser_pool as browser_pool_module
+from app.core.browser_pool import BrowserCapacityError, BrowserPool
+from app.models import WebMCPTool
+from app.services import webmcp as webmcp_module
+from app.services.webmcp import (
+    WEBMCP_SHIM_SCRIPT,
+    WebMCPService,
+    diff_manifest,
+    manifest_is_stale,
+    pick_extraction_tool,
+    stored_manifest,
+)
+from app.services.webmcp_sessions import session_limit
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+
+def tool(name, verified_ago=None, available=True):
+    return WebMCPTool(
+        id=uuid.uuid4(),
+        tool_name=name,
+        tool_type="imperative",
+        description=name,
+        parameters_schema={},
+        is_available=available,
+        last_verified_at=NOW - verified_ago if verified_ago is not None else None,
+    )
+
+
+def test_stored_manifest_is_trusted_until_the_sweeper_finds_it_stale():
+    rows = [tool("search", timedelta(hours=1)), tool("get_data", timedelta(hours=2)), tool("old", timedelta(hours=3), available=False)]
+    manifest = stored_manifest(rows)
+    assert [t["tool_name"] for t in manifest] == ["search", "get_data"]
+    assert pick_extraction_tool(manifest) == "get_data"
+    assert not manifest_is_stale(rows, NOW)
+
+    assert manifest_is_stale(rows + [tool("extract", timedelta(days=2))], NOW)
+    assert manifest_is_stale([tool("extract")], NOW)
+    assert manifest_is_stale([], NOW)
+    assert stored_manifest([]) is None
+    assert stored_manifest([tool("old", available=False)]) == []
+
+
+def test_diff_manifest_inserts_new_updates_known_and_retires_missing_tools():
+    bridge_id = uuid.uuid4()
+    search, old = tool("search", timedelta(days=2)), tool("old", timedelta(days=2))
+    probed = [{"tool_name": "search", "tool_type": "imperative"}, {"tool_name": "extract", "tool_type": "declarative"}]
+
+    inserts, updates = diff_manifest(bridge_id, [search, old], probed, NOW)
+
+    assert [(i["bridge_id"], i["tool_name"], i["is_available"]) for i in inserts] == [(bridge_id, "extract", True)]
+    assert {u["id"]: u["is_available"] for u in updates} == {search.id: True, old.id: False}
+    assert all(u["last_verified_at"] == NOW for u in inserts + updates)
+
+
+def test_execute_batch_keeps_call_order_and_stops_on_error():
+    service = WebMCPService()
+    seen = []
+
+    async def call_tool(page, tool_name, parameters):
+        seen.append(tool_name)
+        if tool_name == "checkout":
+            return {"status": "error", "error": "Tool not registered: checkout"}
+        await asyncio.sleep(0.01 if tool_name == "search" else 0)
+        return {"status": "success", "result": parameters}
+
+    service.call_tool = call_tool
+    calls = [{"tool_name": "search", "parameters": {"q": "tea"}}, {"tool_name": "checkout"}, {"tool_name": "add_to_cart"}]
+
+    ordered = asyncio.run(service.execute_batch(object(), calls, stop_on_error=True))
+    assert [(r["tool_name"], r["status"]) for r in ordered] == [("search", "success"), ("checkout", "error"), ("add_to_cart", "skipped")]
+    assert ordered[0]["result"] == {"q": "tea"} and ordered[0]["duration_ms"] >= 10
+
+    seen.clear()
+    parallel = asyncio.run(service.execute_batch(object(), calls, parallel=True))
+    assert [r["tool_name"] for r in parallel] == ["search", "checkout", "add_to_cart"]
+    assert seen == ["search", "checkout", "add_to_cart"] and parallel[2]["status"] == "success"
+
+
+class FakePage:
+    def __init__(self):
+        self.init_scripts = []
+
+    def on(self, event, handler):
+        pass
+
+    async def add_init_script(self, script):
+        self.init_scripts.append(script)
+
+    async def goto(self, url, **kwargs):
+        pass
+
+    async def evaluate(self, script, args=None):
+        # The site's native executeTool
+        return {"items": [1, 2]}
+
+    async def close(self):
+        pass
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        self.pages.append(FakePage())
+        return self.pages[-1]
+
+
+class FakeScheduler:
+    @asynccontextmanager
+    async def slot(self, host):
+        yield
+
+
+def test_execution_never_goes_through_the_shim(monkeypatch):
+    monkeypatch.setattr(webmcp_module, "PolitenessScheduler", FakeScheduler)
+    service = WebMCPService()
+    service.context = FakeContext()
+
+    result = asyncio.run(service.execute_tool("https://shop.example/", "extract", {}))
+    run = asyncio.run(service.discover_and_execute("https://shop.example/", manifest=[{"tool_name": "extract"}]))
+
+    assert result == {"status": "success", "result": {"items": [1, 2]}}
+    assert run["result"]["result"] == {"items": [1, 2]}
+    assert all(page.init_scripts == [] for page in service.context.pages)
+    # Discovery may shim a missing modelContext, but never with a stand-in executeTool
+    assert "executeTool" not in WEBMCP_SHIM_SCRIPT and "if (window.modelContext" in WEBMCP_SHIM_SCRIPT
+
+
+def test_kept_alive_sessions_cannot_starve_the_pool(monkeypatch):
+    monkeypatch.setattr(browser_pool_module.settings, "browser_capacity_wait_seconds", 0.05)
+    monkeypatch.setattr(browser_pool_module.settings, "webmcp_max_sessions", 8)
+    assert session_limit(BrowserPool(size=2, max_contexts_per_browser=4)) == 4
+    assert session_limit(BrowserPool(size=1, max_contexts_per_browser=1)) == 0
+
+    pool = BrowserPool(size=1, max_contexts_per_browser=1)
+
+    async def run():
+        await pool._acquire_slot()
+        with pytest.raises(BrowserCapacityError):
+            await pool._acquire_slot()
+
+    asyncio.run(run())